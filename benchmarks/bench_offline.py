@@ -0,0 +1,417 @@
+import os
+import sys
+import gc
+import glob
+import json
+import time
+import random
+import shutil
+import itertools
+import argparse
+import tempfile
+import tracemalloc
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import video_crawler_multi as engine
+import video_crawler_crypto as crypto
+import video_crawler_giftcards as giftcards
+import video_crawler_giveaway as giveaway
+from http_discovery import parse_initial_data, parse_results
+from metadata_sinks import pa
+from video_ids import canonical_video, canonical_video_id, SeenVideos
+
+# ==================================================
+# OFFLINE PIPELINE BENCHMARK
+# ==================================================
+# Times the CPU-side stages of the crawler without touching YouTube:
+#
+#   discovery   ytInitialData parsing of the recorded pages in fixtures/youtube,
+#               and iter_candidates + prefilter_candidate replayed from them;
+#               href canonicalization and the seen-ID filter over repeats
+#   extract     evaluate_video post-processing of the yt-dlp info dicts in
+#               fixtures/info_dicts (extract_info itself is replayed)
+#   keywords    is_crypto_scam / is_gift_card_scam / is_giveaway_scam and the
+#               engine's weighted score_video over a synthetic corpus;
+#               is_crypto_scam also on 20x longer texts and on 2 KB texts
+#               without a hit, each next to the original `any(k in text)`
+#               scan (keywords.scan_*) it replaced
+#   hashtags    extract_hashtags over the same corpus
+#   save        save_metadata into a temp dir, once per sink
+#
+# The save benchmarks mostly measure the disk. Point --output-dir at the
+# same place (ideally a tmpfs) for the baseline and the comparison; their
+# regressions are judged with the looser --io-tolerance.
+# Each benchmark reports the best of --rounds timed rounds as ops/s, and the
+# peak traced memory of one extra round. --save-baseline records the results;
+# --baseline compares against them and exits 1 when a benchmark got slower or
+# hungrier than --tolerance allows:
+#
+#   python benchmarks/bench_offline.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/bench_offline.py --baseline benchmarks/baseline.json
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES = ("search_results.html", "channel_shorts.html")
+MEMORY_SLACK_KIB = 64  # peak memory differences below this are noise
+
+FILLER = (
+    "the a my this new today watch best how to why you your for with and in on of is it "
+    "easy quick tutorial vlog day life funny cat dog recipe music dance challenge trend "
+    "shorts viral edit gaming minecraft fortnite workout tips story reaction review unboxing "
+    "travel city morning night routine school prank wait end try video part"
+).split()
+
+
+# ---------------- fixtures ----------------
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding="utf-8") as f:
+        return f.read()
+
+
+def load_pages():
+    return [read_fixture("youtube", name) for name in PAGES]
+
+
+def load_continuations():
+    return [read_fixture("youtube", "continuations", os.path.basename(path))
+            for path in sorted(glob.glob(os.path.join(FIXTURES, "youtube", "continuations", "*.json")))]
+
+
+def load_info_dicts():
+    infos = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "info_dicts", "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            infos.append(json.load(f))
+    return infos
+
+
+def synthetic_corpus(size, hit_rate=0.3, seed=1234):
+    # (title, description, tags) triples; about `hit_rate` of them carry a
+    # scam keyword somewhere, the rest are ordinary Shorts text
+    rng = random.Random(seed)
+    keywords = sorted({k for cat in engine.CATEGORIES.values() for k in cat["keywords"]})
+    corpus = []
+    for _ in range(size):
+        title = rng.choices(FILLER, k=rng.randint(4, 12))
+        description = rng.choices(FILLER, k=rng.randint(10, 120))
+        tags = rng.sample(FILLER, rng.randint(0, 8))
+        if rng.random() < hit_rate:
+            target = rng.choice((title, description, description, tags))
+            target.insert(rng.randint(0, len(target)), rng.choice(keywords))
+        description += [f"#{w}" for w in rng.sample(FILLER, rng.randint(0, 5))]
+        corpus.append((" ".join(title).capitalize(), " ".join(description), tags))
+    return corpus
+
+
+def scale_raws(raws, size):
+    # Copies of the recorded results under unique video IDs, `size` in total
+    scaled = []
+    for i in range(size):
+        raw = raws[i % len(raws)]
+        video_id = f"{i:011d}"
+        scaled.append(dict(raw, video_id=video_id, href=raw["href"].replace(canonical_video_id(raw["href"]), video_id)))
+    return scaled
+
+
+def mixed_hrefs(size, repeats=3, seed=1234):
+    # `size` IDs, each linked `repeats` times in the forms pages use, shuffled
+    forms = ("https://www.youtube.com/watch?v={}&pp=ygUKY3J5cHRv", "https://www.youtube.com/shorts/{}",
+             "/shorts/{}?feature=share", "https://youtu.be/{}?t=3", "https://m.youtube.com/watch?v={}")
+    rng = random.Random(seed)
+    hrefs = [rng.choice(forms).format(f"{i:011d}") for i in range(size) for _ in range(repeats)]
+    rng.shuffle(hrefs)
+    return hrefs
+
+
+class ReplayDriver:
+    # Plays recorded results back through the Selenium calls iter_candidates
+    # makes; each scroll reveals the next `per_scroll` results at once
+    def __init__(self, raws, per_scroll=20):
+        self.raws = raws
+        self.per_scroll = per_scroll
+        self.shown = min(per_scroll, len(raws))
+        self.read = 0
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script, *args):
+        if script == engine.COUNT_ANCHORS_JS:
+            return self.shown
+        if script == engine.NEW_CANDIDATES_JS:
+            new, self.read = self.raws[self.read:self.shown], self.shown
+            return new
+        self.shown = min(self.shown + self.per_scroll, len(self.raws))  # scrollBy
+
+
+class ReplayExtractor:
+    def __init__(self, infos):
+        self.infos = {info["id"]: info for info in infos}
+
+    def extract_info(self, url, download=False):
+        return self.infos[engine.video_id_from_url(url)]
+
+
+# ---------------- benchmarks ----------------
+# Each returns (operations per round, function running one round)
+def bench_parse_pages(args):
+    pages = load_pages()
+
+    def run():
+        for html in pages:
+            parse_results(parse_initial_data(html))
+    return len(pages), run
+
+
+def bench_parse_continuations(args):
+    bodies = load_continuations()
+
+    def run():
+        for body in bodies:
+            parse_results(json.loads(body))
+    return len(bodies), run
+
+
+def bench_replay_discovery(args):
+    raws = []
+    for html in load_pages():
+        raws += parse_results(parse_initial_data(html))[0]
+    raws = scale_raws(raws, args.page_size)
+    # Spread the page over the scroll rounds, and don't wait out a stalled scroll
+    per_scroll = -(-len(raws) // (engine.SCROLL_ROUNDS + 1))
+    engine.SCROLL_WAIT_TIMEOUT = 0
+    engine.PAGE_YIELD_TARGET = max(engine.PAGE_YIELD_TARGET, len(raws))
+
+    def run():
+        for candidate in engine.iter_candidates(ReplayDriver(raws, per_scroll), "https://www.youtube.com/results"):
+            engine.prefilter_candidate(candidate)
+    return len(raws), run
+
+
+def bench_seen_filter(args):
+    hrefs = mixed_hrefs(args.corpus)
+
+    def run():
+        seen = SeenVideos()
+        for href in hrefs:
+            video_id, _ = canonical_video(href)
+            if video_id not in seen:
+                seen.add(video_id)
+    return len(hrefs), run
+
+
+def bench_evaluate(args):
+    infos = load_info_dicts()
+    urls = [f"https://www.youtube.com/shorts/{info['id']}" for info in infos] * max(1, args.corpus // len(infos))
+    extractor = ReplayExtractor(infos)
+    engine.get_extractor = lambda: extractor
+
+    def run():
+        for url in urls:
+            engine.evaluate_video(url)
+    return len(urls), run
+
+
+def original_scan(keywords):
+    # The single-category scripts' check before the keyword matcher
+    def is_scam(text):
+        if not text:
+            return False
+        t = text.lower()
+        return any(k in t for k in keywords)
+    return is_scam
+
+
+def matcher_texts(args, shape):
+    corpus = synthetic_corpus(args.corpus)
+    texts = [f"{title} {description} {' '.join(tags)}" for title, description, tags in corpus]
+    if shape == "long":
+        return [" ".join([text] * 20) for text in texts]
+    if shape == "miss":
+        rng = random.Random(99)
+        scan = original_scan(crypto.CRYPTO_SCAM_KEYWORDS)
+        texts = []
+        while len(texts) < args.corpus:
+            text = " ".join(rng.choices(FILLER, k=400))[:2048]
+            if not scan(text):
+                texts.append(text)
+    return texts
+
+
+def bench_matcher(matcher, shape="corpus"):
+    def bench(args):
+        texts = matcher_texts(args, shape)
+
+        def run():
+            for text in texts:
+                matcher(text)
+        return len(texts), run
+    return bench
+
+
+def bench_score(args):
+    corpus = synthetic_corpus(args.corpus)
+
+    def run():
+        for title, description, tags in corpus:
+            engine.score_video(title, description, tags)
+    return len(corpus), run
+
+
+def bench_hashtags(args):
+    corpus = synthetic_corpus(args.corpus)
+
+    def run():
+        for _, description, tags in corpus:
+            engine.extract_hashtags(description, tags)
+    return len(corpus), run
+
+
+def bench_save(sink):
+    def bench(args):
+        extractor = ReplayExtractor(load_info_dicts())
+        engine.get_extractor = lambda: extractor
+        metas = [m for m in (engine.extract_metadata(f"https://www.youtube.com/shorts/{vid}")
+                             for vid in extractor.infos) if m]
+        records = [dict(metas[i % len(metas)], video_id=f"{metas[i % len(metas)]['video_id']}_{i}")
+                   for i in range(args.records)]
+        root = tempfile.mkdtemp(prefix="bench_save_", dir=args.output_dir)
+        rounds = itertools.count()
+
+        def run():
+            # A fresh output dir per round, so every record is new; closing
+            # the sink flushes what a buffered sink still holds
+            engine.OUTPUT_DIR = os.path.join(root, str(next(rounds)))
+            engine.METADATA_SINK = sink
+            try:
+                for record in records:
+                    engine.save_metadata(record)
+            finally:
+                engine.close_sink()
+        run.cleanup = lambda: shutil.rmtree(root, ignore_errors=True)
+        return sum(len(r["categories"]) for r in records), run
+    return bench
+
+
+BENCHMARKS = [
+    ("discovery.parse_pages", bench_parse_pages),
+    ("discovery.parse_continuations", bench_parse_continuations),
+    ("discovery.replay_prefilter", bench_replay_discovery),
+    ("discovery.seen_filter", bench_seen_filter),
+    ("extract.evaluate_video", bench_evaluate),
+    ("keywords.is_crypto_scam", bench_matcher(crypto.is_crypto_scam)),
+    ("keywords.is_gift_card_scam", bench_matcher(giftcards.is_gift_card_scam)),
+    ("keywords.is_giveaway_scam", bench_matcher(giveaway.is_giveaway_scam)),
+    ("keywords.scan_crypto", bench_matcher(original_scan(crypto.CRYPTO_SCAM_KEYWORDS))),
+    ("keywords.is_crypto_scam.long", bench_matcher(crypto.is_crypto_scam, "long")),
+    ("keywords.scan_crypto.long", bench_matcher(original_scan(crypto.CRYPTO_SCAM_KEYWORDS), "long")),
+    ("keywords.is_crypto_scam.miss", bench_matcher(crypto.is_crypto_scam, "miss")),
+    ("keywords.scan_crypto.miss", bench_matcher(original_scan(crypto.CRYPTO_SCAM_KEYWORDS), "miss")),
+    ("keywords.score_video", bench_score),
+    ("hashtags.extract_hashtags", bench_hashtags),
+    ("save.json", bench_save("json")),
+    ("save.jsonl", bench_save("jsonl")),
+    ("save.parquet", bench_save("parquet")),
+]
+
+
+# ---------------- runner ----------------
+def measure(ops, run, rounds, min_time):
+    # warm-up (imports, regex caches, first directory listings), then enough
+    # repeats per round that a round lasts at least min_time
+    start = time.perf_counter()
+    run()
+    repeat = max(1, int(min_time / max(time.perf_counter() - start, 1e-9)) + 1)
+    timings = []
+    for _ in range(rounds):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        timings.append((time.perf_counter() - start) / repeat)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "ops": ops,
+        "ops_per_sec": round(ops / min(timings), 1),
+        "median_us": round(statistics.median(timings) / ops * 1e6, 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare(name, result, baseline, tolerance):
+    # Problems with this result relative to its baseline entry
+    problems = []
+    if result["ops_per_sec"] < baseline["ops_per_sec"] * (1 - tolerance):
+        problems.append(f"throughput {result['ops_per_sec']:,.0f}/s < {baseline['ops_per_sec']:,.0f}/s")
+    allowed = max(baseline["peak_kib"] * (1 + tolerance), baseline["peak_kib"] + MEMORY_SLACK_KIB)
+    if result["peak_kib"] > allowed:
+        problems.append(f"peak memory {result['peak_kib']:,.0f} KiB > {baseline['peak_kib']:,.0f} KiB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput and memory benchmarks on recorded fixtures")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7, help="timed rounds per benchmark (best one counts)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="min seconds per timed round")
+    parser.add_argument("--corpus", type=int, default=2000, help="synthetic texts / evaluated videos per round")
+    parser.add_argument("--page-size", type=int, default=200, help="results per replayed discovery page")
+    parser.add_argument("--records", type=int, default=500, help="records saved per round and sink")
+    parser.add_argument("--output-dir", help="where the save benchmarks write (default: the system temp dir)")
+    parser.add_argument("--baseline", help="fail on regressions against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown / memory growth (0.3 = 30%%)")
+    parser.add_argument("--io-tolerance", type=float, default=0.5, help="the same for the save benchmarks")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    failures = 0
+    print(f"{'benchmark':<32} {'ops':>6} {'ops/s':>12} {'µs/op':>9} {'peak KiB':>10}")
+    for name, bench in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        if name == "save.parquet" and pa is None:
+            print(f"{name:<32} skipped (pyarrow not installed)")
+            continue
+        ops, run = bench(args)
+        try:
+            result = results[name] = measure(ops, run, args.rounds, args.min_time)
+        finally:
+            if hasattr(run, "cleanup"):
+                run.cleanup()
+        line = (f"{name:<32} {ops:>6} {result['ops_per_sec']:>12,.0f} "
+                f"{result['median_us']:>9.2f} {result['peak_kib']:>10,.1f}")
+        tolerance = args.io_tolerance if name.startswith("save.") else args.tolerance
+        problems = compare(name, result, baseline[name], tolerance) if name in baseline else []
+        if problems:
+            failures += 1
+            line += "  ✗ " + "; ".join(problems)
+        elif name in baseline:
+            line += f"  ✓ {result['ops_per_sec'] / baseline[name]['ops_per_sec']:.0%} of baseline"
+        print(line)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "rounds": args.rounds, "corpus": args.corpus,
+                       "page_size": args.page_size, "records": args.records, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.save_baseline}")
+    if baseline:
+        print(f"\n✗ {failures} regressions" if failures else "\n✓ No regressions")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import statistics
+import yt_dlp
+
+# ==================================================
+# YOUTUBEDL REUSE BENCHMARK
+# ==================================================
+# Compares per-video metadata extraction latency with a fresh YoutubeDL per
+# call (the single-category scripts) against one long-lived instance (the
+# worker extractors in video_crawler_multi.py). Hits live YouTube, so keep
+# the sample small and run both modes on the same URLs.
+#
+#   python benchmarks/bench_ydl_reuse.py URL [URL ...]
+#   python benchmarks/bench_ydl_reuse.py --from-metadata OUTPUT_DIR/metadata -n 20
+
+EXTRACT_OPTS = {"quiet": True, "skip_download": True, "no_warnings": True}
+
+
+def urls_from_metadata(metadata_dir, limit):
+    urls = []
+    for path in sorted(glob.glob(os.path.join(metadata_dir, "**", "*.json"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            urls.append(json.load(f)["video_url"])
+        if len(urls) >= limit:
+            break
+    return urls
+
+
+def run_fresh(urls):
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        with yt_dlp.YoutubeDL(EXTRACT_OPTS) as ydl:
+            ydl.extract_info(url, download=False)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_reused(urls):
+    timings = []
+    start = time.perf_counter()
+    ydl = yt_dlp.YoutubeDL(EXTRACT_OPTS)
+    setup = time.perf_counter() - start
+    try:
+        for url in urls:
+            start = time.perf_counter()
+            ydl.extract_info(url, download=False)
+            timings.append(time.perf_counter() - start)
+    finally:
+        ydl.close()
+    # Charge the one-off construction to the first video
+    if timings:
+        timings[0] += setup
+    return timings
+
+
+def summarize(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"{name:<8} n={len(timings):<4} mean={statistics.mean(timings):.3f}s "
+          f"p50={statistics.median(timings):.3f}s p95={p95:.3f}s total={sum(timings):.1f}s")
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-video yt-dlp extraction latency: fresh vs reused YoutubeDL")
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--from-metadata", help="read video_url fields from saved metadata JSON files")
+    parser.add_argument("-n", type=int, default=10, help="max URLs taken from --from-metadata")
+    parser.add_argument("--target", type=int, default=2000, help="video count to project the savings for")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.from_metadata:
+        urls += urls_from_metadata(args.from_metadata, args.n)
+    if not urls:
+        parser.error("no URLs given")
+
+    # Warm DNS/TLS and yt-dlp's own import-time caches so neither mode gets them for free
+    with yt_dlp.YoutubeDL(EXTRACT_OPTS) as ydl:
+        ydl.extract_info(urls[0], download=False)
+
+    fresh = summarize("fresh", run_fresh(urls))
+    reused = summarize("reused", run_reused(urls))
+    saved = fresh - reused
+    print(f"\nReuse saves {saved:.3f}s per video ({saved / fresh:.0%}), "
+          f"~{saved * args.target / 60:.1f} min over {args.target:,} videos")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
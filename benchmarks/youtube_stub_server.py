@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ==================================================
+# YOUTUBE FIXTURE STUB SERVER
+# ==================================================
+# Serves the pages in fixtures/youtube, trimmed-down search and channel
+# responses in YouTube's layout, so HTTP discovery can run without touching
+# YouTube:
+#
+#   GET  /results?search_query=...    search_results.html ("consent wall" -> consent.html)
+#   GET  /channel/<id>/shorts         channel_shorts.html
+#   POST /youtubei/v1/search|browse   continuations/<token>.json
+#
+# Point the crawler at it with HTTP_DISCOVERY_BASE_URL = "http://127.0.0.1:8765",
+# or run the built-in check, which crawls every fixture page once:
+#
+#   python benchmarks/youtube_stub_server.py --port 8765
+#   python benchmarks/youtube_stub_server.py --check
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "youtube")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _fixture(self, *parts):
+        path = os.path.join(FIXTURES, *parts)
+        if not os.path.isfile(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/results":
+            query = parse_qs(url.query).get("search_query", [""])[0]
+            body = self._fixture("consent.html" if query == "consent wall" else "search_results.html")
+        elif url.path.endswith("/shorts"):
+            body = self._fixture("channel_shorts.html")
+        else:
+            body = None
+        if body is None:
+            self._send(404, "not found", "text/plain")
+        else:
+            self._send(200, body, "text/html; charset=utf-8")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            token = json.loads(self.rfile.read(length) or b"{}").get("continuation") or ""
+        except ValueError:
+            token = ""
+        body = None
+        if url.path in ("/youtubei/v1/search", "/youtubei/v1/browse") and "/" not in token:
+            body = self._fixture("continuations", f"{token}.json")
+        if body is None:
+            self._send(404, '{"error": "unknown continuation"}', "application/json")
+        else:
+            self._send(200, body, "application/json")
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+def start_server(port=0, verbose=False):
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server
+
+
+def run_check(server):
+    from http_discovery import HttpDiscovery, HttpDiscoveryError
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    pages = [
+        "https://www.youtube.com/results?search_query=free+bitcoin&sp=EgIYAQ%3D%3D",
+        "https://www.youtube.com/channel/UCfixture00000000000001/shorts",
+        "https://www.youtube.com/results?search_query=consent+wall&sp=EgIYAQ%3D%3D",
+    ]
+    results = {}
+
+    def work(client, page):
+        try:
+            results[page] = list(client.iter_candidates(page))
+        except HttpDiscoveryError as e:
+            results[page] = e
+
+    client = HttpDiscovery(work, workers=len(pages), base_url=base_url).start()
+    try:
+        for page in pages:
+            client.submit(page)
+    finally:
+        client.close()
+
+    failures = 0
+    for page in pages:
+        found = results.get(page)
+        print(f"\n{page}")
+        if isinstance(found, Exception) or found is None:
+            print(f"  ⊗ {found or 'no result'}")
+            continue
+        for raw in found:
+            print(f"  {raw['href']:<45} {raw['views'] or '-':>12}  {raw['title']}")
+    expected = {pages[0]: 10, pages[1]: 5}
+    for page, count in expected.items():
+        got = results.get(page)
+        if not isinstance(got, list) or len(got) != count:
+            print(f"✗ {page}: expected {count} candidates, got {got if not isinstance(got, list) else len(got)}")
+            failures += 1
+    if not isinstance(results.get(pages[2]), HttpDiscoveryError):
+        print(f"✗ {pages[2]}: expected HttpDiscoveryError for the consent page")
+        failures += 1
+    print("\n✓ Fixture check passed" if not failures else f"\n✗ {failures} fixture checks failed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded YouTube pages for HTTP discovery")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--check", action="store_true", help="crawl the fixtures once and exit")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = start_server(0 if args.check else args.port, args.verbose)
+    if args.check:
+        try:
+            return run_check(server)
+        finally:
+            server.shutdown()
+    print(f"Serving {FIXTURES} on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import sys
+import argparse
+
+from metadata_sinks import make_sink, iter_json_files
+
+# ==================================================
+# ONE-SHOT METADATA CONVERTER
+# ==================================================
+# Copies existing per-video JSON output (metadata/<folder>/*.json) into a
+# JSONL or Parquet sink. The original files are left in place; records the
+# target already holds are skipped, so the converter can be re-run safely.
+#
+#   python convert_metadata.py "C:\path\to\video_crawler" --to jsonl
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert per-video JSON metadata to JSONL or Parquet")
+    parser.add_argument("output_dir", help="crawler OUTPUT_DIR containing metadata/")
+    parser.add_argument("--to", choices=["jsonl", "parquet"], default="jsonl")
+    args = parser.parse_args()
+
+    sink = make_sink(args.to, args.output_dir)
+    written = skipped = 0
+    try:
+        for folder, record in iter_json_files(args.output_dir):
+            if sink.write(folder, record):
+                written += 1
+            else:
+                skipped += 1
+    finally:
+        sink.close()
+    print(f"✓ Converted {written} records to {args.to} ({skipped} already present)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
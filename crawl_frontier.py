@@ -0,0 +1,334 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+# ==================================================
+# PERSISTENT CRAWL FRONTIER
+# ==================================================
+# SQLite store for everything main() used to keep in memory: pages still to
+# crawl (searches and channel Shorts tabs), every video ID already evaluated
+# with its filter outcome, and per-page link counts for query progress.
+# A restarted run picks up the pending pages and the videos that were
+# queued but never finished, and skips every video it already evaluated.
+#
+# Pending pages are served highest `priority` first (FIFO among equals).
+# Search pages get a fixed priority; a channel's Shorts page is scored from
+# what its videos yielded so far (see channel_score), so channels full of
+# hits are crawled before the remaining searches and one-off hits after.
+#
+# Page status:  pending -> active -> done | failed
+#               pending -> retired (search whose query is retired or no
+#               longer listed; queued again when the query comes back)
+# Video status: queued -> saved | filtered
+#
+# Search queries are scored from what their pages yielded over all runs:
+# the `queries` table adds up links and crawl time per query, and every
+# video is credited to the page that discovered it first (videos.page_url),
+# so a query's hits are the new unique scams it found.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    query TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    links_found INTEGER,
+    priority REAL NOT NULL DEFAULT 0,
+    added_at REAL NOT NULL,
+    done_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_status ON pages(status, id);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    reason TEXT,
+    categories TEXT,
+    page_url TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(status);
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    crawls INTEGER NOT NULL DEFAULT 0,
+    links INTEGER NOT NULL DEFAULT 0,
+    seconds REAL NOT NULL DEFAULT 0,
+    last_crawled_at REAL
+);
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    name TEXT,
+    evaluated INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_hit_at REAL,
+    shorts_seen INTEGER,
+    score REAL
+);
+"""
+
+DAY = 24 * 3600
+
+# Per search query: pages crawled, links read (repeats included), videos
+# first found by it, how many of those the pre-filter dropped, how many
+# yt-dlp evaluated, saved hits, rejections by reason, crawl seconds
+QueryStats = namedtuple("QueryStats", ["query", "crawls", "links", "new", "prefiltered", "evaluated", "hits",
+                                       "reasons", "seconds", "last_crawled_at"])
+
+
+def channel_score(hits, evaluated, last_hit_at, shorts_seen, now=None,
+                  half_life_days=7.0, expected_shorts=30):
+    # Smoothed hit rate (1 hit of 1 -> 0.67, 1 of 5 -> 0.29), halved every
+    # half_life_days since the last hit, and scaled down once most of the
+    # channel's Shorts have already been evaluated.
+    now = now or time.time()
+    hit_rate = (hits + 1) / (evaluated + 2)
+    recency = 0.5 ** ((now - last_hit_at) / (half_life_days * DAY)) if last_hit_at else 0.0
+    unexplored = expected_shorts if shorts_seen is None else max(0, shorts_seen - evaluated)
+    return hit_rate * recency * min(1.0, math.log1p(unexplored) / math.log1p(expected_shorts))
+
+
+class CrawlFrontier:
+    def __init__(self, path, channel_half_life_days=7.0, channel_expected_shorts=30):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.channel_half_life_days = channel_half_life_days
+        self.channel_expected_shorts = channel_expected_shorts
+        # Shared by the discovery loop and the extraction sink thread
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            # Frontier files from before page priorities existed
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+            if "priority" not in columns:
+                self._conn.execute("ALTER TABLE pages ADD COLUMN priority REAL NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_priority ON pages(status, priority DESC, id)")
+            # A page that was mid-crawl when the last run died is crawled again
+            self._conn.execute("UPDATE pages SET status = 'pending' WHERE status = 'active'")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    # ---------------- pages ----------------
+    def add_page(self, url, kind, query=None, priority=0.0) -> bool:
+        return self._write(
+            "INSERT OR IGNORE INTO pages (url, kind, query, priority, added_at) VALUES (?, ?, ?, ?, ?)",
+            (url, kind, query, priority, time.time()),
+        ) == 1
+
+    def schedule_search(self, url, query, priority, repeat=False) -> bool:
+        # Queues a search page, or sets the priority of one still waiting.
+        # A retired page is queued again, and with `repeat` (a new pass) so
+        # is a crawled one. True if the page will be crawled.
+        statuses = ("retired", "done", "failed") if repeat else ("retired",)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pages (url, kind, query, priority, added_at) VALUES (?, 'search', ?, ?, ?)",
+                (url, query, priority, time.time()),
+            )
+            self._conn.execute(
+                f"UPDATE pages SET status = 'pending', done_at = NULL WHERE url = ? "
+                f"AND status IN ({', '.join('?' * len(statuses))})", (url,) + statuses,
+            )
+            return self._conn.execute(
+                "UPDATE pages SET priority = ? WHERE url = ? AND status = 'pending'", (priority, url)
+            ).rowcount == 1
+
+    def next_page(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, kind, query FROM pages WHERE status = 'pending' "
+                "ORDER BY priority DESC, id LIMIT 1"
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE pages SET status = 'active' WHERE url = ?", (row[0],))
+        return row
+
+    def take_page(self, url, kind, query=None):
+        # Records a page handed out elsewhere (a coordinator lease) as active,
+        # so its videos are credited to it like those of a local page
+        self._write(
+            "INSERT INTO pages (url, kind, query, status, added_at) VALUES (?, ?, ?, 'active', ?) "
+            "ON CONFLICT(url) DO UPDATE SET status = 'active'",
+            (url, kind, query, time.time()),
+        )
+
+    def finish_page(self, url, links_found=None, failed=False):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET status = ?, links_found = ?, done_at = ? WHERE url = ?",
+                ("failed" if failed else "done", links_found, time.time(), url),
+            )
+            if links_found is not None:
+                self._conn.execute("UPDATE channels SET shorts_seen = ? WHERE url = ?", (links_found, url))
+
+    def release_page(self, url):
+        # Put a partially processed page back so the next run finishes it
+        self._write("UPDATE pages SET status = 'pending' WHERE url = ?", (url,))
+
+    def retire_searches(self, queries) -> list:
+        # Sets aside searches not crawled yet whose query is not in `queries`
+        # and returns their URLs; the page and the videos credited to it stay
+        # for query_stats
+        keep = set(queries)
+        with self._lock:
+            rows = self._conn.execute("SELECT url, query FROM pages WHERE kind = 'search' AND status = 'pending'")
+            stale = [url for url, query in rows.fetchall() if query not in keep]
+            self._conn.executemany("UPDATE pages SET status = 'retired' WHERE url = ?", [(url,) for url in stale])
+        return stale
+
+    def pending_searches(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM pages WHERE kind = 'search' AND status = 'pending'")[0][0]
+
+    def reset_pages(self):
+        # Start a new pass over every page; evaluated videos stay skipped
+        self._write("UPDATE pages SET status = 'pending', done_at = NULL")
+
+    def page_counts(self) -> dict:
+        return dict(self._execute("SELECT status, COUNT(*) FROM pages GROUP BY status"))
+
+    # ---------------- queries ----------------
+    def record_query_crawl(self, query, links, seconds, finished=True):
+        # A page released part way through adds its links and time but is
+        # not counted as a crawl
+        self._write(
+            "INSERT INTO queries (query, crawls, links, seconds, last_crawled_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(query) DO UPDATE SET crawls = crawls + excluded.crawls, links = links + excluded.links, "
+            "seconds = seconds + excluded.seconds, last_crawled_at = excluded.last_crawled_at",
+            (query, int(finished), links, seconds, time.time()),
+        )
+
+    def query_stats(self) -> dict:
+        # {query: QueryStats} for every search query crawled or credited with a video
+        stats = {query: QueryStats(query, crawls, links, 0, 0, 0, 0, {}, seconds, last)
+                 for query, crawls, links, seconds, last in self._execute(
+                     "SELECT query, crawls, links, seconds, last_crawled_at FROM queries")}
+        rows = self._execute(
+            "SELECT p.query, v.status, v.reason, COUNT(*) FROM videos v JOIN pages p ON p.url = v.page_url "
+            "WHERE p.kind = 'search' GROUP BY p.query, v.status, v.reason"
+        )
+        for query, status, reason, count in rows:
+            s = stats.get(query) or QueryStats(query, 0, 0, 0, 0, 0, 0, {}, 0.0, None)
+            prefiltered = status == "filtered" and (reason or "").startswith("prefilter:")
+            evaluated = status == "saved" or (status == "filtered" and not prefiltered)
+            if status == "filtered" and not prefiltered:
+                s.reasons[reason] = s.reasons.get(reason, 0) + count
+            stats[query] = s._replace(
+                new=s.new + count,
+                prefiltered=s.prefiltered + count * prefiltered,
+                evaluated=s.evaluated + count * evaluated,
+                hits=s.hits + count * (status == "saved"),
+            )
+        return stats
+
+    def query_progress(self) -> list:
+        return self._execute(
+            "SELECT query, status, links_found, done_at FROM pages WHERE kind = 'search' ORDER BY id"
+        )
+
+    # ---------------- videos ----------------
+    def seen_video(self, video_id, filtered_since=None) -> bool:
+        # With `filtered_since`, a video filtered before then does not count:
+        # it may be due for another look (see requeue_filtered)
+        if filtered_since is None:
+            return bool(self._execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)))
+        return bool(self._execute(
+            "SELECT 1 FROM videos WHERE video_id = ? AND (status != 'filtered' OR updated_at >= ?)",
+            (video_id, filtered_since),
+        ))
+
+    def mark_video_queued(self, video_id, url, page_url=None) -> bool:
+        # False when the video was already queued or evaluated
+        return self._write(
+            "INSERT OR IGNORE INTO videos (video_id, url, status, page_url, updated_at) "
+            "VALUES (?, ?, 'queued', ?, ?)",
+            (video_id, url, page_url, time.time()),
+        ) == 1
+
+    def requeue_filtered(self, video_id) -> bool:
+        # Re-evaluate a filtered video once its negative-cache entry expired
+        return self._write(
+            "UPDATE videos SET status = 'queued', reason = NULL, updated_at = ? "
+            "WHERE video_id = ? AND status = 'filtered'",
+            (time.time(), video_id),
+        ) == 1
+
+    def record_video(self, video_id, status, reason=None, categories=None):
+        self._write(
+            "UPDATE videos SET status = ?, reason = ?, categories = ?, updated_at = ? WHERE video_id = ?",
+            (status, reason, ",".join(categories) if categories else None, time.time(), video_id),
+        )
+
+    def queued_videos(self) -> list:
+        # Videos discovered by an earlier run that never got a result
+        return self._execute("SELECT video_id, url FROM videos WHERE status = 'queued' ORDER BY updated_at")
+
+    def video_counts(self) -> dict:
+        return dict(self._execute("SELECT status, COUNT(*) FROM videos GROUP BY status"))
+
+    def category_counts(self) -> dict:
+        counts = {}
+        for (categories,) in self._execute("SELECT categories FROM videos WHERE status = 'saved'"):
+            for name in (categories or "").split(","):
+                if name:
+                    counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    # ---------------- channels ----------------
+    def record_channel_video(self, channel_id, url, hit, name=None):
+        # Updates the channel's stats with one evaluated video and (re)scores
+        # its Shorts page; the page is queued on the channel's first hit.
+        # Returns (score, added) where added is True if the page was new.
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO channels (channel_id, url, name) VALUES (?, ?, ?)",
+                (channel_id, url, name),
+            )
+            self._conn.execute(
+                "UPDATE channels SET evaluated = evaluated + 1, hits = hits + ?, "
+                "last_hit_at = CASE WHEN ? THEN ? ELSE last_hit_at END WHERE channel_id = ?",
+                (int(hit), int(hit), now, channel_id),
+            )
+            url, hits, evaluated, last_hit_at, shorts_seen = self._conn.execute(
+                "SELECT url, hits, evaluated, last_hit_at, shorts_seen FROM channels WHERE channel_id = ?",
+                (channel_id,),
+            ).fetchone()
+            score = channel_score(hits, evaluated, last_hit_at, shorts_seen, now,
+                                  self.channel_half_life_days, self.channel_expected_shorts)
+            self._conn.execute("UPDATE channels SET score = ? WHERE channel_id = ?", (score, channel_id))
+            added = False
+            if hits:
+                added = self._conn.execute(
+                    "INSERT OR IGNORE INTO pages (url, kind, query, priority, added_at) "
+                    "VALUES (?, 'channel', ?, ?, ?)",
+                    (url, channel_id, score, now),
+                ).rowcount == 1
+                if not added:
+                    self._conn.execute(
+                        "UPDATE pages SET priority = ? WHERE url = ? AND status = 'pending'", (score, url)
+                    )
+        return score, added
+
+    def top_channels(self, limit=10) -> list:
+        return self._execute(
+            "SELECT channel_id, name, hits, evaluated, score FROM channels "
+            "ORDER BY hits DESC, score DESC LIMIT ?", (limit,)
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
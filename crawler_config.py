@@ -0,0 +1,271 @@
+import os
+import json
+import logging
+import threading
+from collections import namedtuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml
+except ImportError:  # only needed for YAML profiles and packs
+    yaml = None
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# CONFIG PROFILES AND KEYWORD PACKS
+# ==================================================
+# A profile is a TOML, YAML or JSON file whose top-level keys override the
+# engine's CONFIG constants (case-insensitive, `max_videos = 2000`), plus an
+# optional `keyword_packs` list of pack files, relative to the profile.
+#
+# A keyword pack maps category names to any of:
+#   scam_type, folder   required for a new category (folder defaults to
+#                       youtube_shorts_<name>)
+#   queries, keywords   replace the built-in lists, or add to them with
+#                       `extend = true`
+#   keyword_weights     per-keyword score overrides
+#   kinds               {kind: [keywords]} extra signal kinds for the scorer
+# Packs apply in order, so a later pack can extend what an earlier one set.
+#
+# Everything is checked against the defaults before anything is applied:
+# load_config() raises a ConfigError listing every problem, and
+# ConfigWatcher keeps the last good config when an edit does not load.
+
+Config = namedtuple("Config", ["settings", "categories", "keyword_weights", "kinds", "files"])
+
+PACK_FIELDS = {"scam_type": str, "folder": str, "queries": list, "keywords": list,
+               "keyword_weights": dict, "kinds": dict, "extend": bool}
+PARSE_ERRORS = (OSError, ValueError) + ((yaml.YAMLError,) if yaml else ())
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def read_file(path) -> dict:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".toml" and tomllib is None:
+        raise ConfigError(f"{path}: TOML needs Python 3.11+ or tomli: pip install tomli")
+    if ext in (".yaml", ".yml") and yaml is None:
+        raise ConfigError(f"{path}: YAML needs PyYAML: pip install pyyaml")
+    if ext not in (".toml", ".yaml", ".yml", ".json"):
+        raise ConfigError(f"{path}: unknown format, use .toml, .yaml or .json")
+    try:
+        if ext == ".toml":
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f) if ext == ".json" else yaml.safe_load(f)
+    except PARSE_ERRORS as e:
+        raise ConfigError(f"{path}: {e}") from e
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a table, got {type(data).__name__}")
+    return data
+
+
+def file_signature(path):
+    # Changes whenever the file is written; None while it is missing
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_value(value, default, kind=None, choices=None):
+    # Problem with one setting's value, or None
+    if value is None:
+        return None
+    kind = kind or (type(default) if default is not None else None)
+    if kind is bool:
+        ok = isinstance(value, bool)
+    elif kind in (int, float):
+        ok = _is_number(value) and (kind is float or isinstance(value, int))
+    elif kind is not None:
+        ok = isinstance(value, kind)
+    else:
+        ok = True
+    if not ok:
+        return f"expected {kind.__name__}, got {type(value).__name__} {value!r}"
+    if _is_number(value) and value < 0:
+        return f"must not be negative, got {value!r}"
+    if isinstance(default, dict) and default and all(_is_number(v) for v in default.values()):
+        bad = [k for k, v in value.items() if not _is_number(v) or v < 0]
+        if bad:
+            return f"expected non-negative numbers for {', '.join(map(str, bad))}"
+    if choices and value not in choices:
+        return f"expected one of {', '.join(map(repr, choices))}, got {value!r}"
+    return None
+
+
+def check_settings(values, defaults, types=None, choices=None) -> dict:
+    # Maps profile keys onto the engine's setting names; raises ConfigError
+    # listing every unknown key and bad value
+    settings = {}
+    errors = []
+    for key, value in values.items():
+        name = str(key).upper()
+        if name not in defaults:
+            errors.append(f"unknown setting {key!r}")
+            continue
+        problem = _check_value(value, defaults[name], (types or {}).get(name), (choices or {}).get(name))
+        if problem:
+            errors.append(f"{key}: {problem}")
+        else:
+            settings[name] = value
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return settings
+
+
+def _string_list(value):
+    return isinstance(value, list) and all(isinstance(v, str) and v.strip() for v in value)
+
+
+def check_pack(data, known_kinds) -> list:
+    # [(category, spec)] of a keyword pack; raises ConfigError
+    specs = []
+    errors = []
+    for name, spec in data.items():
+        if not isinstance(spec, dict):
+            errors.append(f"{name}: expected a table of category fields")
+            continue
+        for field, value in spec.items():
+            kind = PACK_FIELDS.get(field)
+            if kind is None:
+                errors.append(f"{name}.{field}: unknown field")
+            elif not isinstance(value, kind):
+                errors.append(f"{name}.{field}: expected {kind.__name__}, got {type(value).__name__}")
+            elif field in ("queries", "keywords") and not _string_list(value):
+                errors.append(f"{name}.{field}: expected a list of non-empty strings")
+            elif field == "keyword_weights" and not all(_is_number(w) and w >= 0 for w in value.values()):
+                errors.append(f"{name}.keyword_weights: expected non-negative numbers")
+            elif field == "kinds":
+                for kind_name, keywords in value.items():
+                    if kind_name not in known_kinds:
+                        errors.append(f"{name}.kinds: unknown kind {kind_name!r}, expected one of "
+                                      f"{', '.join(sorted(known_kinds))}")
+                    elif not _string_list(keywords):
+                        errors.append(f"{name}.kinds.{kind_name}: expected a list of non-empty strings")
+            elif field == "folder" and (not value or any(c in value for c in "/\\:") or value in (".", "..")):
+                errors.append(f"{name}.folder: must be a plain folder name, got {value!r}")
+        specs.append((str(name), spec))
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return specs
+
+
+def merge_categories(builtin, specs) -> dict:
+    # Built-in categories with the packs' changes applied in order
+    merged = {name: dict(cat) for name, cat in builtin.items()}
+    for name, spec in specs:
+        cat = merged.get(name)
+        if cat is None:
+            if "scam_type" not in spec:
+                raise ConfigError(f"{name}: a new category needs a scam_type")
+            cat = merged[name] = {"folder": f"youtube_shorts_{name}", "queries": [], "keywords": []}
+        for field in ("scam_type", "folder"):
+            if field in spec:
+                cat[field] = spec[field]
+        for field in ("queries", "keywords"):
+            if field in spec:
+                if spec.get("extend"):
+                    cat[field] = list(cat[field]) + [v for v in spec[field] if v not in cat[field]]
+                else:
+                    cat[field] = list(spec[field])
+    return merged
+
+
+def load_config(path, defaults, categories, known_kinds, types=None, choices=None) -> Config:
+    # Reads and validates a profile and every pack it lists
+    data = read_file(path)
+    files = {path: file_signature(path)}
+    packs = data.pop("keyword_packs", None) or []
+    if not _string_list(packs):
+        raise ConfigError(f"{path}: keyword_packs: expected a list of file names")
+    try:
+        settings = check_settings(data, defaults, types, choices)
+    except ConfigError as e:
+        raise ConfigError(f"{path}: {e}") from None
+    base = os.path.dirname(os.path.abspath(path))
+    specs = []
+    weights = {}
+    kinds = {}
+    for pack in packs:
+        pack_path = os.path.join(base, pack)
+        files[pack_path] = file_signature(pack_path)
+        pack_data = read_file(pack_path)
+        try:
+            pack_specs = check_pack(pack_data, known_kinds)
+        except ConfigError as e:
+            raise ConfigError(f"{pack_path}: {e}") from None
+        for _, spec in pack_specs:
+            weights.update({k.lower(): w for k, w in spec.get("keyword_weights", {}).items()})
+            for kind, keywords in spec.get("kinds", {}).items():
+                listed = kinds.setdefault(kind, [])
+                listed += [k for k in keywords if k not in listed]
+        specs += pack_specs
+    try:
+        merged = merge_categories(categories, specs)
+    except ConfigError as e:
+        raise ConfigError(f"{path}: {e}") from None
+    return Config(settings, merged, weights, kinds, files)
+
+
+class ConfigWatcher:
+    # Checks the loaded files every `interval` seconds and, after any of them
+    # changed, calls on_change(config) with the result of load()
+    def __init__(self, load, files, on_change, interval=5.0):
+        self.load = load  # load() -> Config, raising ConfigError
+        self.on_change = on_change
+        self.interval = interval
+        self.files = dict(files)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def changed(self) -> bool:
+        return any(file_signature(path) != signature for path, signature in self.files.items())
+
+    def check(self):
+        if not self.changed():
+            return False
+        try:
+            config = self.load()
+        except ConfigError as e:
+            # Not retried until one of the files is written again
+            self.files = {path: file_signature(path) for path in self.files}
+            log.error(f"⚠ Config not reloaded, keeping the previous one: {e}")
+            return False
+        self.files = dict(config.files)
+        self.on_change(config)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                log.error(f"  Error applying the reloaded config: {e}")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,331 @@
+import os
+import logging
+import time
+import queue
+import random
+import shutil
+import sqlite3
+import threading
+from collections import namedtuple
+import yt_dlp
+
+import metrics
+from rate_limiter import TokenBucket, is_throttle_message
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# DOWNLOAD MANAGER
+# ==================================================
+# Video downloads run here instead of inline in the crawl loop: jobs go into
+# a queue served by `workers` threads, all sharing one bandwidth budget.
+# yt-dlp keeps partial data in .part files and resumes them (continuedl),
+# failed jobs are retried with exponential backoff, and every video's state
+# is stored in SQLite so jobs still queued when a run stops are picked up
+# again by the next one.
+#
+# With a rate limiter, each job waits for a "media" slot first, and errors
+# that look like throttling are reported so the limiter backs off.
+#
+# Status: queued -> downloading -> done | failed (after max_retries)
+#         queued -> skipped (should_download returned False)
+#         held -> queued | skipped (submitted with hold=True, then release() or skip())
+
+DownloadJob = namedtuple("DownloadJob", ["video_id", "url", "paths"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    video_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    paths TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads(status);
+"""
+
+DOWNLOAD_OPTS = {
+    "format": "bestvideo+bestaudio/best",
+    "merge_output_format": "mp4",
+    "quiet": True,
+    "no_warnings": True,
+    "continuedl": True,  # resume .part files left by an interrupted download
+    "nopart": False,
+}
+
+DOWNLOAD_SECONDS = metrics.histogram("crawl_download_seconds", "Wall time of successful downloads")
+DOWNLOAD_BYTES = metrics.counter("crawl_download_bytes_total", "Video bytes received")
+DOWNLOADS = metrics.counter("crawl_downloads_total", "Download attempts by outcome")
+
+_STOP = object()
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+def link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class DownloadManager:
+    def __init__(self, state_path, workers=2, bandwidth_limit=None, max_retries=3,
+                 retry_backoff=10, on_done=None, should_download=None, rate_limiter=None):
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff  # seconds before the first retry, doubled after each
+        self.on_done = on_done  # on_done(job, path) after a successful download
+        self.should_download = should_download  # should_download(job) -> False skips the job
+        # bandwidth_limit in bytes/s across all workers, None for unlimited
+        self.bucket = TokenBucket(bandwidth_limit, bandwidth_limit) if bandwidth_limit else None
+        self.rate_limiter = rate_limiter
+        self.bytes_downloaded = 0
+        self.cancelled = threading.Event()
+        self._jobs = queue.Queue()
+        self._pending = 0
+        self._timers = set()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if os.path.dirname(state_path):
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        self._conn = sqlite3.connect(state_path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"download-{i+1}", daemon=True)
+            for i in range(self.workers)
+        ]
+
+    # ---------------- state ----------------
+    def _set_status(self, video_id, status, **fields):
+        sets = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE downloads SET status = ?, updated_at = ?{', ' + sets if sets else ''} WHERE video_id = ?",
+                (status, time.time(), *fields.values(), video_id),
+            )
+
+    def status(self, video_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, attempts, bytes, error FROM downloads WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return dict(zip(("status", "attempts", "bytes", "error"), row)) if row else None
+
+    def status_counts(self) -> dict:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM downloads GROUP BY status").fetchall())
+
+    @property
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    # ---------------- queue ----------------
+    def start(self, resume=True):
+        for t in self._threads:
+            t.start()
+        if resume:
+            # Jobs a previous run left unfinished; their .part files are resumed
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT video_id, url, paths FROM downloads WHERE status IN ('queued', 'downloading') "
+                    "ORDER BY updated_at"
+                ).fetchall()
+            for video_id, url, paths in rows:
+                self._enqueue(DownloadJob(video_id, url, paths.split("\n")))
+        return self
+
+    def submit(self, video_id, url, paths, hold=False) -> bool:
+        # paths[0] is downloaded, the rest are linked to it; False if already known.
+        # hold=True only records the job until release() or skip() decides it.
+        if all(os.path.exists(p) for p in paths):
+            log.debug(f"  ⊗ Already downloaded: {video_id}")
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM downloads WHERE video_id = ?", (video_id,)).fetchone()
+            if row and row[0] in ("held", "queued", "downloading"):
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO downloads (video_id, url, paths, status, attempts, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, ?)",
+                (video_id, url, "\n".join(paths), "held" if hold else "queued", time.time()),
+            )
+        if not hold:
+            self._enqueue(DownloadJob(video_id, url, list(paths)))
+        return True
+
+    def held(self) -> list:
+        # Held jobs survive restarts until they are released or skipped
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT video_id FROM downloads WHERE status = 'held' ORDER BY updated_at"
+            ).fetchall()]
+
+    def release(self, video_id) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, paths FROM downloads WHERE video_id = ? AND status = 'held'", (video_id,)
+            ).fetchone()
+        if not row:
+            return False
+        self._set_status(video_id, "queued")
+        self._enqueue(DownloadJob(video_id, row[0], row[1].split("\n")))
+        return True
+
+    def skip(self, video_id):
+        self._set_status(video_id, "skipped")
+
+    def _enqueue(self, job):
+        with self._lock:
+            self._pending += 1
+        self._jobs.put(job)
+
+    def _retry_later(self, job, delay):
+        def fire():
+            with self._lock:
+                self._timers.discard(timer)
+            self._jobs.put(job)
+        timer = threading.Timer(delay, fire)
+        timer.daemon = True
+        with self._lock:
+            self._timers.add(timer)
+        timer.start()
+
+    # ---------------- workers ----------------
+    def _downloader(self, folder):
+        # One YoutubeDL per worker and output folder (outtmpl is fixed per instance)
+        cache = getattr(self._local, "ydls", None)
+        if cache is None:
+            cache = self._local.ydls = {}
+        if folder not in cache:
+            opts = dict(DOWNLOAD_OPTS, outtmpl=os.path.join(folder, "youtube_%(id)s.mp4"),
+                        progress_hooks=[self._progress])
+            cache[folder] = yt_dlp.YoutubeDL(opts)
+        return cache[folder]
+
+    def _progress(self, d):
+        # Charges every newly received chunk against the shared bandwidth bucket
+        seen = self._local.seen
+        name = d.get("tmpfilename") or d.get("filename")
+        done = d.get("downloaded_bytes") or 0
+        if name not in seen:
+            seen[name] = done  # bytes resumed from a .part file are not re-charged
+            return
+        delta = done - seen[name]
+        seen[name] = done
+        if delta > 0:
+            self._local.job_bytes += delta
+            DOWNLOAD_BYTES.inc(delta)
+            with self._lock:
+                self.bytes_downloaded += delta
+            if self.bucket:
+                self.bucket.consume(delta)
+        if self.cancelled.is_set():
+            raise DownloadCancelled("download cancelled")
+
+    def _run(self):
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+                if self.cancelled.is_set():
+                    with self._lock:
+                        self._pending -= 1
+                    continue
+                finished = self._download(job)
+                if finished:
+                    with self._lock:
+                        self._pending -= 1
+        finally:
+            for ydl in getattr(self._local, "ydls", {}).values():
+                ydl.close()
+
+    def _download(self, job) -> bool:
+        target = job.paths[0]
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if self.should_download and not os.path.exists(target):
+            try:
+                wanted = self.should_download(job)
+            except Exception as e:
+                log.error(f"  Error checking {job.video_id} before download: {e}")
+                wanted = True
+            if not wanted:
+                self._set_status(job.video_id, "skipped")
+                DOWNLOADS.inc(outcome="skipped")
+                return True
+        with self._lock:
+            attempts = self._conn.execute(
+                "SELECT attempts FROM downloads WHERE video_id = ?", (job.video_id,)
+            ).fetchone()[0] + 1
+        self._set_status(job.video_id, "downloading", attempts=attempts)
+        self._local.seen = {}
+        self._local.job_bytes = 0
+        start = time.perf_counter()
+        try:
+            if not os.path.exists(target):
+                if any(n.startswith(os.path.basename(target)[:-4]) and n.endswith(".part")
+                       for n in os.listdir(os.path.dirname(target))):
+                    log.info(f"  ↻ Resuming partial download: {job.video_id}")
+                if self.rate_limiter:
+                    self.rate_limiter.wait(job.url, "media")
+                self._downloader(os.path.dirname(target)).download([job.url])
+                if self.rate_limiter:
+                    self.rate_limiter.report(job.url, endpoint="media")
+            for path in job.paths[1:]:
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    link_or_copy(target, path)
+        except Exception as e:
+            if self.cancelled.is_set():
+                # Left as "downloading" so the next run resumes the .part file
+                return True
+            if self.rate_limiter and is_throttle_message(str(e)):
+                self.rate_limiter.report(job.url, throttled=True, endpoint="media")
+            if attempts >= self.max_retries:
+                self._set_status(job.video_id, "failed", error=str(e)[:500])
+                DOWNLOADS.inc(outcome="failed")
+                log.error(f"  ✗ Download failed after {attempts} attempts: {job.video_id}: {e}")
+                return True
+            delay = self.retry_backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+            self._set_status(job.video_id, "queued", error=str(e)[:500])
+            DOWNLOADS.inc(outcome="retry")
+            log.warning(f"  ⚠ Download error ({job.video_id}), retry {attempts}/{self.max_retries - 1} in {delay:.0f}s: {e}")
+            self._retry_later(job, delay)
+            return False
+        self._set_status(job.video_id, "done", bytes=self._local.job_bytes, error=None)
+        DOWNLOAD_SECONDS.observe(time.perf_counter() - start)
+        DOWNLOADS.inc(outcome="done")
+        log.info(f"  ⬇ Downloaded: {job.video_id} ({self._local.job_bytes / 1e6:.1f} MB)")
+        if self.on_done:
+            try:
+                self.on_done(job, target)
+            except Exception as e:
+                log.error(f"  Error after download of {job.video_id}: {e}")
+        return True
+
+    def close(self, cancel=False, timeout=None):
+        # Waits for queued downloads (and scheduled retries) unless cancel=True
+        if cancel:
+            self.cancelled.set()
+            with self._lock:
+                timers = list(self._timers)
+                self._timers.clear()
+            for timer in timers:
+                timer.cancel()
+        else:
+            deadline = time.monotonic() + timeout if timeout else None
+            while self.pending and (deadline is None or time.monotonic() < deadline):
+                time.sleep(0.5)
+        for _ in self._threads:
+            self._jobs.put(_STOP)
+        for t in self._threads:
+            t.join(30 if cancel else None)
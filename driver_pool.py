@@ -0,0 +1,144 @@
+import time
+import logging
+import queue
+import threading
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# BROWSER DISCOVERY POOL
+# ==================================================
+# Runs `size` browsers, each owned by one thread, so search and channel pages
+# load and scroll concurrently instead of one after another. Before every
+# page a slot health-checks its driver and replaces it if it crashed; a page
+# that failed because the browser died is retried once on the new driver.
+# Drivers are also recycled after `recycle_after` pages to cap Chrome's
+# memory growth on long runs.
+
+_STOP = object()
+
+
+def driver_is_healthy(driver) -> bool:
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+class DriverPool:
+    def __init__(self, create_driver, work, on_error=None, size=2, recycle_after=50, restart_delay=5):
+        self.create_driver = create_driver
+        self.work = work  # work(driver, job)
+        self.on_error = on_error  # on_error(job, exc) after the retry also failed
+        self.size = max(1, size)
+        self.recycle_after = recycle_after
+        self.restart_delay = restart_delay
+        self.restarts = 0
+        self.cancelled = threading.Event()
+        self._jobs = queue.Queue()
+        self._free = threading.Semaphore(self.size)
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._drivers = {}
+        self._threads = [
+            threading.Thread(target=self._run, args=(i,), name=f"browser-{i+1}", daemon=True)
+            for i in range(self.size)
+        ]
+
+    @property
+    def busy(self):
+        with self._lock:
+            return self._busy
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+        return self
+
+    def submit(self, job) -> bool:
+        # Blocks until a browser is free, so callers only claim work they can start
+        while not self._free.acquire(timeout=0.5):
+            if self.cancelled.is_set():
+                return False
+        with self._lock:
+            self._busy += 1
+        self._jobs.put(job)
+        return True
+
+    def _quit(self, slot):
+        driver = self._drivers.pop(slot, None)
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def _driver(self, slot, pages_done):
+        driver = self._drivers.get(slot)
+        if driver is not None and (pages_done >= self.recycle_after or not driver_is_healthy(driver)):
+            self._quit(slot)
+            driver = None
+        while driver is None and not self.cancelled.is_set():
+            try:
+                driver = self.create_driver()
+                self._drivers[slot] = driver
+            except Exception as e:
+                log.error(f"  ✗ Could not start browser {slot+1}: {e}")
+                time.sleep(self.restart_delay)
+        return driver
+
+    def _run(self, slot):
+        pages_done = 0
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+                try:
+                    if not self.cancelled.is_set():
+                        pages_done = self._process(slot, job, pages_done)
+                finally:
+                    with self._lock:
+                        self._busy -= 1
+                    self._free.release()
+        finally:
+            self._quit(slot)
+
+    def _process(self, slot, job, pages_done):
+        for attempt in (1, 2):
+            if self.cancelled.is_set():
+                return pages_done
+            driver = self._driver(slot, pages_done)
+            if driver is None:
+                return pages_done
+            if pages_done >= self.recycle_after:
+                pages_done = 0
+            try:
+                self.work(driver, job)
+                return pages_done + 1
+            except Exception as e:
+                if self.cancelled.is_set():
+                    return pages_done
+                if attempt == 1 and not driver_is_healthy(driver):
+                    log.warning(f"  ⚠ Browser {slot+1} crashed, restarting: {e}")
+                    with self._lock:
+                        self.restarts += 1
+                    self._quit(slot)
+                    pages_done = 0
+                    continue
+                if self.on_error:
+                    self.on_error(job, e)
+                return pages_done + 1
+        return pages_done
+
+    def close(self, cancel=False, timeout=30):
+        if cancel:
+            self.cancelled.set()
+            # Quitting the browsers makes in-flight Selenium calls fail fast
+            for slot in list(self._drivers):
+                self._quit(slot)
+        for _ in self._threads:
+            self._jobs.put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
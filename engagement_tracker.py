@@ -0,0 +1,245 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+# ==================================================
+# ENGAGEMENT REFRESH
+# ==================================================
+# Saved videos go stale: view, like and comment counts keep moving, and
+# scam uploads get taken down. The tracker keeps one row per saved video
+# with its latest counts, its availability and when it is due for the next
+# check, and appends every check to an `engagement` time series.
+#
+# Checks are spread by volatility: a video uploaded in the last couple of
+# days, or whose views grew fast since the previous check, is due again
+# after `min_interval`; old videos with flat counts back off towards
+# `max_interval`. A removed video is never checked again, a private or
+# otherwise unavailable one only every `max_interval`. A failed check
+# (network, throttling) leaves the status alone and is retried with backoff.
+#
+# Video status: live -> removed | private | unavailable (-> live)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refresh_videos (
+    video_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    folders TEXT,
+    upload_date TEXT,
+    status TEXT NOT NULL DEFAULT 'live',
+    view_count INTEGER,
+    like_count INTEGER,
+    comment_count INTEGER,
+    views_per_day REAL,
+    checked_at REAL,
+    next_check_at REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    status_changed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_refresh_due ON refresh_videos(status, next_check_at);
+CREATE TABLE IF NOT EXISTS engagement (
+    video_id TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    view_count INTEGER,
+    like_count INTEGER,
+    comment_count INTEGER,
+    PRIMARY KEY (video_id, checked_at)
+);
+"""
+
+DAY = 24 * 3600
+GROWTH_FLOOR = 100  # views; keeps growth rates of near-zero counts from exploding
+
+# yt-dlp error texts for videos that are gone, checked in order
+UNAVAILABLE_PATTERNS = [
+    ("removed", re.compile(r"removed by the uploader|terms of service|account associated with this video "
+                           r"has been terminated|copyright claim|community guidelines|has been removed",
+                           re.IGNORECASE)),
+    ("private", re.compile(r"private video|video is private", re.IGNORECASE)),
+    ("unavailable", re.compile(r"video unavailable|not available|no longer available|sign in to confirm "
+                               r"your age|members-only", re.IGNORECASE)),
+]
+
+
+# Throttling shows up as "Video unavailable ... try again later" too
+RETRY_PATTERN = re.compile(r"try again later|not a bot|too many requests|http error 429|timed out",
+                           re.IGNORECASE)
+
+
+def unavailable_status(message):
+    # "removed", "private" or "unavailable" for an extraction error that
+    # means the video is gone; None for errors worth retrying
+    if RETRY_PATTERN.search(message or ""):
+        return None
+    for status, pattern in UNAVAILABLE_PATTERNS:
+        if pattern.search(message or ""):
+            return status
+    return None
+
+
+def upload_age_days(upload_date, now=None):
+    # Days since a yt-dlp upload_date ("20240502"); None if unknown
+    try:
+        uploaded = datetime.strptime(str(upload_date), "%Y%m%d").timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, ((now or time.time()) - uploaded) / DAY)
+
+
+def refresh_interval(age_days, growth_per_day, min_interval, max_interval):
+    # Seconds until the next check: min_interval for the first two days after
+    # upload, then growing linearly with age; shortened while views grow
+    # faster than 2% a day
+    interval = min_interval * max(1.0, (age_days or 0.0) / 2)
+    if growth_per_day >= 0.5:
+        interval = min_interval
+    elif growth_per_day >= 0.1:
+        interval /= 4
+    elif growth_per_day >= 0.02:
+        interval /= 2
+    return min(max_interval, max(min_interval, interval))
+
+
+def _parse_time(text):
+    try:
+        return time.mktime(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EngagementTracker:
+    def __init__(self, path, min_interval_hours=6, max_interval_days=30):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.min_interval = min_interval_hours * 3600
+        self.max_interval = max_interval_days * DAY
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _interval(self, upload_date, growth_per_day, now):
+        return refresh_interval(upload_age_days(upload_date, now), growth_per_day,
+                                self.min_interval, self.max_interval)
+
+    def import_record(self, folder, record) -> bool:
+        # Starts tracking a saved metadata record; its counts at scrape time
+        # become the first point of the series. True if the video was new.
+        video_id = record["video_id"]
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT folders FROM refresh_videos WHERE video_id = ?",
+                                     (video_id,)).fetchone()
+            if row:
+                # Same video saved under another category
+                folders = set((row[0] or "").split(",")) - {""}
+                if folder not in folders:
+                    self._conn.execute("UPDATE refresh_videos SET folders = ? WHERE video_id = ?",
+                                       (",".join(sorted(folders | {folder})), video_id))
+                return False
+            scraped_at = _parse_time(record.get("scraped_at")) or now
+            age = upload_age_days(record.get("upload_date"), scraped_at)
+            views = record.get("view_count")
+            # Until a second point exists, assume the views accrued evenly since upload
+            per_day = views / max(age, 1.0) if views is not None and age is not None else None
+            growth = (per_day or 0) / max(views or 0, GROWTH_FLOOR)
+            self._conn.execute(
+                "INSERT INTO refresh_videos (video_id, url, folders, upload_date, view_count, like_count, "
+                "comment_count, views_per_day, checked_at, next_check_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (video_id, record["video_url"], folder, record.get("upload_date"), views,
+                 record.get("like_count"), record.get("comment_count"), per_day, scraped_at,
+                 scraped_at + self._interval(record.get("upload_date"), growth, scraped_at)),
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO engagement (video_id, checked_at, status, view_count, like_count, "
+                "comment_count) VALUES (?, ?, 'live', ?, ?, ?)",
+                (video_id, scraped_at, views, record.get("like_count"), record.get("comment_count")),
+            )
+        return True
+
+    def due(self, limit=500, now=None) -> list:
+        # (video_id, url, folders) of the videos whose next check has come,
+        # most overdue first
+        rows = self._execute(
+            "SELECT video_id, url, folders FROM refresh_videos "
+            "WHERE status != 'removed' AND next_check_at <= ? ORDER BY next_check_at LIMIT ?",
+            (now or time.time(), limit),
+        )
+        return [(video_id, url, (folders or "").split(",") if folders else []) for video_id, url, folders in rows]
+
+    def record_check(self, video_id, status, view_count=None, like_count=None, comment_count=None, now=None):
+        # Stores one successful check (the video answered, or is gone) and
+        # schedules the next; returns the previous status
+        now = now or time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, upload_date, view_count, checked_at FROM refresh_videos WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            previous, upload_date, old_views, last_checked = row
+            self._conn.execute(
+                "INSERT OR REPLACE INTO engagement (video_id, checked_at, status, view_count, like_count, "
+                "comment_count) VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, now, status, view_count, like_count, comment_count),
+            )
+            changed_at = now if status != previous else None
+            if status != "live":
+                self._conn.execute(
+                    "UPDATE refresh_videos SET status = ?, checked_at = ?, next_check_at = ?, failures = 0, "
+                    "status_changed_at = COALESCE(?, status_changed_at) WHERE video_id = ?",
+                    (status, now, now + self.max_interval, changed_at, video_id),
+                )
+                return previous
+            per_day = growth = None
+            if view_count is not None and old_views is not None and last_checked and now > last_checked:
+                days = (now - last_checked) / DAY
+                per_day = max(0, view_count - old_views) / days
+                growth = per_day / max(old_views, GROWTH_FLOOR)
+            self._conn.execute(
+                "UPDATE refresh_videos SET status = 'live', view_count = ?, like_count = ?, comment_count = ?, "
+                "views_per_day = COALESCE(?, views_per_day), checked_at = ?, next_check_at = ?, failures = 0, "
+                "status_changed_at = COALESCE(?, status_changed_at) WHERE video_id = ?",
+                (view_count, like_count, comment_count, per_day, now,
+                 now + self._interval(upload_date, growth or 0.0, now), changed_at, video_id),
+            )
+        return previous
+
+    def record_failure(self, video_id, now=None):
+        # A check that errored for a reason other than the video being gone
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE refresh_videos SET failures = failures + 1, "
+                "next_check_at = ? + MIN(?, ? * (1 << MIN(failures, 10))) WHERE video_id = ?",
+                (now, self.max_interval, self.min_interval, video_id),
+            )
+
+    def history(self, video_id) -> list:
+        # [(checked_at, status, view_count, like_count, comment_count)], oldest first
+        return self._execute(
+            "SELECT checked_at, status, view_count, like_count, comment_count FROM engagement "
+            "WHERE video_id = ? ORDER BY checked_at", (video_id,),
+        )
+
+    def status_counts(self) -> dict:
+        return dict(self._execute("SELECT status, COUNT(*) FROM refresh_videos GROUP BY status"))
+
+    def fastest_growing(self, limit=5) -> list:
+        return self._execute(
+            "SELECT video_id, view_count, views_per_day FROM refresh_videos "
+            "WHERE status = 'live' AND views_per_day IS NOT NULL ORDER BY views_per_day DESC LIMIT ?", (limit,),
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,143 @@
+import queue
+import logging
+import threading
+
+from rate_limiter import ThrottledError
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# METADATA EXTRACTION WORKER POOL
+# ==================================================
+# Discovery submits video URLs into a bounded task queue; `workers` threads
+# run the extract function on them in parallel, and a single sink thread
+# passes every result to on_result (save, download, channel follow-up).
+# The bounded queues give back-pressure: discovery blocks when extraction
+# falls behind, and extraction blocks when saving/downloading falls behind.
+# An extract function that raises ThrottledError is reported to the rate
+# limiter, whose backoff delays the retry; after `throttle_retries` the URL
+# is passed on with a None result.
+
+_STOP = object()
+
+
+class ExtractionPool:
+    def __init__(self, extract, on_result, workers=4, queue_size=100, rate_limiter=None, throttle_retries=2):
+        self.extract = extract
+        self.on_result = on_result
+        self.rate_limiter = rate_limiter
+        self.throttle_retries = throttle_retries
+        self.tasks = queue.Queue(maxsize=queue_size)
+        self.results = queue.Queue(maxsize=queue_size)
+        self.cancelled = threading.Event()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"extract-{i+1}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        self._retired = []  # stopped by resize(), joined on close
+        self._started = False
+        self._sink = threading.Thread(target=self._drain, name="extract-sink", daemon=True)
+
+    @property
+    def pending(self):
+        # URLs submitted but not yet through on_result
+        with self._lock:
+            return self._pending
+
+    def start(self):
+        for t in self._workers:
+            t.start()
+        self._sink.start()
+        self._started = True
+        return self
+
+    def resize(self, workers):
+        # Adds or stops worker threads of a running pool; stopped workers
+        # exit once the links queued before the resize are taken
+        workers = max(1, workers)
+        with self._lock:
+            grow = workers - len(self._workers)
+            new = [threading.Thread(target=self._work, name=f"extract-{len(self._workers) + len(self._retired) + i + 1}",
+                                    daemon=True) for i in range(grow)]
+            self._workers += new
+            for _ in range(-grow):
+                self._retired.append(self._workers.pop())
+        if self._started:
+            for t in new:
+                t.start()
+        for _ in range(-grow):
+            self.tasks.put(_STOP)
+
+    def submit(self, url):
+        with self._lock:
+            self._pending += 1
+        while not self.cancelled.is_set():
+            try:
+                self.tasks.put(url, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        self._done()
+        return False
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _work(self):
+        while True:
+            url = self.tasks.get()
+            if url is _STOP:
+                break
+            if self.cancelled.is_set():
+                self._done()
+                continue
+            self.results.put((url, self._extract(url)))
+
+    def _extract(self, url):
+        for attempt in range(self.throttle_retries + 1):
+            if self.cancelled.is_set():
+                return None
+            if self.rate_limiter:
+                self.rate_limiter.wait(url)
+            try:
+                result = self.extract(url)
+            except ThrottledError as e:
+                if self.rate_limiter:
+                    self.rate_limiter.report(url, throttled=True, retry_after=e.retry_after)
+                log.warning(f"  ⚠ Throttled ({attempt + 1}/{self.throttle_retries + 1}): {url}: {e}")
+                continue
+            except Exception as e:
+                log.error(f"  Error extracting metadata: {e}")
+                return None
+            if self.rate_limiter:
+                self.rate_limiter.report(url)
+            return result
+        return None
+
+    def _drain(self):
+        while True:
+            item = self.results.get()
+            if item is _STOP:
+                break
+            url, result = item
+            try:
+                if not self.cancelled.is_set():
+                    self.on_result(url, result)
+            except Exception as e:
+                log.error(f"  Error handling {url}: {e}")
+            finally:
+                self._done()
+
+    def close(self, cancel=False):
+        # cancel=True drops queued URLs instead of extracting them
+        if cancel:
+            self.cancelled.set()
+        for _ in self._workers:
+            self.tasks.put(_STOP)
+        for t in self._workers + self._retired:
+            t.join()
+        self.results.put(_STOP)
+        self._sink.join()
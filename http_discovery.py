@@ -0,0 +1,386 @@
+import re
+import logging
+import json
+import queue
+import asyncio
+import threading
+from urllib.parse import urlparse, urlunparse, quote
+
+try:
+    import aiohttp
+except ImportError:  # only needed for DISCOVERY_MODE = "http"
+    aiohttp = None
+
+import metrics
+from rate_limiter import ThrottledError, is_throttle_url, retry_after_seconds
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# HTTP DISCOVERY
+# ==================================================
+# Search and channel-Shorts pages fetched without a browser. The first
+# page's HTML embeds its results as `ytInitialData` JSON, plus the innertube
+# API key and client context in `ytcfg.set({...})`; every further batch
+# comes from POSTing the continuation token to youtubei/v1/search (or
+# /browse for channels), which is what the page's own infinite scroll does.
+#
+# All workers share one aiohttp session running on a background event loop,
+# so connections are pooled and kept alive across pages, and the next
+# continuation is already in flight while the current batch is processed.
+# A page whose HTML has no parsable ytInitialData (consent wall, bot check,
+# layout change) raises HttpDiscoveryError so the caller can hand it to a
+# browser instead. A 429/503 or a redirect to a consent or captcha page
+# raises ThrottledError instead; every request's outcome is reported to the
+# rate limiter.
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",  # view counts are parsed as English text
+}
+# Pre-accepted consent, otherwise EU clients get the consent page instead of results
+COOKIES = {"SOCS": "CAI", "CONSENT": "YES+"}
+DEFAULT_CLIENT_VERSION = "2.20240501.00.00"
+
+INITIAL_DATA_RE = re.compile(r"""(?:var\s+ytInitialData|window\[["']ytInitialData["']\])\s*=\s*""")
+YTCFG_RE = re.compile(r"ytcfg\.set\s*\(\s*(?=\{)")
+
+VIDEO_RENDERERS = ("videoRenderer", "gridVideoRenderer", "reelItemRenderer", "shortsLockupViewModel")
+
+REQUEST_SECONDS = metrics.histogram("crawl_http_request_seconds", "HTTP discovery request latency")
+REQUEST_ERRORS = metrics.counter("crawl_http_request_errors_total", "Failed HTTP discovery requests")
+
+_STOP = object()
+
+
+class HttpDiscoveryError(Exception):
+    pass
+
+
+# ---------------- parsing ----------------
+def _json_after(html, pattern):
+    # Every JSON object that directly follows a match of `pattern`
+    decoder = json.JSONDecoder()
+    objects = []
+    for m in pattern.finditer(html):
+        start = html.find("{", m.end())
+        if start < 0:
+            continue
+        try:
+            objects.append(decoder.raw_decode(html, start)[0])
+        except ValueError:
+            continue
+    return objects
+
+
+def parse_initial_data(html):
+    found = _json_after(html, INITIAL_DATA_RE)
+    if not found:
+        raise HttpDiscoveryError("page has no ytInitialData")
+    return found[0]
+
+
+def parse_ytcfg(html):
+    config = {}
+    for obj in _json_after(html, YTCFG_RE):
+        config.update(obj)
+    return config
+
+
+def _walk(node):
+    # Every dict in the tree, in document order
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _text(value):
+    # {"simpleText": ...}, {"runs": [{"text": ...}]} or {"content": ...}
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, dict):
+        return ""
+    if "simpleText" in value:
+        return value["simpleText"]
+    if "runs" in value:
+        return "".join(run.get("text", "") for run in value["runs"])
+    return value.get("content", "")
+
+
+def _get(node, *keys):
+    for key in keys:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+
+def _raw_candidate(kind, renderer):
+    # Same fields as NEW_CANDIDATES_JS reads from the rendered page
+    if kind == "shortsLockupViewModel":
+        video_id = _get(renderer, "onTap", "innertubeCommand", "reelWatchEndpoint", "videoId")
+        if not video_id:
+            return None
+        return {
+            "video_id": video_id,
+            "href": f"https://www.youtube.com/shorts/{video_id}",
+            "title": _text(_get(renderer, "overlayMetadata", "primaryText")),
+            "label": renderer.get("accessibilityText") or "",
+            "views": _text(_get(renderer, "overlayMetadata", "secondaryText")),
+            "duration": "",
+        }
+    video_id = renderer.get("videoId")
+    if not video_id:
+        return None
+    path = _get(renderer, "navigationEndpoint", "commandMetadata", "webCommandMetadata", "url") or ""
+    if kind == "reelItemRenderer" or path.startswith("/shorts/"):
+        href = f"https://www.youtube.com/shorts/{video_id}"
+    else:
+        href = f"https://www.youtube.com/watch?v={video_id}"
+    return {
+        "video_id": video_id,
+        "href": href,
+        "title": _text(renderer.get("title") or renderer.get("headline")),
+        "label": _get(renderer, "accessibility", "accessibilityData", "label") or "",
+        "views": _text(renderer.get("viewCountText")),
+        "duration": _text(renderer.get("lengthText")),
+    }
+
+
+def parse_results(data):
+    # (raw candidates, continuation token or None) from ytInitialData or a
+    # continuation response; the walk does not depend on the page layout.
+    candidates = []
+    token = None
+    for node in _walk(data):
+        for kind in VIDEO_RENDERERS:
+            renderer = node.get(kind)
+            if isinstance(renderer, dict):
+                raw = _raw_candidate(kind, renderer)
+                if raw:
+                    candidates.append(raw)
+        if token is None and isinstance(node.get("continuationItemRenderer"), dict):
+            for inner in _walk(node["continuationItemRenderer"]):
+                if isinstance(inner.get("continuationCommand"), dict):
+                    token = inner["continuationCommand"].get("token")
+                    break
+    return candidates, token
+
+
+# ---------------- client ----------------
+class HttpDiscovery:
+    # Runs like DriverPool: `workers` threads each call work(self, page),
+    # and work pulls candidates with iter_candidates(url).
+    def __init__(self, work, on_error=None, workers=4, connections=8, max_continuations=8,
+                 yield_target=200, timeout=15, rate_limiter=None, base_url=None):
+        if aiohttp is None:
+            raise RuntimeError("HTTP discovery needs aiohttp: pip install aiohttp")
+        self.work = work  # work(client, job)
+        self.on_error = on_error  # on_error(job, exc)
+        self.size = max(1, workers)
+        self.connections = connections
+        self.max_continuations = max_continuations
+        self.yield_target = yield_target
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url  # e.g. the fixture stub server; None for youtube.com
+        self.restarts = 0  # DriverPool interface, nothing to restart here
+        self.cancelled = threading.Event()
+        self._jobs = queue.Queue()
+        self._free = threading.Semaphore(self.size)
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="http-loop", daemon=True)
+        self._session = None
+        self._threads = [
+            threading.Thread(target=self._run, name=f"http-{i+1}", daemon=True)
+            for i in range(self.size)
+        ]
+
+    @property
+    def busy(self):
+        with self._lock:
+            return self._busy
+
+    def start(self):
+        self._loop_thread.start()
+        self._session = self._call(self._open())
+        for t in self._threads:
+            t.start()
+        return self
+
+    async def _open(self):
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=HEADERS, cookies=COOKIES,
+        )
+
+    def _schedule(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _call(self, coro):
+        return self._schedule(coro).result()
+
+    def _url(self, url):
+        if not self.base_url:
+            return url
+        base = urlparse(self.base_url)
+        return urlunparse(urlparse(url)._replace(scheme=base.scheme, netloc=base.netloc))
+
+    def _check(self, url, resp):
+        if resp.status in (429, 503) or is_throttle_url(str(resp.url)):
+            raise ThrottledError(f"HTTP {resp.status} from {resp.url}",
+                                 retry_after_seconds(resp.headers.get("Retry-After")))
+        resp.raise_for_status()
+
+    async def _get_text(self, url):
+        try:
+            with REQUEST_SECONDS.time(request="page"):
+                async with self._session.get(self._url(url)) as resp:
+                    self._check(url, resp)
+                    text = await resp.text()
+        except Exception as e:
+            REQUEST_ERRORS.inc(request="page")
+            self._report(url, e)
+            raise
+        self._report(url)
+        return text
+
+    async def _post_json(self, url, payload):
+        try:
+            with REQUEST_SECONDS.time(request="continuation"):
+                async with self._session.post(self._url(url), json=payload) as resp:
+                    self._check(url, resp)
+                    data = await resp.json(content_type=None)
+        except Exception as e:
+            REQUEST_ERRORS.inc(request="continuation")
+            self._report(url, e)
+            raise
+        self._report(url)
+        return data
+
+    def _wait(self, url):
+        if self.rate_limiter:
+            self.rate_limiter.wait(url)
+
+    def _report(self, url, error=None):
+        # Other errors (timeouts, 404s) say nothing about the pace
+        if self.rate_limiter and error is None:
+            self.rate_limiter.report(url)
+        elif self.rate_limiter and isinstance(error, ThrottledError):
+            self.rate_limiter.report(url, throttled=True, retry_after=error.retry_after)
+
+    def _continuation(self, page_url, token, ytcfg):
+        endpoint = "search" if urlparse(page_url).path == "/results" else "browse"
+        api_url = f"https://www.youtube.com/youtubei/v1/{endpoint}?prettyPrint=false"
+        if ytcfg.get("INNERTUBE_API_KEY"):
+            api_url += "&key=" + quote(ytcfg["INNERTUBE_API_KEY"])
+        context = ytcfg.get("INNERTUBE_CONTEXT") or {
+            "client": {"clientName": "WEB", "hl": "en",
+                       "clientVersion": ytcfg.get("INNERTUBE_CLIENT_VERSION") or DEFAULT_CLIENT_VERSION}
+        }
+        self._wait(api_url)
+        return self._schedule(self._post_json(api_url, {"context": context, "continuation": token}))
+
+    def iter_candidates(self, url, max_continuations=None):
+        # Loads the first page right away, raising HttpDiscoveryError when it
+        # carries no results data, then returns a generator of raw candidates
+        # from it and its continuations (max_continuations overrides the
+        # client's limit for this page).
+        self._wait(url)
+        html = self._call(self._get_text(url))
+        data = parse_initial_data(html)
+        limit = self.max_continuations if max_continuations is None else max_continuations
+        return self._iter_batches(url, parse_results(data), parse_ytcfg(html), limit)
+
+    def _iter_batches(self, url, batch, ytcfg, limit):
+        seen = set()
+        continuations = 0
+        pending = None
+        try:
+            while True:
+                candidates, token = batch
+                pending = None
+                if token and continuations < limit and len(seen) < self.yield_target:
+                    # Fetch the next batch while this one is being consumed
+                    pending = self._continuation(url, token, ytcfg)
+                new = []
+                for raw in candidates:
+                    # The same video can come as a reel and as a video result
+                    if raw["video_id"] not in seen:
+                        seen.add(raw["video_id"])
+                        new.append(raw)
+                if continuations:
+                    log.debug(f"  Continuation {continuations}/{limit}: +{len(new)} links")
+                yield from new
+                if pending is None:
+                    if len(seen) >= self.yield_target:
+                        log.info(f"  Yield target reached ({len(seen)} links)")
+                    break
+                if continuations and not new:
+                    log.info("  Page stopped growing")
+                    break
+                try:
+                    batch = parse_results(pending.result())
+                except Exception as e:
+                    log.warning(f"  ⚠ Continuation failed, keeping {len(seen)} links: {e}")
+                    break
+                pending = None
+                continuations += 1
+        finally:
+            if pending is not None:
+                pending.cancel()  # the caller stopped early
+            log.info(f"  Found {len(seen)} unique videos")
+
+    # ---------------- workers ----------------
+    def submit(self, job) -> bool:
+        while not self._free.acquire(timeout=0.5):
+            if self.cancelled.is_set():
+                return False
+        with self._lock:
+            self._busy += 1
+        self._jobs.put(job)
+        return True
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is _STOP:
+                break
+            try:
+                if not self.cancelled.is_set():
+                    self.work(self, job)
+            except Exception as e:
+                if self.on_error and not self.cancelled.is_set():
+                    self.on_error(job, e)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                self._free.release()
+
+    def _close_session(self):
+        if self._session is not None:
+            session, self._session = self._session, None
+            self._call(session.close())
+
+    def close(self, cancel=False, timeout=30):
+        if cancel:
+            self.cancelled.set()
+            # Closing the session makes in-flight requests fail fast
+            self._close_session()
+        for _ in self._threads:
+            self._jobs.put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
+        self._close_session()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout)
+        self._loop.close()
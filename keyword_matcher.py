@@ -0,0 +1,131 @@
+from collections import deque, namedtuple
+
+try:
+    import ahocorasick
+except ImportError:  # optional C automaton (pyahocorasick) for the yes/no checks
+    ahocorasick = None
+
+# ==================================================
+# AHO-CORASICK KEYWORD MATCHER
+# ==================================================
+# Compiles every category's keyword list into one automaton so a text blob
+# is scanned once, in O(len(text) + matches), no matter how many keywords
+# there are. Matching is case-insensitive substring matching, the same as
+# the old `any(k in text.lower() for k in KEYWORDS)` checks, unless
+# whole_words is set: then a hit must not continue a word on either side,
+# so "eth" no longer fires inside "method". Positions refer to the
+# lowercased text.
+#
+# Walking the automaton in Python costs more per character than CPython's
+# C substring search costs per keyword, so the yes/no checks (matches,
+# matched_categories) use pyahocorasick when it is installed and plain
+# `keyword in text` scans otherwise. finditer uses the Python automaton;
+# callers can skip it for texts matches() rejects (see ScamScorer.score).
+
+KeywordMatch = namedtuple("KeywordMatch", ["keyword", "category", "start", "end"])
+
+
+def _continues_word(text, i, edge):
+    # True when text[i] extends the word a keyword starts or ends with
+    return 0 <= i < len(text) and edge.isalnum() and (text[i].isalnum() or text[i] == "_")
+
+
+class KeywordMatcher:
+    def __init__(self, keyword_sets: dict):
+        self.categories = list(keyword_sets)
+        self._patterns = []  # (keyword, category) per pattern index
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._keywords = {}  # category -> its distinct lowercased keywords
+        for category, keywords in keyword_sets.items():
+            seen = set()
+            for keyword in keywords:
+                k = keyword.lower()
+                if not k or k in seen:
+                    continue
+                seen.add(k)
+                self._add(k, category)
+            self._keywords[category] = tuple(seen)
+        self._build()
+        self._all = tuple({k for k, _ in self._patterns})
+        self._fast = None
+        if ahocorasick is not None and self._patterns:
+            self._fast = ahocorasick.Automaton()
+            for k in self._all:
+                self._fast.add_word(k, tuple(c for c in self.categories if k in self._keywords[c]))
+            self._fast.make_automaton()
+
+    def _add(self, keyword, category):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append(len(self._patterns))
+        self._patterns.append((keyword, category))
+
+    def _build(self):
+        # Breadth-first so every state's fail target is finished before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def finditer(self, text: str, whole_words=False):
+        if not text:
+            return
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        lowered = text.lower()
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                keyword, category = patterns[idx]
+                start = i - len(keyword) + 1
+                if whole_words and (_continues_word(lowered, start - 1, keyword[0])
+                                    or _continues_word(lowered, i + 1, keyword[-1])):
+                    continue
+                yield KeywordMatch(keyword, category, start, i + 1)
+
+    def find_all(self, text: str) -> list:
+        return list(self.finditer(text))
+
+    def matched_categories(self, text: str) -> list:
+        if not text:
+            return []
+        lowered = text.lower()
+        if self._fast is None:
+            return [c for c in self.categories if any(k in lowered for k in self._keywords[c])]
+        # Stops scanning as soon as every category has a hit
+        found = set()
+        for _, categories in self._fast.iter(lowered):
+            found.update(categories)
+            if len(found) == len(self.categories):
+                break
+        return [c for c in self.categories if c in found]
+
+    def matches(self, text: str) -> bool:
+        if not text:
+            return False
+        lowered = text.lower()
+        if self._fast is None:
+            return any(k in lowered for k in self._all)
+        return next(self._fast.iter(lowered), None) is not None
@@ -0,0 +1,288 @@
+import os
+import time
+import shutil
+import sqlite3
+import threading
+import subprocess
+import urllib.request
+
+import metrics
+from download_manager import link_or_copy
+
+# ==================================================
+# PERCEPTUAL-HASH DEDUPLICATION
+# ==================================================
+# Scam Shorts get re-uploaded under new IDs, so the same clip would be stored
+# once per upload. After a download, `samples` frames (taken at 1 fps,
+# spread over the clip) are reduced to 64-bit difference hashes and looked
+# up in a BK-tree; a video whose frames mostly land within `frame_distance`
+# bits of an earlier video's frames joins that video's cluster, and its
+# files are replaced by hard links to the cluster's canonical copy.
+#
+# Thumbnails are hashed the same way into a second tree. match_thumbnail()
+# runs before a download, so a video whose thumbnail matches a known one
+# can be linked to that video's cluster without being downloaded at all.
+#
+# Frames and images are decoded by ffmpeg (which yt-dlp already uses to
+# merge formats), scaled to 9x8 grayscale and hashed here, so no imaging
+# library is needed.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media_hashes (
+    video_id TEXT PRIMARY KEY,
+    thumbnail_url TEXT,
+    thumb_hash TEXT,
+    frame_hashes TEXT,
+    path TEXT,
+    canonical_id TEXT,
+    distance REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_media_hashes_canonical ON media_hashes(canonical_id);
+"""
+
+HASH_SECONDS = metrics.histogram("crawl_dedup_hash_seconds", "ffmpeg decode and hash time")
+DUPLICATES = metrics.counter("crawl_duplicates_total", "Videos linked to an earlier cluster")
+
+HASH_FILTER = "scale=9:8:flags=area,format=gray"
+FRAME_BYTES = 9 * 8
+
+
+def ffmpeg_available(ffmpeg="ffmpeg") -> bool:
+    return shutil.which(ffmpeg) is not None
+
+
+def dhash(pixels) -> int:
+    # 64-bit difference hash of a 9x8 grayscale frame: one bit per pair of
+    # horizontally adjacent pixels, set when brightness increases
+    value = 0
+    for row in range(8):
+        line = pixels[row * 9:row * 9 + 9]
+        for col in range(8):
+            value = (value << 1) | (line[col] < line[col + 1])
+    return value
+
+
+def hamming(a, b) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _ffmpeg_frames(ffmpeg, args, data=None, timeout=120):
+    result = subprocess.run(
+        [ffmpeg, "-v", "error", *args, "-f", "rawvideo", "-pix_fmt", "gray", "-"],
+        input=data, capture_output=True, timeout=timeout,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", "replace").strip()[-300:] or "ffmpeg failed")
+    raw = result.stdout
+    return [raw[i:i + FRAME_BYTES] for i in range(0, len(raw) - FRAME_BYTES + 1, FRAME_BYTES)]
+
+
+def video_hashes(path, samples=16, ffmpeg="ffmpeg") -> list:
+    # One hash per second of video, thinned out evenly to `samples`
+    with HASH_SECONDS.time(source="video"):
+        frames = _ffmpeg_frames(ffmpeg, ["-i", path, "-an", "-vf", f"fps=1,{HASH_FILTER}"])
+    if not frames:
+        raise RuntimeError(f"no frames decoded from {path}")
+    if len(frames) > samples:
+        step = len(frames) / samples
+        frames = [frames[int(i * step)] for i in range(samples)]
+    return [dhash(frame) for frame in frames]
+
+
+def image_hash(data, ffmpeg="ffmpeg") -> int:
+    # Hash of an encoded image (jpg, webp, png) held in memory
+    with HASH_SECONDS.time(source="image"):
+        frames = _ffmpeg_frames(ffmpeg, ["-i", "pipe:0", "-frames:v", "1", "-vf", HASH_FILTER], data=data, timeout=30)
+    if not frames:
+        raise RuntimeError("image could not be decoded")
+    return dhash(frames[0])
+
+
+class BKTree:
+    # Nearest-neighbour index over 64-bit hashes with Hamming distance
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, radius) -> list:
+        # (distance, item) for every stored hash within `radius` bits
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= radius:
+                found.extend((d, item) for item in node[1])
+            for edge, child in node[2].items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        return found
+
+
+class MediaDeduplicator:
+    def __init__(self, path, samples=16, frame_distance=10, min_frame_share=0.5,
+                 thumb_distance=4, ffmpeg="ffmpeg"):
+        self.samples = samples
+        self.frame_distance = frame_distance  # max differing bits for two frames to match
+        self.min_frame_share = min_frame_share  # share of frames that must match
+        self.thumb_distance = thumb_distance
+        self.ffmpeg = ffmpeg
+        self.frames = BKTree()
+        self.thumbs = BKTree()
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            rows = self._conn.execute("SELECT video_id, thumb_hash, frame_hashes FROM media_hashes").fetchall()
+        for video_id, thumb_hash, frame_hashes in rows:
+            if thumb_hash:
+                self.thumbs.add(int(thumb_hash, 16), video_id)
+            for h in (frame_hashes or "").split(","):
+                if h:
+                    self.frames.add(int(h, 16), video_id)
+
+    def _row(self, video_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT thumbnail_url, thumb_hash, frame_hashes, path, canonical_id FROM media_hashes "
+                "WHERE video_id = ?", (video_id,)
+            ).fetchone()
+
+    def _update(self, video_id, **fields):
+        sets = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE media_hashes SET {sets}, updated_at = ? WHERE video_id = ?",
+                (*fields.values(), time.time(), video_id),
+            )
+
+    def canonical(self, video_id):
+        # Cluster representative; a video that matched nothing is its own
+        row = self._row(video_id)
+        return (row[4] if row else None) or video_id
+
+    def thumbnail_url(self, video_id):
+        row = self._row(video_id)
+        return row[0] if row else None
+
+    def add_video(self, video_id, thumbnail_url=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO media_hashes (video_id, thumbnail_url, updated_at) VALUES (?, ?, ?)",
+                (video_id, thumbnail_url, time.time()),
+            )
+
+    # ---------------- thumbnails ----------------
+    def fetch_thumbnail(self, url) -> bytes:
+        request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(request, timeout=15) as resp:
+            return resp.read()
+
+    def match_thumbnail(self, video_id, data=None, value=None):
+        # Hashes the video's thumbnail (fetched unless its bytes or hash are
+        # given) and returns the canonical ID of a known video it matches, or None.
+        row = self._row(video_id)
+        if row is None or (not row[0] and data is None and value is None):
+            return None
+        if row[1]:
+            value = int(row[1], 16)
+        elif value is None:
+            value = image_hash(data if data is not None else self.fetch_thumbnail(row[0]), self.ffmpeg)
+        with self._lock:
+            hits = sorted((d, other) for d, other in self.thumbs.search(value, self.thumb_distance)
+                          if other != video_id)
+            if not row[1]:
+                self.thumbs.add(value, video_id)
+        self._update(video_id, thumb_hash=f"{value:016x}")
+        if not hits:
+            return None
+        distance, other = hits[0]
+        canonical = self.canonical(other)
+        self.link(video_id, canonical, distance, matched_by="thumbnail")
+        return canonical
+
+    def link(self, video_id, canonical, distance=None, matched_by="frames"):
+        self._update(video_id, canonical_id=canonical, distance=distance)
+        DUPLICATES.inc(matched_by=matched_by)
+
+    # ---------------- downloaded videos ----------------
+    def match_frames(self, video_id, hashes):
+        # (canonical ID, mean distance) of the earlier video most of these
+        # frames match, or (None, None)
+        votes = {}
+        with self._lock:
+            for value in hashes:
+                best = {}
+                for d, other in self.frames.search(value, self.frame_distance):
+                    if other != video_id and d < best.get(other, 65):
+                        best[other] = d
+                for other, d in best.items():
+                    votes.setdefault(other, []).append(d)
+        needed = max(1, int(len(hashes) * self.min_frame_share + 0.999))
+        matches = [(len(ds), -sum(ds) / len(ds), other) for other, ds in votes.items() if len(ds) >= needed]
+        if not matches:
+            return None, None
+        _, neg_mean, other = max(matches)
+        return self.canonical(other), -neg_mean
+
+    def process_download(self, video_id, paths):
+        # Post-download stage: hash paths[0], cluster it, and hard-link every
+        # path of a duplicate to the canonical file. Returns the canonical ID
+        # when the video is a duplicate, else None.
+        self.add_video(video_id)
+        row = self._row(video_id)
+        hashes = [int(h, 16) for h in row[2].split(",")] if row[2] else video_hashes(paths[0], self.samples, self.ffmpeg)
+        canonical, distance = self.match_frames(video_id, hashes)
+        if not row[2]:
+            with self._lock:
+                for value in hashes:
+                    self.frames.add(value, video_id)
+        self._update(video_id, frame_hashes=",".join(f"{h:016x}" for h in hashes), path=paths[0])
+        if canonical is None:
+            # Keep a thumbnail match if frames gave nothing better
+            return row[4]
+        self.link(video_id, canonical, distance)
+        canonical_path = (self._row(canonical) or (None,) * 4)[3]
+        if canonical_path and os.path.exists(canonical_path):
+            for path in paths:
+                if os.path.exists(path) and not os.path.samefile(path, canonical_path):
+                    link_or_copy(canonical_path, path + ".dedup")
+                    os.replace(path + ".dedup", path)
+        return canonical
+
+    def duplicate_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM media_hashes WHERE canonical_id IS NOT NULL"
+            ).fetchone()[0]
+
+    def cluster_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(DISTINCT canonical_id) FROM media_hashes WHERE canonical_id IS NOT NULL"
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
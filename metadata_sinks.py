@@ -0,0 +1,282 @@
+import os
+import re
+import logging
+import json
+import glob
+import time
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for METADATA_SINK = "parquet"
+    pa = None
+    pq = None
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# METADATA SINKS
+# ==================================================
+# Where save_metadata() puts records. Every sink takes the category folder
+# name (e.g. "youtube_shorts_crypto") and the record, skips video IDs it
+# already holds, and returns True when the record was new.
+#
+#   json    one indented file per video (the original layout)
+#   jsonl   one append-only metadata/<folder>.jsonl per category
+#   parquet metadata/<folder>-<run>-<part>.parquet, one complete file per
+#           flush, so a crash never leaves an unreadable file behind
+#
+# jsonl and parquet buffer records and flush (with fsync) every
+# `flush_every` records or `flush_interval` seconds, and on close(). A
+# background thread flushes records that wait longer than `flush_interval`
+# while no new ones arrive.
+
+
+class JsonFileSink:
+    def __init__(self, output_dir):
+        self.base = os.path.join(output_dir, "metadata")
+        self._known = {}
+        self._lock = threading.Lock()
+
+    def _ids(self, folder):
+        # One directory listing per folder instead of an exists() per record
+        if folder not in self._known:
+            path = os.path.join(self.base, folder)
+            os.makedirs(path, exist_ok=True)
+            self._known[folder] = {n[:-5] for n in os.listdir(path) if n.endswith(".json")}
+        return self._known[folder]
+
+    def write(self, folder, record) -> bool:
+        with self._lock:
+            ids = self._ids(folder)
+            if record["video_id"] in ids:
+                return False
+            path = os.path.join(self.base, folder, f"{record['video_id']}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=2, ensure_ascii=False)
+            ids.add(record["video_id"])
+            return True
+
+    def update(self, folder, video_id, fields) -> bool:
+        # Rewrites fields of a saved record in place (the other sinks are
+        # append-only); False if the record does not exist
+        path = os.path.join(self.base, folder, f"{video_id}.json")
+        with self._lock:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    record = json.load(f)
+            except FileNotFoundError:
+                return False
+            record.update(fields)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=2, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+            return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _BufferedSink:
+    def __init__(self, output_dir, flush_every=100, flush_interval=30):
+        self.base = os.path.join(output_dir, "metadata")
+        os.makedirs(self.base, exist_ok=True)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffers = {}
+        self._known = {}
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sink-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(min(self.flush_interval, 5) or 1):
+            with self._lock:
+                if self._buffered and time.monotonic() - self._last_flush >= self.flush_interval:
+                    try:
+                        self._flush()
+                    except Exception as e:
+                        log.error(f"  Error flushing metadata: {e}")
+
+    def _load_ids(self, folder):
+        raise NotImplementedError
+
+    def _flush_folder(self, folder, records):
+        raise NotImplementedError
+
+    def write(self, folder, record) -> bool:
+        with self._lock:
+            if folder not in self._known:
+                self._known[folder] = self._load_ids(folder)
+            if record["video_id"] in self._known[folder]:
+                return False
+            self._known[folder].add(record["video_id"])
+            self._buffers.setdefault(folder, []).append(record)
+            self._buffered += 1
+            if (self._buffered >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+            return True
+
+    def _flush(self):
+        for folder, records in self._buffers.items():
+            if records:
+                self._flush_folder(folder, records)
+        self._buffers = {}
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+class JsonlSink(_BufferedSink):
+    def path(self, folder):
+        return os.path.join(self.base, f"{folder}.jsonl")
+
+    def _load_ids(self, folder):
+        ids = set()
+        if os.path.exists(self.path(folder)):
+            for record in read_jsonl(self.path(folder)):
+                ids.add(record["video_id"])
+        return ids
+
+    def _flush_folder(self, folder, records):
+        with open(self.path(folder), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# Known record fields get typed columns; anything else added to records
+# later is kept as a JSON object in `extra_json` so the schema stays fixed.
+PARQUET_FIELDS = [
+    ("video_id", "string"), ("platform", "string"), ("video_url", "string"),
+    ("title", "string"), ("description", "string"), ("uploader", "string"),
+    ("channel", "string"), ("channel_id", "string"), ("channel_url", "string"),
+    ("upload_date", "string"), ("duration", "float64"),
+    ("view_count", "int64"), ("like_count", "int64"), ("comment_count", "int64"),
+    ("tags", "list"), ("hashtags", "list"), ("is_short", "bool"), ("label", "string"),
+    ("scam_type", "string"), ("categories", "list"), ("scraped_at", "string"),
+    ("scraper_id", "string"), ("thumbnail", "string"),
+]
+
+
+def parquet_schema():
+    types = {"string": pa.string(), "float64": pa.float64(), "int64": pa.int64(),
+             "bool": pa.bool_(), "list": pa.list_(pa.string())}
+    fields = [pa.field(name, types[kind]) for name, kind in PARQUET_FIELDS]
+    return pa.schema(fields + [pa.field("extra_json", pa.string())])
+
+
+class ParquetSink(_BufferedSink):
+    def __init__(self, output_dir, flush_every=1000, flush_interval=60):
+        if pa is None:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+        self.schema = parquet_schema()
+        # Start time to the millisecond plus the pid, so two runs (or two
+        # processes) starting within a second never write the same part files
+        now = time.time()
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}-{os.getpid()}"
+        self._parts = {}
+        super().__init__(output_dir, flush_every, flush_interval)
+
+    def _load_ids(self, folder):
+        ids = set()
+        for path in glob.glob(os.path.join(self.base, f"{folder}-*.parquet")):
+            try:
+                ids.update(pq.read_table(path, columns=["video_id"]).column("video_id").to_pylist())
+            except Exception as e:
+                log.warning(f"  ⚠ Skipping unreadable {path}: {e}")
+        return ids
+
+    def _flush_folder(self, folder, records):
+        known = {name for name, _ in PARQUET_FIELDS}
+        rows = []
+        for record in records:
+            row = {name: record.get(name) for name in known}
+            extra = {k: v for k, v in record.items() if k not in known}
+            row["extra_json"] = json.dumps(extra, ensure_ascii=False) if extra else None
+            rows.append(row)
+        # Each flush becomes a finished file: written aside, synced, then
+        # renamed into place
+        part = self._parts[folder] = self._parts.get(folder, 0) + 1
+        path = os.path.join(self.base, f"{folder}-{self.run_id}-{part:04d}.parquet")
+        with open(path + ".tmp", "wb") as f:
+            pq.write_table(pa.Table.from_pylist(rows, schema=self.schema), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+
+SINKS = {"json": JsonFileSink, "jsonl": JsonlSink, "parquet": ParquetSink}
+
+
+def make_sink(kind, output_dir, **options):
+    if kind not in SINKS:
+        raise ValueError(f"Unknown metadata sink {kind!r}, expected one of {', '.join(SINKS)}")
+    if kind == "json":
+        return JsonFileSink(output_dir)
+    return SINKS[kind](output_dir, **options)
+
+
+# ==================================================
+# READERS
+# ==================================================
+RUN_SUFFIX_RE = re.compile(r"-\d{8}-\d{6}(-\d+)*$")  # -<run id>[-<part>] of Parquet files
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a truncated last line
+                    continue
+
+
+def iter_json_files(output_dir):
+    # (folder, record) for every per-video JSON file under metadata/
+    for path in sorted(glob.glob(os.path.join(output_dir, "metadata", "*", "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            yield os.path.basename(os.path.dirname(path)), json.load(f)
+
+
+def iter_records(output_dir):
+    # (folder, record) from every sink's output under metadata/
+    yield from iter_json_files(output_dir)
+    for path in sorted(glob.glob(os.path.join(output_dir, "metadata", "*.jsonl"))):
+        folder = os.path.basename(path)[:-len(".jsonl")]
+        for record in read_jsonl(path):
+            yield folder, record
+    if pq is None:
+        return
+    for path in sorted(glob.glob(os.path.join(output_dir, "metadata", "*.parquet"))):
+        folder = RUN_SUFFIX_RE.sub("", os.path.basename(path)[:-len(".parquet")])
+        try:
+            rows = pq.read_table(path).to_pylist()
+        except Exception as e:
+            log.warning(f"  ⚠ Skipping unreadable {path}: {e}")
+            continue
+        for row in rows:
+            extra = row.pop("extra_json", None)
+            if extra:
+                row.update(json.loads(extra))
+            yield folder, row
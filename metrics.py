@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# ==================================================
+# CRAWL METRICS
+# ==================================================
+# Counters, gauges and latency histograms shared by every pipeline stage.
+# Modules create their metrics at import time from the default REGISTRY:
+#
+#   EXTRACT_SECONDS = metrics.histogram("crawl_extract_seconds", "yt-dlp extract_info latency")
+#   with EXTRACT_SECONDS.time():
+#       ...
+#
+# The registry is exported in Prometheus text format (serve_http) and as a
+# JSON snapshot with p50/p90/p99 per histogram (SnapshotWriter). The
+# percentiles cover the last `window` observations of each label set; the
+# Prometheus buckets and sums cover the whole run.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _label_text(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+    def snapshot(self):
+        with self._lock:
+            return {_label_text(key) or "total": value for key, value in sorted(self._values.items())}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name, help, function=None):
+        super().__init__(name, help)
+        self.function = function  # read at export time, e.g. a queue length
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def _refresh(self):
+        if self.function is not None:
+            try:
+                self.set(self.function())
+            except Exception:
+                pass  # keep the last value, e.g. once the measured object is closed
+
+    def samples(self):
+        self._refresh()
+        return super().samples()
+
+    def snapshot(self):
+        self._refresh()
+        return super().snapshot()
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS, window=2048):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._series = {}  # key -> [bucket counts, sum, count, recent values]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, deque(maxlen=self.window)]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+            series[3].append(value)
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, count, _) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    out.append((self.name + "_bucket", key + (("le", _number(bound)),), cumulative))
+                out.append((self.name + "_sum", key, total))
+                out.append((self.name + "_count", key, count))
+        return out
+
+    def snapshot(self):
+        result = {}
+        with self._lock:
+            for key, (_, total, count, recent) in sorted(self._series.items()):
+                ordered = sorted(recent)
+                pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 6) if ordered else None
+                result[_label_text(key) or "total"] = {
+                    "count": count, "sum": round(total, 6),
+                    "p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99),
+                }
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **options):
+        # Asking twice for the same name returns the same metric
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **options)
+            return metric
+
+    def counter(self, name, help):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help, function=None):
+        gauge = self._get(Gauge, name, help)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def prometheus_text(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_label_text(key)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "metrics": {m.name: m.snapshot() for m in metrics}}
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+# ==================================================
+# EXPORTERS
+# ==================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/metrics"):
+            body, content_type = self.server.registry.prometheus_text(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(self.server.registry.snapshot(), indent=2), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve_http(port, host="127.0.0.1", registry=REGISTRY):
+    # Prometheus scrape endpoint at /metrics (and the JSON snapshot at
+    # /metrics.json); call shutdown() on the returned server to stop it
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+class SnapshotWriter:
+    # Rewrites `path` with a JSON snapshot every `interval` seconds, and once
+    # more on close()
+    def __init__(self, path, interval=30, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def write(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.registry.snapshot(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.write()
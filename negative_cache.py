@@ -0,0 +1,97 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+# ==================================================
+# NEGATIVE-RESULT CACHE
+# ==================================================
+# Remembers videos that failed the duration, view-count or keyword checks so
+# they are not extracted again on the next run or channel revisit. Entries
+# expire per rejection reason: view-count rejections go stale quickly (the
+# count keeps moving and MAX_VIEW_COUNT may be raised), a keyword miss is
+# re-checked after a month, and a too-long video never becomes a Short.
+
+CachedRejection = namedtuple("CachedRejection", ["reason", "view_count", "rejected_at"])
+
+DAY = 24 * 3600
+DEFAULT_TTLS = {
+    "views": 1 * DAY,
+    "keywords": 30 * DAY,
+    "duration": 180 * DAY,
+    "error": 3600,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rejections (
+    video_id TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    view_count INTEGER,
+    rejected_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class NegativeCache:
+    def __init__(self, path, ttls=None, default_ttl=7 * DAY):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def ttl(self, reason):
+        return self.ttls.get(reason, self.default_ttl)
+
+    def get(self, video_id, max_view_count=None):
+        # None when the video was never rejected or its entry has expired
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reason, view_count, rejected_at FROM rejections WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if not row:
+            return None
+        entry = CachedRejection(*row)
+        if time.time() - entry.rejected_at > self.ttl(entry.reason):
+            return None
+        # A raised MAX_VIEW_COUNT voids view-count rejections it now allows
+        if entry.reason == "views" and max_view_count and (entry.view_count or 0) <= max_view_count:
+            return None
+        return entry
+
+    def add(self, video_id, reason, view_count=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rejections (video_id, reason, view_count, rejected_at) VALUES (?, ?, ?, ?)",
+                (video_id, reason, view_count, time.time()),
+            )
+
+    def discard(self, video_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM rejections WHERE video_id = ?", (video_id,))
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            reasons = [r for (r,) in self._conn.execute("SELECT DISTINCT reason FROM rejections")]
+            for reason in reasons:
+                removed += self._conn.execute(
+                    "DELETE FROM rejections WHERE reason = ? AND rejected_at < ?",
+                    (reason, now - self.ttl(reason)),
+                ).rowcount
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rejections").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
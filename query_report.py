@@ -0,0 +1,60 @@
+import sys
+import argparse
+
+from crawl_frontier import CrawlFrontier
+from query_scheduler import QueryScheduler
+
+# ==================================================
+# QUERY YIELD REPORT
+# ==================================================
+# Prints what every search query yielded over all runs recorded in a crawl
+# frontier, in the order the scheduler would crawl them next:
+#
+#   python query_report.py "C:\path\to\video_crawler\crawl_frontier.sqlite3"
+#
+# links    result links read, repeats included
+# new      videos this query found first
+# pre %    share of new videos that passed the pre-filter
+# hit %    share of evaluated videos that were saved as scams
+# Uses the scheduler defaults unless given the crawler settings as options.
+
+
+def pct(part, whole):
+    return f"{100 * part / whole:.0f}%" if whole else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-query yield and the resulting crawl schedule")
+    parser.add_argument("frontier", help="FRONTIER_PATH of the crawler (crawl_frontier.sqlite3)")
+    parser.add_argument("--scroll-rounds", type=int, default=8, help="SCROLL_ROUNDS of the crawler")
+    parser.add_argument("--retire-after-links", type=int, default=200, help="QUERY_RETIRE_AFTER_LINKS of the crawler")
+    parser.add_argument("--retire-hit-rate", type=float, default=0.005, help="QUERY_RETIRE_HIT_RATE of the crawler")
+    parser.add_argument("--reasons", action="store_true", help="also list rejections by reason per query")
+    args = parser.parse_args()
+
+    frontier = CrawlFrontier(args.frontier)
+    try:
+        stats = frontier.query_stats()
+    finally:
+        frontier.close()
+    if not stats:
+        print("No search queries recorded yet")
+        return 0
+    scheduler = QueryScheduler(scroll_rounds=args.scroll_rounds, retire_after_links=args.retire_after_links,
+                               retire_below=args.retire_hit_rate)
+    plans = scheduler.plan(sorted(stats), stats)
+    print(f"{'query':<36} {'crawls':>6} {'links':>7} {'new':>6} {'pre %':>6} {'hit %':>6} {'hits':>5} "
+          f"{'min':>7} {'hits/h':>7} {'scrolls':>7}  status")
+    for plan in plans:
+        s = stats[plan.query]
+        print(f"{plan.query[:36]:<36} {s.crawls:>6} {s.links:>7} {s.new:>6} "
+              f"{pct(s.new - s.prefiltered, s.new):>6} {pct(s.hits, s.evaluated):>6} {s.hits:>5} "
+              f"{s.seconds / 60:>7.1f} {plan.hits_per_hour:>7g} {plan.scroll_rounds:>7}  "
+              f"{'retired' if plan.retired else ''}")
+        if args.reasons and s.reasons:
+            print(" " * 4 + ", ".join(f"{reason}: {n}" for reason, n in sorted(s.reasons.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
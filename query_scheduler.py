@@ -0,0 +1,68 @@
+import time
+from collections import namedtuple
+
+# ==================================================
+# QUERY SCHEDULING
+# ==================================================
+# Orders search queries by the new scams they found per second of crawling
+# in earlier runs (CrawlFrontier.query_stats), and sizes each query's
+# scroll budget the same way: a query at twice the average yield gets twice
+# the scroll rounds, within min/max. Rates are smoothed towards the average
+# of all queries with `prior_seconds` of pseudo-crawl time, so one lucky
+# page does not make a query the favourite and a query never crawled
+# starts at the average.
+#
+# A query whose links produced fewer than `retire_below` hits per link,
+# after at least `retire_after_links` links, is retired: it is not crawled
+# again until `retry_after_days` have passed since its last crawl, because
+# search results change.
+
+QueryPlan = namedtuple("QueryPlan", ["query", "priority", "scroll_rounds", "retired", "hits_per_hour"])
+
+DAY = 24 * 3600
+
+
+class QueryScheduler:
+    def __init__(self, base_priority=0.5, scroll_rounds=8, min_scroll_rounds=2, max_scroll_rounds=20,
+                 retire_after_links=200, retire_below=0.005, retry_after_days=30, prior_seconds=60):
+        self.base_priority = base_priority  # frontier priority of an average query
+        self.scroll_rounds = scroll_rounds  # budget of an average query
+        self.min_scroll_rounds = min_scroll_rounds
+        self.max_scroll_rounds = max_scroll_rounds
+        self.retire_after_links = retire_after_links
+        self.retire_below = retire_below
+        self.retry_after_days = retry_after_days
+        self.prior_seconds = prior_seconds
+
+    def mean_rate(self, stats):
+        # Hits per crawl second over every query
+        seconds = sum(s.seconds for s in stats.values())
+        return sum(s.hits for s in stats.values()) / seconds if seconds else 0.0
+
+    def rate(self, s, mean):
+        if s is None:
+            return mean
+        return (s.hits + mean * self.prior_seconds) / (s.seconds + self.prior_seconds)
+
+    def retired(self, s, now=None):
+        if s is None or s.links < self.retire_after_links or s.hits / s.links >= self.retire_below:
+            return False
+        return (now or time.time()) - (s.last_crawled_at or 0) < self.retry_after_days * DAY
+
+    def plan(self, queries, stats, now=None) -> list:
+        # One QueryPlan per query, best first; ties keep the given order
+        mean = self.mean_rate(stats)
+        plans = []
+        for query in queries:
+            s = stats.get(query)
+            rate = self.rate(s, mean)
+            ratio = rate / mean if mean else 1.0
+            plans.append(QueryPlan(
+                query,
+                round(self.base_priority * min(2.0, max(0.1, ratio)), 4),
+                min(self.max_scroll_rounds, max(self.min_scroll_rounds, round(self.scroll_rounds * ratio))),
+                self.retired(s, now),
+                round(rate * 3600, 2),
+            ))
+        order = {query: i for i, query in enumerate(queries)}
+        return sorted(plans, key=lambda p: (p.retired, -p.priority, order[p.query]))
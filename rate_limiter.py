@@ -0,0 +1,192 @@
+import re
+import time
+import random
+import threading
+from urllib.parse import urlparse
+
+import metrics
+
+# ==================================================
+# TOKEN BUCKET
+# ==================================================
+# Shared budget of `rate` units per second with bursts up to `capacity`;
+# consume() blocks until enough tokens have accumulated. Used with bytes as
+# the unit to cap total download bandwidth across all download workers.
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self, amount=1):
+        # Takes the tokens now (possibly going negative) and returns the
+        # seconds until the debt is paid off, without sleeping
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def consume(self, amount=1):
+        # Sleeps off the reservation, so a chunk larger than capacity still
+        # goes through at the right pace.
+        delay = self.reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def set_rate(self, rate, pause=0.0):
+        # New rate for later reservations; `pause` seconds of debt delay
+        # everything not reserved yet
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if pause:
+                self._tokens = min(self._tokens, 0.0) - pause * self.rate
+
+
+# ==================================================
+# ADAPTIVE RATE LIMITER
+# ==================================================
+# One token bucket per endpoint class instead of a fixed interval per host:
+# "search" (results, channel and youtubei pages), "watch" (watch/Shorts
+# pages yt-dlp extracts) and "media" (thumbnails and video CDN). Callers
+# report every request back. Each success adds `increase` requests/s up to
+# the class's max rate; a throttling signal (HTTP 429/503, a consent or
+# /sorry/ captcha page, yt-dlp's "not a bot" errors) cuts the rate by
+# `decrease` down to the min rate and pauses the class for `backoff`
+# seconds, doubling per throttle in a row up to `max_backoff`, or for as
+# long as Retry-After asks. Throttles of requests already in flight during
+# a pause count once.
+
+ENDPOINTS = ("search", "watch", "media")
+MEDIA_HOSTS = ("ytimg.com", "googlevideo.com", "ggpht.com", "googleusercontent.com")
+SEARCH_PATHS = ("/results", "/youtubei/v1/search", "/youtubei/v1/browse", "/channel/", "/@", "/c/", "/user/")
+THROTTLE_RE = re.compile(r"http error 429|too many requests|not a bot|unusual traffic|captcha|"
+                         r"http error 503|try again later|rate.?limit", re.IGNORECASE)
+
+RATE_LIMITS = metrics.gauge("crawl_rate_limit", "Current requests/s allowed per endpoint class")
+RATE_BACKOFF = metrics.gauge("crawl_rate_backoff_seconds", "Length of the last throttling pause per endpoint class")
+REQUESTS_THROTTLED = metrics.counter("crawl_requests_throttled_total", "Throttling signals per endpoint class")
+
+
+class ThrottledError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds, from a Retry-After header
+
+
+def endpoint_class(url):
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if any(host == h or host.endswith("." + h) for h in MEDIA_HOSTS):
+        return "media"
+    if parsed.path.startswith(SEARCH_PATHS):
+        return "search"
+    return "watch"
+
+
+def is_throttle_message(message):
+    return bool(THROTTLE_RE.search(message or ""))
+
+
+def is_throttle_url(url):
+    # Where YouTube redirects a client it wants to slow down or verify
+    parsed = urlparse(url or "")
+    return parsed.netloc.lower().startswith("consent.") or parsed.path.startswith("/sorry")
+
+
+def retry_after_seconds(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None  # HTTP-date form, left to the default backoff
+
+
+class _Endpoint:
+    def __init__(self, rate, min_rate, max_rate, burst):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.bucket = TokenBucket(rate, burst)
+        self.strikes = 0  # throttles in a row
+        self.paused_until = 0.0
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rates, min_rates=None, max_rates=None, increase=0.05, decrease=0.5, backoff=30.0,
+                 max_backoff=900.0, jitter=0.0, burst=2):
+        self.increase = increase  # requests/s added per success
+        self.decrease = decrease  # rate factor per throttle
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter  # extra random 0..jitter seconds per request
+        self.burst = burst
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self.configure(rates, min_rates, max_rates)
+
+    def configure(self, rates, min_rates=None, max_rates=None, jitter=None):
+        # Also used by a running crawl; a class keeps its current rate when
+        # it still lies within the new bounds
+        with self._lock:
+            if jitter is not None:
+                self.jitter = jitter
+            for name in ENDPOINTS:
+                rate = rates.get(name, rates.get("default", 1.0))
+                low = min((min_rates or {}).get(name, rate), rate)
+                high = max((max_rates or {}).get(name, rate), rate)
+                endpoint = self._endpoints.get(name)
+                if endpoint is None:
+                    endpoint = self._endpoints[name] = _Endpoint(rate, low, high, self.burst)
+                endpoint.min_rate, endpoint.max_rate = low, high
+                if not low <= endpoint.bucket.rate <= high:
+                    endpoint.bucket.set_rate(rate)
+                RATE_LIMITS.set(endpoint.bucket.rate, endpoint=name)
+
+    def rate(self, endpoint):
+        return self._endpoints[endpoint].bucket.rate
+
+    def rates(self) -> dict:
+        return {name: round(e.bucket.rate, 3) for name, e in self._endpoints.items()}
+
+    def reserve(self, url, endpoint=None):
+        # Seconds the caller has to wait before its request
+        delay = self._endpoints[endpoint or endpoint_class(url)].bucket.reserve()
+        return delay + random.uniform(0, self.jitter) if self.jitter else delay
+
+    def wait(self, url, endpoint=None):
+        delay = self.reserve(url, endpoint)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def report(self, url, throttled=False, retry_after=None, endpoint=None):
+        name = endpoint or endpoint_class(url)
+        e = self._endpoints[name]
+        with self._lock:
+            now = time.monotonic()
+            if now < e.paused_until:
+                return  # sent before the pause began
+            if not throttled:
+                e.strikes = 0
+                if e.bucket.rate < e.max_rate:
+                    e.bucket.set_rate(min(e.max_rate, e.bucket.rate + self.increase))
+                    RATE_LIMITS.set(e.bucket.rate, endpoint=name)
+                return
+            e.strikes += 1
+            pause = min(self.max_backoff, self.backoff * 2 ** (e.strikes - 1))
+            if retry_after:
+                pause = max(pause, min(self.max_backoff, retry_after))
+            e.paused_until = now + pause
+            e.bucket.set_rate(max(e.min_rate, e.bucket.rate * self.decrease), pause=pause)
+        REQUESTS_THROTTLED.inc(endpoint=name)
+        RATE_LIMITS.set(e.bucket.rate, endpoint=name)
+        RATE_BACKOFF.set(pause, endpoint=name)
+        return pause
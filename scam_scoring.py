@@ -0,0 +1,137 @@
+from collections import namedtuple
+
+from keyword_matcher import KeywordMatcher
+
+# ==================================================
+# WEIGHTED SCAM SCORING
+# ==================================================
+# Replaces "any keyword anywhere" with a score per category. Keywords match
+# whole words only and fall into kinds: the lure itself (free crypto,
+# doublers, generators, prizes) weighs most; a bare asset name ("eth",
+# "coinbase"), a call to action, urgency, trust claims and vague hooks
+# weigh little, because legitimate Shorts use them all the time. Each
+# distinct keyword counts once, at the weight of the strongest field it
+# appears in (title > tags > description), and a lure of the category found
+# together with other kinds of signal is boosted by `co_occurrence_bonus`
+# per extra kind.
+# A category is matched when its score reaches `threshold`; every hit that
+# contributed is returned as evidence.
+#
+# A keyword listed under several categories ("giveaway", "generator", "link
+# in bio") says little about which scam it is, so it counts at
+# `shared_factor` of its weight and never triggers the co-occurrence bonus
+# on its own. A hit contained in a longer hit of the same
+# category ("bitcoin" inside "free bitcoin") is not counted separately.
+
+Evidence = namedtuple("Evidence", ["category", "keyword", "kind", "field", "weight"])
+ScamScore = namedtuple("ScamScore", ["categories", "scores", "evidence"])
+
+FIELD_WEIGHTS = {"title": 1.5, "tags": 1.0, "description": 0.75}
+KIND_WEIGHTS = {"lure": 1.5, "celebrity": 0.75, "action": 0.5, "urgency": 0.5, "trust": 0.5,
+                "hook": 0.5, "asset": 0.25}
+
+# Keywords that are not a scam promise on their own, by kind; every other
+# category keyword is a lure
+SIGNAL_KEYWORDS = {
+    "asset": [
+        "bitcoin", "btc", "ethereum", "eth", "crypto", "cryptocurrency", "altcoin", "dogecoin", "shiba",
+        "usdt", "usdc", "nft", "trust wallet", "metamask", "coinbase", "binance", "kraken", "ledger",
+        "trezor", "wallet connect", "psn code", "psn gift card", "xbox code", "xbox gift card", "steam code",
+        "steam gift card", "google play code", "amazon gift card", "itunes code", "robux code", "roblox gift",
+        "v-bucks", "vbucks", "fortnite code",
+    ],
+    "celebrity": ["elon musk", "vitalik buterin", "coinbase ceo", "binance ceo", "michael saylor", "cathie wood"],
+    "action": [
+        "click link", "link in bio", "link below", "check bio", "visit website", "visit link", "go to website",
+        "check description", "dm for details", "message me", "whatsapp me", "telegram group", "join channel",
+        "follow for more", "swipe up", "tap link", "go to", "tag friends", "share post", "comment below",
+        "must follow", "turn on notifications",
+    ],
+    "urgency": ["limited time", "act now", "hurry", "ends soon", "only today", "last chance", "24 hours",
+                "ending now", "limited slots"],
+    "trust": [
+        "legit", "not a scam", "verified", "trusted", "proven", "tested", "100% real", "not fake", "no scam",
+        "working 2024", "working 2025", "still working", "100% working", "proof", "screenshot proof",
+        "updated", "still active", "winners announced", "real giveaway", "legit giveaway",
+    ],
+    "hook": ["hack", "glitch", "trick", "method", "generate", "generating", "for free", "get free",
+             "distribution", "tokens", "passive income", "financial freedom",
+             # Pump hype: gym, stock and gaming Shorts say these too
+             "pump", "moonshot", "100x", "1000x", "to the moon", "next big coin", "hidden gem"],
+}
+
+
+def _outermost(matches):
+    # Drops matches lying inside a longer match of the same category
+    kept = []
+    max_end = {}
+    for m in sorted(matches, key=lambda m: (m.start, m.start - m.end)):
+        if m.end <= max_end.get(m.category, -1):
+            continue
+        max_end[m.category] = m.end
+        kept.append(m)
+    return kept
+
+
+class ScamScorer:
+    def __init__(self, keyword_sets: dict, threshold=2.0, co_occurrence_bonus=0.5, shared_factor=0.5,
+                 field_weights=None, kind_weights=None, signal_keywords=None, keyword_weights=None):
+        self.threshold = threshold
+        self.co_occurrence_bonus = co_occurrence_bonus
+        self.shared_factor = shared_factor
+        self.field_weights = dict(FIELD_WEIGHTS, **(field_weights or {}))
+        self.kind_weights = dict(KIND_WEIGHTS, **(kind_weights or {}))
+        self.keyword_weights = {k.lower(): w for k, w in (keyword_weights or {}).items()}  # per-keyword overrides
+        self.kinds = {k.lower(): kind for kind, keywords in (signal_keywords or SIGNAL_KEYWORDS).items()
+                      for k in keywords}
+        self.matcher = KeywordMatcher(keyword_sets)
+        listed = {}
+        for keywords in keyword_sets.values():
+            for k in {k.lower() for k in keywords}:
+                listed[k] = listed.get(k, 0) + 1
+        self.shared = {k for k, n in listed.items() if n > 1}
+
+    def kind(self, keyword):
+        return self.kinds.get(keyword, "lure")
+
+    def weight(self, keyword):
+        if keyword in self.keyword_weights:
+            return self.keyword_weights[keyword]
+        weight = self.kind_weights.get(self.kind(keyword), 1.0)
+        return weight * self.shared_factor if keyword in self.shared else weight
+
+    def score(self, title="", description="", tags=()) -> ScamScore:
+        # Strongest field per (category, keyword)
+        best = {}
+        fields = (("title", title), ("tags", "\n".join(t for t in tags or () if t)), ("description", description))
+        # Most videos have no keyword at all; one C-speed scan settles those
+        if not self.matcher.matches("\n".join(text or "" for _, text in fields)):
+            return ScamScore([], {}, [])
+        for field, text in fields:
+            factor = self.field_weights.get(field, 1.0)
+            for m in _outermost(self.matcher.finditer(text, whole_words=True)):
+                key = (m.category, m.keyword)
+                if factor > best.get(key, (None, 0.0))[1]:
+                    best[key] = (field, factor)
+        totals = {}
+        kinds = {}
+        own_lure = set()
+        evidence = []
+        for (category, keyword), (field, factor) in best.items():
+            weight = self.weight(keyword) * factor
+            kind = self.kind(keyword)
+            totals[category] = totals.get(category, 0.0) + weight
+            kinds.setdefault(category, set()).add(kind)
+            if kind == "lure" and keyword not in self.shared:
+                own_lure.add(category)
+            evidence.append(Evidence(category, keyword, kind, field, round(weight, 3)))
+        scores = {}
+        for category, total in totals.items():
+            if category in own_lure:
+                total *= 1 + self.co_occurrence_bonus * (len(kinds[category]) - 1)
+            scores[category] = round(total, 3)
+        order = self.matcher.categories
+        matched = sorted((c for c, s in scores.items() if s >= self.threshold),
+                         key=lambda c: (-scores[c], order.index(c)))
+        evidence.sort(key=lambda e: (e.category, -e.weight, e.keyword))
+        return ScamScore(matched, scores, evidence)
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from crawl_frontier import CrawlFrontier, channel_score, DAY
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    frontier = CrawlFrontier(str(tmp_path / "frontier.sqlite3"))
+    yield frontier
+    frontier.close()
+
+
+def crawl_search(frontier, query, videos):
+    url = f"search:{query}"
+    frontier.schedule_search(url, query, 0.5)
+    assert frontier.next_page()[0] == url
+    for video_id, status, reason in videos:
+        frontier.mark_video_queued(video_id, f"https://www.youtube.com/shorts/{video_id}", url)
+        frontier.record_video(video_id, status, reason)
+    frontier.finish_page(url, len(videos))
+    frontier.record_query_crawl(query, len(videos), 30.0)
+    return url
+
+
+def test_query_stats_count_new_prefiltered_evaluated_and_hits(frontier):
+    crawl_search(frontier, "free bitcoin", [
+        ("aaaaaaaaaaa", "saved", None),
+        ("bbbbbbbbbbb", "filtered", "prefilter:views"),
+        ("ccccccccccc", "filtered", "score"),
+    ])
+    s = frontier.query_stats()["free bitcoin"]
+    assert (s.crawls, s.links, s.new, s.prefiltered, s.evaluated, s.hits) == (1, 3, 3, 1, 2, 1)
+    assert s.reasons == {"score": 1}
+    assert s.seconds == 30.0
+
+
+def test_retired_searches_keep_their_stats_and_come_back(frontier):
+    crawl_search(frontier, "free bitcoin", [("aaaaaaaaaaa", "saved", None)])
+    frontier.schedule_search("search:gift card", "gift card", 0.5)
+    assert frontier.retire_searches(["free bitcoin"]) == ["search:gift card"]
+    assert frontier.pending_searches() == 0
+    assert frontier.query_stats()["free bitcoin"].hits == 1
+    assert frontier.next_page() is None
+    # Listed again: queued again, without starting a new pass
+    assert frontier.schedule_search("search:gift card", "gift card", 0.7)
+    assert not frontier.schedule_search("search:free bitcoin", "free bitcoin", 0.5)
+    assert frontier.next_page()[0] == "search:gift card"
+
+
+def test_new_pass_queues_crawled_searches_in_priority_order(frontier):
+    crawl_search(frontier, "free bitcoin", [])
+    crawl_search(frontier, "gift card", [])
+    assert frontier.schedule_search("search:free bitcoin", "free bitcoin", 0.2, repeat=True)
+    assert frontier.schedule_search("search:gift card", "gift card", 0.9, repeat=True)
+    assert [frontier.next_page()[0] for _ in range(2)] == ["search:gift card", "search:free bitcoin"]
+    assert frontier.query_stats()["gift card"].crawls == 1
+
+
+def test_pages_leased_elsewhere_are_credited_to_their_query(frontier):
+    # a search another host seeded has no local row until it is leased here
+    frontier.take_page("search:gift card", "search", "gift card")
+    assert frontier.page_counts() == {"active": 1}
+    assert frontier.next_page() is None
+    frontier.mark_video_queued("aaaaaaaaaaa", "https://www.youtube.com/shorts/aaaaaaaaaaa", "search:gift card")
+    frontier.record_video("aaaaaaaaaaa", "saved")
+    frontier.finish_page("search:gift card", 1)
+    stats = frontier.query_stats()["gift card"]
+    assert (stats.new, stats.evaluated, stats.hits) == (1, 1, 1)
+    # leased again in a later pass: the existing row becomes active again
+    frontier.take_page("search:gift card", "search", "gift card")
+    assert frontier.page_counts() == {"active": 1}
+
+
+def test_channel_score():
+    now = 1_000_000_000
+    fresh = channel_score(1, 1, now, None, now)
+    assert fresh == pytest.approx(2 / 3)
+    assert channel_score(1, 1, now - 7 * DAY, None, now) == pytest.approx(fresh / 2)
+    assert channel_score(1, 5, now, None, now) < fresh
+    assert channel_score(1, 1, None, None, now) == 0.0
+    # Fully evaluated channel pages are not worth crawling again
+    assert channel_score(3, 30, now, 30, now) == 0.0
+
+
+def test_videos_filtered_by_earlier_runs_are_not_seen_in_this_run(frontier):
+    for video_id, status in (("aaaaaaaaaaa", "filtered"), ("bbbbbbbbbbb", "saved")):
+        frontier.mark_video_queued(video_id, f"https://www.youtube.com/shorts/{video_id}")
+        frontier.record_video(video_id, status, "views" if status == "filtered" else None)
+    run_started = time.time() + 1
+    assert frontier.seen_video("aaaaaaaaaaa")
+    assert not frontier.seen_video("aaaaaaaaaaa", filtered_since=run_started)
+    assert frontier.seen_video("bbbbbbbbbbb", filtered_since=run_started)
+    assert not frontier.seen_video("ccccccccccc", filtered_since=run_started)
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+import video_crawler_multi as engine
+from crawler_config import ConfigError, ConfigWatcher, read_file, check_settings, load_config
+
+GLOBALS = ("CATEGORIES", "KEYWORD_WEIGHTS", "KEYWORD_KINDS", "SCORER", "KEYWORD_MATCHER")
+
+
+@pytest.fixture
+def restore_engine():
+    saved = {name: getattr(engine, name) for name in list(engine.DEFAULT_SETTINGS) + list(GLOBALS)}
+    yield
+    for name, value in saved.items():
+        setattr(engine, name, value)
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_lowercase_keys_map_onto_the_engine_settings():
+    assert check_settings({"max_videos": 10, "MAX_VIEW_COUNT": 5}, engine.DEFAULT_SETTINGS) == {
+        "MAX_VIDEOS": 10, "MAX_VIEW_COUNT": 5}
+
+
+def test_every_bad_value_is_reported_at_once(tmp_path):
+    path = write(tmp_path / "bad.toml", 'max_videos = "lots"\nscroll_rounds = -1\nmax_vidoes = 3\n'
+                                        'discovery_mode = "ftp"\nendpoint_rates = { search = "fast" }\n')
+    with pytest.raises(ConfigError) as e:
+        engine.load_profile(path)
+    message = str(e.value)
+    assert "max_videos: expected int, got str 'lots'" in message
+    assert "scroll_rounds: must not be negative" in message
+    assert "unknown setting 'max_vidoes'" in message
+    assert "discovery_mode: expected one of 'selenium', 'http'" in message
+    assert "endpoint_rates: expected non-negative numbers for search" in message
+
+
+def test_unreadable_files(tmp_path):
+    with pytest.raises(ConfigError, match="expected a table, got list"):
+        read_file(write(tmp_path / "list.yaml", "- max_videos\n"))
+    with pytest.raises(ConfigError, match="bad.toml"):
+        read_file(write(tmp_path / "bad.toml", "max_videos = \n"))
+    with pytest.raises(ConfigError, match="unknown format"):
+        read_file(write(tmp_path / "profile.ini", "[x]\n"))
+    assert read_file(write(tmp_path / "empty.yaml", "")) == {}
+
+
+def test_keyword_packs_extend_replace_and_add_categories(tmp_path):
+    write(tmp_path / "pack.yaml", "crypto:\n  extend: true\n  queries: [usdt mining app]\n"
+                                  "  keyword_weights: {airdrop: 0.75}\n  kinds: {asset: [usdt]}\n"
+                                  "giftcard:\n  queries: [only this]\n"
+                                  "recovery:\n  scam_type: Crypto Recovery Scam\n  keywords: [recover stolen crypto]\n")
+    config = engine.load_profile(write(tmp_path / "profile.toml", 'keyword_packs = ["pack.yaml"]\n'))
+    crypto = config.categories["crypto"]
+    assert crypto["queries"][-1] == "usdt mining app"
+    assert crypto["queries"][:-1] == engine.DEFAULT_CATEGORIES["crypto"]["queries"]
+    assert config.categories["giftcard"]["queries"] == ["only this"]
+    assert config.categories["recovery"]["folder"] == "youtube_shorts_recovery"
+    assert config.keyword_weights == {"airdrop": 0.75}
+    assert config.kinds == {"asset": ["usdt"]}
+    assert set(config.files) == {str(tmp_path / "profile.toml"), os.path.join(str(tmp_path), "pack.yaml")}
+
+
+def test_bad_packs(tmp_path):
+    write(tmp_path / "pack.yaml", "scams:\n  queries: [x]\ncrypto:\n  kinds: {mood: [x]}\n  folder: ../up\n")
+    with pytest.raises(ConfigError) as e:
+        engine.load_profile(write(tmp_path / "profile.yaml", "keyword_packs: [pack.yaml]\n"))
+    assert "crypto.kinds: unknown kind 'mood'" in str(e.value)
+    assert "crypto.folder: must be a plain folder name" in str(e.value)
+    write(tmp_path / "pack.yaml", "scams:\n  queries: [x]\n")
+    with pytest.raises(ConfigError, match="scams: a new category needs a scam_type"):
+        engine.load_profile(str(tmp_path / "profile.yaml"))
+
+
+def test_reload_applies_live_settings_and_defers_the_rest(tmp_path, restore_engine):
+    path = write(tmp_path / "profile.toml", f'output_dir = "{tmp_path.as_posix()}/out"\nmax_videos = 10\n')
+    applied, pending = engine.apply_profile(engine.load_profile(path))
+    assert {"OUTPUT_DIR", "MAX_VIDEOS", "FRONTIER_PATH"} <= set(applied) and pending == []
+    assert engine.FRONTIER_PATH == os.path.join(f"{tmp_path.as_posix()}/out", "crawl_frontier.sqlite3")
+    assert engine.MAX_VIDEOS == 10
+    # A live reload: only LIVE_SETTINGS change, the others wait for a restart
+    write(tmp_path / "profile.toml", f'output_dir = "{tmp_path.as_posix()}/out"\nmax_videos = 20\n'
+                                     'metadata_sink = "jsonl"\n')
+    applied, pending = engine.apply_profile(engine.load_profile(path), engine.LIVE_SETTINGS)
+    assert applied == ["MAX_VIDEOS"] and pending == ["METADATA_SINK"]
+    assert engine.MAX_VIDEOS == 20 and engine.METADATA_SINK == engine.DEFAULT_SETTINGS["METADATA_SINK"]
+
+
+def test_reloaded_keywords_recompile_the_scorer(tmp_path, restore_engine):
+    write(tmp_path / "pack.yaml", "crypto:\n  extend: true\n  keywords: [zorp coin]\n")
+    path = write(tmp_path / "profile.toml", 'keyword_packs = ["pack.yaml"]\n')
+    assert engine.SCORER.score(title="zorp coin").categories == []
+    applied, _ = engine.apply_profile(engine.load_profile(path), engine.LIVE_SETTINGS)
+    assert applied == ["categories"]
+    assert engine.SCORER.score(title="zorp coin").categories == ["crypto"]
+    assert engine.KEYWORD_MATCHER.matches("ZORP COIN")
+
+
+def test_watcher_reloads_good_edits_and_keeps_the_last_good_config(tmp_path):
+    path = write(tmp_path / "profile.toml", "max_videos = 10\n")
+    loaded = []
+    load = lambda: load_config(path, engine.DEFAULT_SETTINGS, {}, engine.KIND_WEIGHTS)
+    watcher = ConfigWatcher(load, load().files, loaded.append)
+    assert not watcher.check()
+    write(tmp_path / "profile.toml", "max_videos = 200\n")
+    assert watcher.check()
+    assert loaded[-1].settings == {"MAX_VIDEOS": 200}
+    write(tmp_path / "profile.toml", "max_videos = -5000\n")
+    assert not watcher.check()
+    assert len(loaded) == 1
+    assert not watcher.check()  # not retried until written again
@@ -0,0 +1,124 @@
+import os
+import threading
+
+import pytest
+
+from download_manager import DownloadManager, DownloadCancelled
+
+
+class FakeYDL:
+    # Stands in for yt_dlp.YoutubeDL: fails the first `failures` calls, then
+    # writes youtube_<id>.mp4 into its folder.
+    def __init__(self, folder, cancelled, failures=0, gate=None):
+        self.folder = folder
+        self.cancelled = cancelled
+        self.failures = failures
+        self.gate = gate
+        self.calls = []
+
+    def download(self, urls):
+        self.calls.append(urls[0])
+        if self.gate:
+            self.gate.wait(5)
+        if self.cancelled.is_set():
+            raise DownloadCancelled("download cancelled")  # as the progress hook does
+        if len(self.calls) <= self.failures:
+            raise RuntimeError("HTTP Error 500")
+        video_id = urls[0].rsplit("/", 1)[-1]
+        with open(os.path.join(self.folder, f"youtube_{video_id}.mp4"), "wb") as f:
+            f.write(b"video")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def manager(tmp_path):
+    managers = []
+
+    def make(failures=0, gate=None, **kwargs):
+        kwargs.setdefault("retry_backoff", 0.01)
+        m = DownloadManager(str(tmp_path / "downloads.sqlite3"), workers=1, **kwargs)
+        m.ydl = FakeYDL(str(tmp_path / "videos"), m.cancelled, failures, gate)
+        m._downloader = lambda folder: m.ydl
+        managers.append(m)
+        return m
+    yield make
+    for m in managers:
+        m.close(cancel=True)
+
+
+def paths(tmp_path, video_id):
+    return [str(tmp_path / "videos" / f"youtube_{video_id}.mp4"), str(tmp_path / "copy" / f"youtube_{video_id}.mp4")]
+
+
+def test_download_is_linked_to_every_path(manager, tmp_path):
+    done = []
+    m = manager(on_done=lambda job, path: done.append(path)).start()
+    assert m.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"))
+    m.close(timeout=10)
+    assert all(os.path.exists(p) for p in paths(tmp_path, "aaaaaaaaaaa"))
+    assert m.status("aaaaaaaaaaa")["status"] == "done"
+    assert done == [paths(tmp_path, "aaaaaaaaaaa")[0]]
+    assert not m.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"))
+
+
+def test_errors_are_retried_with_backoff_until_they_succeed(manager, tmp_path):
+    m = manager(failures=2, max_retries=3).start()
+    m.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"))
+    m.close(timeout=10)
+    assert len(m.ydl.calls) == 3
+    assert m.status("aaaaaaaaaaa")["status"] == "done"
+    assert m.status("aaaaaaaaaaa")["attempts"] == 3
+
+
+def test_job_fails_after_max_retries(manager, tmp_path):
+    m = manager(failures=10, max_retries=3).start()
+    m.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"))
+    m.close(timeout=10)
+    state = m.status("aaaaaaaaaaa")
+    assert len(m.ydl.calls) == 3
+    assert (state["status"], state["attempts"]) == ("failed", 3)
+    assert "HTTP Error 500" in state["error"]
+    assert m.pending == 0
+
+
+def test_unfinished_jobs_are_resumed_by_the_next_run(manager, tmp_path):
+    gate = threading.Event()
+    first = manager(gate=gate).start()
+    first.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"))
+    first.submit("bbbbbbbbbbb", "https://x/bbbbbbbbbbb", paths(tmp_path, "bbbbbbbbbbb"))
+    # stop while the first job is downloading and the second still queued
+    first.cancelled.set()
+    gate.set()
+    first.close(cancel=True)
+    assert {first.status(v)["status"] for v in ("aaaaaaaaaaa", "bbbbbbbbbbb")} <= {"queued", "downloading"}
+
+    second = manager().start()
+    second.close(timeout=10)
+    assert second.status_counts() == {"done": 2}
+    assert sorted(second.ydl.calls) == ["https://x/aaaaaaaaaaa", "https://x/bbbbbbbbbbb"]
+
+
+def test_held_jobs_wait_for_release_or_skip(manager, tmp_path):
+    m = manager().start()
+    m.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"), hold=True)
+    m.submit("bbbbbbbbbbb", "https://x/bbbbbbbbbbb", paths(tmp_path, "bbbbbbbbbbb"), hold=True)
+    assert m.held() == ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+    assert not m.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"))
+    assert m.release("aaaaaaaaaaa")
+    m.skip("bbbbbbbbbbb")
+    assert not m.release("bbbbbbbbbbb")
+    m.close(timeout=10)
+    assert m.status_counts() == {"done": 1, "skipped": 1}
+    assert m.ydl.calls == ["https://x/aaaaaaaaaaa"]
+
+
+def test_should_download_false_skips_the_job(manager, tmp_path):
+    m = manager(should_download=lambda job: job.video_id != "bbbbbbbbbbb").start()
+    m.submit("aaaaaaaaaaa", "https://x/aaaaaaaaaaa", paths(tmp_path, "aaaaaaaaaaa"))
+    m.submit("bbbbbbbbbbb", "https://x/bbbbbbbbbbb", paths(tmp_path, "bbbbbbbbbbb"))
+    m.close(timeout=10)
+    assert m.status("aaaaaaaaaaa")["status"] == "done"
+    assert m.status("bbbbbbbbbbb")["status"] == "skipped"
+    assert m.ydl.calls == ["https://x/aaaaaaaaaaa"]
@@ -0,0 +1,96 @@
+import threading
+
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.crashed = False
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if self.crashed:
+            raise ConnectionError("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(work, **kwargs):
+    drivers = []
+
+    def create():
+        drivers.append(FakeDriver(len(drivers) + 1))
+        return drivers[-1]
+
+    errors = []
+    pool = DriverPool(create, work, on_error=lambda job, e: errors.append((job, str(e))), restart_delay=0, **kwargs)
+    return pool, drivers, errors
+
+
+def test_crashed_browser_is_restarted_and_the_page_retried():
+    done = []
+
+    def work(driver, job):
+        if job == "crash" and driver.number == 1:
+            driver.crashed = True
+            raise ConnectionError("chrome not reachable")
+        done.append((job, driver.number))
+
+    pool, drivers, errors = make_pool(work, size=1)
+    pool.start()
+    for job in ("a", "crash", "b"):
+        pool.submit(job)
+    pool.close()
+    assert done == [("a", 1), ("crash", 2), ("b", 2)]
+    assert pool.restarts == 1 and errors == []
+    assert drivers[0].quit_called and drivers[1].quit_called
+
+
+def test_page_errors_on_a_healthy_browser_are_not_retried():
+    calls = []
+
+    def work(driver, job):
+        calls.append(job)
+        raise ValueError("no results")
+
+    pool, drivers, errors = make_pool(work, size=1)
+    pool.start()
+    pool.submit("a")
+    pool.close()
+    assert calls == ["a"]
+    assert errors == [("a", "no results")]
+    assert len(drivers) == 1 and pool.restarts == 0
+
+
+def test_drivers_are_recycled_after_recycle_after_pages():
+    used = []
+    pool, drivers, errors = make_pool(lambda driver, job: used.append(driver.number), size=1, recycle_after=2)
+    pool.start()
+    for job in range(5):
+        pool.submit(job)
+    pool.close()
+    assert used == [1, 1, 2, 2, 3]
+    assert all(d.quit_called for d in drivers)
+
+
+def test_browsers_work_in_parallel_and_submit_waits_for_a_free_one():
+    gate, running = threading.Event(), threading.Event()
+    both = threading.Barrier(2, action=running.set, timeout=5)
+
+    def work(driver, job):
+        both.wait()  # only passes once both browsers hold a page
+        gate.wait(5)
+
+    pool, drivers, errors = make_pool(work, size=2)
+    pool.start()
+    assert pool.submit("a") and pool.submit("b")
+    assert running.wait(5)
+    pool.cancelled.set()
+    assert not pool.submit("c")  # no free browser; gives up once cancelled
+    pool.cancelled.clear()
+    gate.set()
+    pool.close()
+    assert errors == [] and len(drivers) == 2 and pool.busy == 0
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from engagement_tracker import DAY, EngagementTracker, refresh_interval, unavailable_status
+
+HOUR = 3600
+MIN, MAX = 6 * HOUR, 30 * DAY
+
+
+@pytest.mark.parametrize("age_days, growth, expected", [
+    (None, 0.0, MIN),  # unknown age
+    (1, 0.0, MIN),  # first two days after upload
+    (10, 0.0, 5 * MIN),  # then linear in age
+    (10, 0.02, 5 * MIN / 2),
+    (10, 0.1, 5 * MIN / 4),
+    (10, 0.5, MIN),
+    (400, 0.0, MAX),  # clamped to max_interval
+    (400, 0.1, 200 * MIN / 4),
+    (3, 0.5, MIN),
+    (2.5, 0.1, MIN),  # never below min_interval
+])
+def test_refresh_interval(age_days, growth, expected):
+    assert refresh_interval(age_days, growth, MIN, MAX) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("ERROR: [youtube] abc: Video unavailable. This video has been removed by the uploader", "removed"),
+    ("ERROR: [youtube] abc: This video has been removed for violating YouTube's Terms of Service", "removed"),
+    ("ERROR: [youtube] abc: Private video. Sign in if you've been granted access", "private"),
+    ("ERROR: [youtube] abc: Video unavailable", "unavailable"),
+    ("ERROR: [youtube] abc: Video unavailable. This content isn't available, try again later.", None),
+    ("ERROR: [youtube] abc: Sign in to confirm you're not a bot", None),
+    ("ERROR: unable to download webpage: HTTP Error 429: Too Many Requests", None),
+    ("ERROR: [youtube] abc: Read timed out", None),
+    ("", None),
+    (None, None),
+])
+def test_unavailable_status(message, expected):
+    assert unavailable_status(message) == expected
+
+
+def record(video_id, views, age_days, scraped_at):
+    upload = time.strftime("%Y%m%d", time.localtime(scraped_at - age_days * DAY))
+    return {"video_id": video_id, "video_url": f"https://www.youtube.com/shorts/{video_id}", "view_count": views,
+            "upload_date": upload, "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(scraped_at))}
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    t = EngagementTracker(str(tmp_path / "engagement.sqlite3"), min_interval_hours=6, max_interval_days=30)
+    yield t
+    t.close()
+
+
+def next_check(tracker, video_id):
+    return tracker._execute("SELECT next_check_at FROM refresh_videos WHERE video_id = ?", (video_id,))[0][0]
+
+
+def test_import_schedules_by_age_and_keeps_one_row_per_video(tracker):
+    now = time.time() // 60 * 60
+    assert tracker.import_record("crypto", record("new", 500, 1, now))
+    assert tracker.import_record("crypto", record("old", 500, 100, now))
+    assert not tracker.import_record("giveaway", record("new", 500, 1, now))
+    assert next_check(tracker, "new") - now == pytest.approx(MIN)
+    assert next_check(tracker, "old") - now > 10 * MIN
+    assert tracker.due(now=now + MIN + 1) == [("new", "https://www.youtube.com/shorts/new", ["crypto", "giveaway"])]
+
+
+def test_fast_growth_shortens_the_next_check(tracker):
+    now = time.time() // 60 * 60
+    tracker.import_record("crypto", record("flat", 1000, 100, now))
+    tracker.import_record("crypto", record("viral", 1000, 100, now))
+    later = now + DAY
+    tracker.record_check("flat", "live", view_count=1001, now=later)
+    tracker.record_check("viral", "live", view_count=2000, now=later)
+    assert next_check(tracker, "viral") - later == pytest.approx(MIN)
+    # 101 days old (upload dates count from midnight): about age / 2 * min_interval
+    assert 50 * MIN <= next_check(tracker, "flat") - later <= 51 * MIN
+    assert tracker.fastest_growing(1)[0][0] == "viral"
+
+
+def test_gone_videos_and_failures(tracker):
+    now = time.time() // 60 * 60
+    for video_id in ("removed", "private", "flaky"):
+        tracker.import_record("crypto", record(video_id, 10, 1, now))
+    assert tracker.record_check("removed", "removed", now=now + 1) == "live"
+    assert tracker.record_check("private", "private", now=now + 1) == "live"
+    assert next_check(tracker, "private") == now + 1 + MAX
+    tracker.record_failure("flaky", now=now + 1)
+    tracker.record_failure("flaky", now=now + 2)
+    assert next_check(tracker, "flaky") == now + 2 + 2 * MIN  # backs off, status untouched
+    assert tracker.status_counts() == {"live": 1, "removed": 1, "private": 1}
+    # a removed video is never due again, a private one is after max_interval
+    assert [row[0] for row in tracker.due(now=now + 2 * MAX)] == ["flaky", "private"]
+    assert [status for _, status, *_ in tracker.history("removed")] == ["live", "removed"]
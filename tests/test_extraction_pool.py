@@ -0,0 +1,94 @@
+import threading
+
+from extraction_pool import ExtractionPool
+from rate_limiter import ThrottledError
+
+
+def collect():
+    results = {}
+    return results, lambda url, result: results.__setitem__(url, result)
+
+
+def test_every_url_reaches_on_result():
+    results, on_result = collect()
+    pool = ExtractionPool(lambda url: url.upper(), on_result, workers=3, queue_size=2).start()
+    for i in range(20):
+        pool.submit(f"u{i}")
+    pool.close()
+    assert results == {f"u{i}": f"U{i}" for i in range(20)}
+    assert pool.pending == 0
+
+
+def test_errors_and_repeated_throttling_give_none():
+    calls = []
+
+    def extract(url):
+        calls.append(url)
+        if url == "throttled":
+            raise ThrottledError("HTTP Error 429")
+        if url == "broken":
+            raise ValueError("bad JSON")
+        return url
+
+    results, on_result = collect()
+    pool = ExtractionPool(extract, on_result, workers=1, throttle_retries=2).start()
+    for url in ("ok", "throttled", "broken"):
+        pool.submit(url)
+    pool.close()
+    assert results == {"ok": "ok", "throttled": None, "broken": None}
+    assert calls.count("throttled") == 3 and calls.count("broken") == 1
+
+
+def test_resize_adds_and_stops_workers():
+    running, lock = set(), threading.Lock()
+    gate, all_busy = threading.Event(), threading.Event()
+
+    def extract(url):
+        with lock:
+            running.add(threading.current_thread().name)
+            if len(running) == 4:
+                all_busy.set()
+        gate.wait(5)
+        with lock:
+            running.discard(threading.current_thread().name)
+        return url
+
+    results, on_result = collect()
+    pool = ExtractionPool(extract, on_result, workers=1).start()
+    pool.resize(4)
+    assert len(pool._workers) == 4
+    for i in range(4):
+        pool.submit(f"u{i}")
+    assert all_busy.wait(5)  # four URLs extracted at once
+    gate.set()
+    pool.resize(2)
+    assert len(pool._workers) == 2 and len(pool._retired) == 2
+    for i in range(4, 8):
+        pool.submit(f"u{i}")
+    pool.close()
+    assert len(results) == 8
+    assert not any(t.is_alive() for t in pool._retired)
+
+
+def test_cancelled_close_drops_queued_urls():
+    gate = threading.Event()
+    started = threading.Event()
+
+    def extract(url):
+        started.set()
+        gate.wait(5)
+        return url
+
+    results, on_result = collect()
+    pool = ExtractionPool(extract, on_result, workers=1, queue_size=10).start()
+    for i in range(5):
+        pool.submit(f"u{i}")
+    started.wait(5)
+    closer = threading.Thread(target=pool.close, kwargs={"cancel": True})
+    closer.start()
+    gate.set()
+    closer.join(5)
+    assert not closer.is_alive()
+    assert results == {}
+    assert pool.pending == 0
+    assert not pool.submit("late")
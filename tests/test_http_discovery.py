@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from benchmarks.youtube_stub_server import FIXTURES, start_server
+from http_discovery import HttpDiscovery, HttpDiscoveryError, parse_initial_data, parse_results, parse_ytcfg
+
+SEARCH = "https://www.youtube.com/results?search_query=free+bitcoin&sp=EgIYAQ%3D%3D"
+FIRST_PAGE = ["fxBTC00001a", "fxBTC00002b", "fxCAT00003c", "fxGFT00004d", "fxLNG00005e", "fxSHF00006f", "fxSHF00007g"]
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_search_page_is_parsed_from_yt_initial_data():
+    html = fixture("search_results.html")
+    candidates, token = parse_results(parse_initial_data(html))
+    assert [raw["video_id"] for raw in candidates] == FIRST_PAGE
+    assert token == "search-cont-1"
+    assert candidates[0] == {
+        "video_id": "fxBTC00001a", "href": "https://www.youtube.com/shorts/fxBTC00001a",
+        "title": "FREE BTC giveaway 🚀 send 0.1 get 1 back", "label": "", "views": "1.2K views", "duration": "0:42",
+    }
+    assert parse_ytcfg(html)["INNERTUBE_API_KEY"]
+
+
+def test_page_without_initial_data_is_an_error():
+    with pytest.raises(HttpDiscoveryError):
+        parse_initial_data(fixture("consent.html"))
+
+
+@pytest.fixture
+def stub_server():
+    server = start_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def crawl(base_url, page, **kwargs):
+    results = {}
+
+    def work(client, job):
+        try:
+            results[job] = [raw["video_id"] for raw in client.iter_candidates(job, **kwargs)]
+        except HttpDiscoveryError as e:
+            results[job] = e
+
+    client = HttpDiscovery(work, workers=1, base_url=base_url).start()
+    try:
+        client.submit(page)
+    finally:
+        client.close()
+    return results[page]
+
+
+def test_continuations_are_followed_and_deduplicated(stub_server):
+    # search-cont-1 repeats fxBTC00001a; search-cont-2 has no further token
+    assert crawl(stub_server, SEARCH) == FIRST_PAGE + ["fxBTC00008h", "fxGFT00009i", "fxGVW00010j"]
+
+
+def test_continuation_limit_per_page(stub_server):
+    assert crawl(stub_server, SEARCH, max_continuations=1) == FIRST_PAGE + ["fxBTC00008h", "fxGFT00009i"]
+    assert crawl(stub_server, SEARCH, max_continuations=0) == FIRST_PAGE
+
+
+def test_consent_wall_raises_for_the_browser_fallback(stub_server):
+    page = "https://www.youtube.com/results?search_query=consent+wall&sp=EgIYAQ%3D%3D"
+    assert isinstance(crawl(stub_server, page), HttpDiscoveryError)
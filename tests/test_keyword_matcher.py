@@ -0,0 +1,59 @@
+import random
+
+from keyword_matcher import KeywordMatcher
+
+KEYWORDS = {
+    "crypto": ["free bitcoin", "bitcoin", "eth", "double your", "coin"],
+    "giftcard": ["gift card", "card", "free robux", "robux"],
+    "giveaway": ["giveaway", "free", "free iphone", "give"],
+}
+
+
+def brute_force(keyword_sets, text, whole_words=False):
+    lowered = text.lower()
+    found = set()
+    for category, keywords in keyword_sets.items():
+        for keyword in {k.lower() for k in keywords}:
+            start = lowered.find(keyword)
+            while start != -1:
+                end = start + len(keyword)
+                before = lowered[start - 1] if start else ""
+                after = lowered[end] if end < len(lowered) else ""
+                word = lambda c: c.isalnum() or c == "_"
+                if not whole_words or not ((keyword[0].isalnum() and before and word(before))
+                                           or (keyword[-1].isalnum() and after and word(after))):
+                    found.add((keyword, category, start, end))
+                start = lowered.find(keyword, start + 1)
+    return found
+
+
+def random_text(rng):
+    pieces = [k for keywords in KEYWORDS.values() for k in keywords] + ["x", "_", " ", "-", "method", "COIN", "Free"]
+    return "".join(rng.choice(pieces) + rng.choice(["", " ", "", "!"]) for _ in range(rng.randint(0, 12)))
+
+
+def test_matches_agree_with_brute_force():
+    matcher = KeywordMatcher(KEYWORDS)
+    rng = random.Random(7)
+    for _ in range(500):
+        text = random_text(rng)
+        for whole_words in (False, True):
+            assert set(matcher.finditer(text, whole_words)) == brute_force(KEYWORDS, text, whole_words), text
+        found = {category for _, category, _, _ in brute_force(KEYWORDS, text)}
+        assert matcher.matches(text) == bool(found)
+        assert matcher.matched_categories(text) == [c for c in KEYWORDS if c in found]
+
+
+def test_whole_words():
+    matcher = KeywordMatcher({"crypto": ["eth"]})
+    assert not list(matcher.finditer("a new method", whole_words=True))
+    assert matcher.find_all("a new method")
+    assert [m.start for m in matcher.finditer("ETH, eth_x and eth", whole_words=True)] == [0, 15]
+
+
+def test_categories_keep_their_order_and_duplicates_compile_once():
+    matcher = KeywordMatcher({"a": ["Card", "card", ""], "b": ["card"]})
+    assert len(matcher) == 2
+    assert matcher.matched_categories("GIFT CARD") == ["a", "b"]
+    assert matcher.matches("a card") and not matcher.matches("nothing here")
+    assert not matcher.matches("")
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from media_dedup import BKTree, MediaDeduplicator, dhash, hamming
+
+
+def flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_dhash_sets_a_bit_where_brightness_increases():
+    rising = bytes(col * 10 for _ in range(8) for col in range(9))
+    assert dhash(rising) == 2 ** 64 - 1
+    assert dhash(bytes(reversed(rising))) == 0
+    assert dhash(bytes(72)) == 0
+    assert hamming(dhash(rising), 0) == 64
+
+
+def test_bk_tree_search_matches_a_linear_scan():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    values += [flip(values[0], range(i)) for i in range(1, 12)]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    tree.add(values[3], "again")
+    assert tree.size == len(values) + 1
+    for probe in (values[0], values[3], rng.getrandbits(64)):
+        for radius in (0, 4, 10):
+            expected = sorted((hamming(probe, v), i) for i, v in enumerate(values) if hamming(probe, v) <= radius)
+            if probe == values[3]:
+                expected.append((0, "again"))
+            assert sorted(tree.search(probe, radius), key=str) == sorted(expected, key=str)
+
+
+@pytest.fixture
+def dedup(tmp_path):
+    d = MediaDeduplicator(str(tmp_path / "media.sqlite3"), frame_distance=10, min_frame_share=0.5, thumb_distance=4)
+    yield d
+    d.close()
+
+
+def index_frames(dedup, video_id, hashes):
+    dedup.add_video(video_id)
+    for value in hashes:
+        dedup.frames.add(value, video_id)
+
+
+def test_frames_within_the_distance_threshold_match(dedup):
+    rng = random.Random(1)
+    original = [rng.getrandbits(64) for _ in range(8)]
+    index_frames(dedup, "original", original)
+    # every frame 10 bits away: still the same clip
+    assert dedup.match_frames("reupload", [flip(h, range(10)) for h in original]) == ("original", 10)
+    # 11 bits is past frame_distance
+    assert dedup.match_frames("other", [flip(h, range(11)) for h in original]) == (None, None)
+
+
+def test_most_frames_must_match(dedup):
+    rng = random.Random(2)
+    original = [rng.getrandbits(64) for _ in range(8)]
+    index_frames(dedup, "original", original)
+    half = original[:4] + [rng.getrandbits(64) for _ in range(4)]
+    assert dedup.match_frames("half", half) == ("original", 0)
+    fewer = original[:3] + [rng.getrandbits(64) for _ in range(5)]
+    assert dedup.match_frames("fewer", fewer) == (None, None)
+
+
+def test_matches_resolve_to_the_cluster_canonical(dedup):
+    rng = random.Random(3)
+    original = [rng.getrandbits(64) for _ in range(4)]
+    index_frames(dedup, "original", original)
+    index_frames(dedup, "copy", original)
+    dedup.link("copy", "original")
+    assert dedup.canonical("copy") == "original"
+    assert dedup.match_frames("third", [flip(h, [0]) for h in original])[0] == "original"
+    assert dedup.duplicate_count() == 1
+    assert dedup.cluster_count() == 1
+
+
+def test_thumbnail_match_links_to_the_known_video(dedup):
+    dedup.add_video("original", "https://i.ytimg.com/vi/original/hq.jpg")
+    dedup.add_video("reupload", "https://i.ytimg.com/vi/reupload/hq.jpg")
+    dedup.add_video("unrelated", "https://i.ytimg.com/vi/unrelated/hq.jpg")
+    thumb = 0x0123456789ABCDEF
+    assert dedup.match_thumbnail("original", value=thumb) is None
+    assert dedup.match_thumbnail("reupload", value=flip(thumb, range(4))) == "original"
+    assert dedup.match_thumbnail("unrelated", value=flip(thumb, range(20, 25))) is None
+    assert dedup.canonical("reupload") == "original"
+    assert dedup.canonical("unrelated") == "unrelated"
+
+
+def test_hashes_are_reloaded_from_the_database(tmp_path):
+    path = str(tmp_path / "media.sqlite3")
+    first = MediaDeduplicator(path)
+    first.add_video("original", "https://i.ytimg.com/vi/original/hq.jpg")
+    first.match_thumbnail("original", value=42)
+    first.close()
+    second = MediaDeduplicator(path)
+    second.add_video("reupload", "https://i.ytimg.com/vi/reupload/hq.jpg")
+    assert second.match_thumbnail("reupload", value=43) == "original"
+    second.close()
@@ -0,0 +1,73 @@
+import glob
+import os
+import time
+
+import pytest
+
+from metadata_sinks import JsonlSink, ParquetSink, iter_records, pa
+
+
+def record(video_id, **fields):
+    return dict({"video_id": video_id, "title": f"video {video_id}", "view_count": 3}, **fields)
+
+
+def test_jsonl_skips_saved_ids_across_sinks(tmp_path):
+    sink = JsonlSink(str(tmp_path))
+    assert sink.write("youtube_shorts_crypto", record("aaaaaaaaaaa"))
+    assert not sink.write("youtube_shorts_crypto", record("aaaaaaaaaaa"))
+    sink.close()
+    sink = JsonlSink(str(tmp_path))
+    assert not sink.write("youtube_shorts_crypto", record("aaaaaaaaaaa"))
+    sink.close()
+    assert [r["video_id"] for _, r in iter_records(str(tmp_path))] == ["aaaaaaaaaaa"]
+
+
+def test_idle_records_are_flushed_by_the_timer(tmp_path):
+    sink = JsonlSink(str(tmp_path), flush_every=100, flush_interval=0.2)
+    try:
+        sink.write("youtube_shorts_crypto", record("aaaaaaaaaaa"))
+        path = sink.path("youtube_shorts_crypto")
+        deadline = time.monotonic() + 5
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert [r["video_id"] for _, r in iter_records(str(tmp_path))] == ["aaaaaaaaaaa"]
+    finally:
+        sink.close()
+
+
+@pytest.mark.skipif(pa is None, reason="needs pyarrow")
+def test_parquet_flush_is_readable_before_close(tmp_path):
+    sink = ParquetSink(str(tmp_path), flush_every=2)
+    try:
+        sink.write("youtube_shorts_crypto", record("aaaaaaaaaaa", extra_field=1))
+        sink.write("youtube_shorts_crypto", record("bbbbbbbbbbb"))
+        # A crash here must not lose what was flushed
+        restarted = ParquetSink(str(tmp_path))
+        assert not restarted.write("youtube_shorts_crypto", record("aaaaaaaaaaa"))
+        restarted.close()
+        rows = {r["video_id"]: r for folder, r in iter_records(str(tmp_path)) if folder == "youtube_shorts_crypto"}
+        assert set(rows) == {"aaaaaaaaaaa", "bbbbbbbbbbb"}
+        assert rows["aaaaaaaaaaa"]["extra_field"] == 1
+    finally:
+        sink.close()
+    assert not glob.glob(os.path.join(str(tmp_path), "metadata", "*.tmp"))
+
+
+@pytest.mark.skipif(pa is None, reason="needs pyarrow")
+def test_parquet_runs_started_in_the_same_second_keep_their_own_parts(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1_700_000_000.25)
+    first, second = ParquetSink(str(tmp_path), flush_every=1), ParquetSink(str(tmp_path), flush_every=1)
+    monkeypatch.setattr(os, "getpid", lambda: 4242)
+    third = ParquetSink(str(tmp_path), flush_every=1)
+    monkeypatch.undo()
+    try:
+        assert first.run_id == second.run_id != third.run_id
+        assert first.run_id.endswith(f"-250-{os.getpid()}")
+        first.write("youtube_shorts_crypto", record("aaaaaaaaaaa"))
+        third.write("youtube_shorts_crypto", record("bbbbbbbbbbb"))
+    finally:
+        for sink in (first, second, third):
+            sink.close()
+    assert len(glob.glob(os.path.join(str(tmp_path), "metadata", "youtube_shorts_crypto-*.parquet"))) == 2
+    assert sorted((folder, r["video_id"]) for folder, r in iter_records(str(tmp_path))) == [
+        ("youtube_shorts_crypto", "aaaaaaaaaaa"), ("youtube_shorts_crypto", "bbbbbbbbbbb")]
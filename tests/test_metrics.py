@@ -0,0 +1,59 @@
+import json
+import urllib.request
+
+from metrics import Registry, serve_http
+
+
+def registry():
+    r = Registry()
+    r.counter("crawl_things_total", "Things").inc(kind='a"b\\c')
+    r.counter("crawl_things_total", "Things").inc(2)
+    r.gauge("crawl_queue", "Queue length", function=lambda: 7)
+    h = r.histogram("crawl_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        h.observe(value, stage="x")
+    return r
+
+
+def test_prometheus_text_format():
+    assert registry().prometheus_text() == (
+        "# HELP crawl_things_total Things\n"
+        "# TYPE crawl_things_total counter\n"
+        "crawl_things_total 2\n"
+        'crawl_things_total{kind="a\\"b\\\\c"} 1\n'
+        "# HELP crawl_queue Queue length\n"
+        "# TYPE crawl_queue gauge\n"
+        "crawl_queue 7\n"
+        "# HELP crawl_seconds Latency\n"
+        "# TYPE crawl_seconds histogram\n"
+        'crawl_seconds_bucket{stage="x",le="0.1"} 1\n'
+        'crawl_seconds_bucket{stage="x",le="1"} 2\n'
+        'crawl_seconds_bucket{stage="x",le="+Inf"} 3\n'
+        'crawl_seconds_sum{stage="x"} 5.55\n'
+        'crawl_seconds_count{stage="x"} 3\n'
+    )
+
+
+def test_snapshot_percentiles():
+    snapshot = registry().snapshot()["metrics"]
+    assert snapshot["crawl_things_total"] == {"total": 2, '{kind="a\\"b\\\\c"}': 1}
+    assert snapshot["crawl_seconds"]['{stage="x"}'] == {"count": 3, "sum": 5.55, "p50": 0.5, "p90": 5, "p99": 5}
+
+
+def test_same_name_returns_the_same_metric():
+    r = Registry()
+    assert r.counter("a_total", "A") is r.counter("a_total", "A")
+
+
+def test_http_exporter():
+    server = serve_http(0, registry=registry())
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(base + "/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "crawl_queue 7\n" in response.read().decode()
+        with urllib.request.urlopen(base + "/metrics.json") as response:
+            assert json.load(response)["metrics"]["crawl_queue"] == {"total": 7}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,63 @@
+import pytest
+
+import negative_cache
+from negative_cache import DAY, NegativeCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(negative_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    c = NegativeCache(str(tmp_path / "rejections.sqlite3"), ttls={"keywords": 10 * DAY})
+    yield c
+    c.close()
+
+
+def test_entries_expire_per_reason(cache, clock):
+    cache.add("views", "views", view_count=50_000)
+    cache.add("keywords", "keywords")
+    cache.add("duration", "duration")
+    cache.add("other", "something-new")
+    assert cache.get("views").reason == "views"
+    clock[0] += 2 * DAY
+    assert cache.get("views") is None
+    assert cache.get("keywords").reason == "keywords"
+    clock[0] += 9 * DAY  # past the overridden 10-day keyword TTL
+    assert cache.get("keywords") is None
+    assert cache.get("other") is None  # default TTL is 7 days
+    assert cache.get("duration").reason == "duration"
+    assert cache.purge_expired() == 3
+    assert len(cache) == 1
+
+
+def test_view_rejections_are_voided_when_the_limit_allows_them(cache):
+    cache.add("abc", "views", view_count=50_000)
+    assert cache.get("abc", max_view_count=30_000).view_count == 50_000
+    assert cache.get("abc", max_view_count=100_000) is None
+    cache.add("def", "keywords", view_count=50_000)
+    assert cache.get("def", max_view_count=100_000).reason == "keywords"
+
+
+def test_a_new_rejection_replaces_the_old_one(cache, clock):
+    cache.add("abc", "views", view_count=50_000)
+    clock[0] += DAY / 2
+    cache.add("abc", "views", view_count=60_000)  # re-extracted after its count changed
+    clock[0] += DAY * 0.75
+    assert cache.get("abc") == (("views", 60_000, clock[0] - DAY * 0.75))
+    cache.discard("abc")
+    assert cache.get("abc") is None and len(cache) == 0
+
+
+def test_rejections_survive_a_restart(tmp_path, clock):
+    path = str(tmp_path / "rejections.sqlite3")
+    first = NegativeCache(path)
+    first.add("abc", "duration")
+    first.close()
+    second = NegativeCache(path)
+    assert second.get("abc").reason == "duration"
+    second.close()
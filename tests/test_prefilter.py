@@ -0,0 +1,70 @@
+import pytest
+
+import video_crawler_multi as engine
+from video_crawler_multi import Candidate, parse_view_count, parse_duration, to_candidate, prefilter_candidate
+
+URL = "https://www.youtube.com/shorts/dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12,345 views", 12345),
+    ("1.234 views", 1234),
+    ("1.234.567 views", 1234567),
+    ("1.2K views", 1200),
+    ("1,2K views", 1200),
+    ("3M views", 3000000),
+    ("1 view", 1),
+    ("No views", 0),
+    ("", None),
+    (None, None),
+    ("2 years ago", None),
+])
+def test_parse_view_count(text, expected):
+    assert parse_view_count(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("0:45", 45),
+    ("1:02:03", 3723),
+    ("10:00 PM news 0:30", 30),
+    ("10:00 pm", None),
+    ("SHORTS", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_duration(text, expected):
+    assert parse_duration(text) == expected
+
+
+def test_views_are_never_read_from_the_label():
+    # the aria-label holds the title, so "100K views" there is not a view count
+    raw = {"href": URL, "title": "", "label": "How I got 100K views in a day by someone 2 days ago",
+           "views": "", "duration": ""}
+    candidate = to_candidate(raw)
+    assert candidate.title == raw["label"]
+    assert candidate.view_count is None
+    assert prefilter_candidate(candidate) != "views"
+
+
+@pytest.fixture
+def prefilter(monkeypatch):
+    monkeypatch.setattr(engine, "PREFILTER", True)
+    monkeypatch.setattr(engine, "PREFILTER_TITLE_KEYWORDS", True)
+    monkeypatch.setattr(engine, "MAX_VIEW_COUNT", 30000)
+
+
+@pytest.mark.parametrize("views, duration, title, reason", [
+    (30001, 20, "free bitcoin giveaway", "views"),
+    (100, 61, "free bitcoin giveaway", "duration"),
+    (100, 20, "my cat video", "title"),
+    (100, 20, "free bitcoin giveaway", None),
+    (None, None, "free bitcoin giveaway", None),
+    (None, None, "", None),
+])
+def test_prefilter_candidate(prefilter, views, duration, title, reason):
+    assert prefilter_candidate(Candidate("dQw4w9WgXcQ", URL, title, views, duration)) == reason
+
+
+def test_prefilter_can_be_switched_off(prefilter, monkeypatch):
+    monkeypatch.setattr(engine, "PREFILTER", False)
+    assert prefilter_candidate(Candidate("dQw4w9WgXcQ", URL, "my cat video", 10**9, 600)) is None
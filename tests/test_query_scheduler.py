@@ -0,0 +1,36 @@
+from crawl_frontier import QueryStats
+from query_scheduler import QueryScheduler, DAY
+
+NOW = 1_000_000_000
+
+
+def stats(query, hits, links, seconds, last_crawled_at=NOW):
+    return QueryStats(query, 1, links, links, 0, links, hits, {}, seconds, last_crawled_at)
+
+
+def test_plan_orders_by_smoothed_rate_and_scales_scroll_budgets():
+    scheduler = QueryScheduler(base_priority=0.5, scroll_rounds=8, min_scroll_rounds=2, max_scroll_rounds=20)
+    all_stats = {"good": stats("good", 30, 100, 600), "bad": stats("bad", 0, 100, 600)}
+    plans = scheduler.plan(["bad", "new", "good"], all_stats, NOW)
+    assert [p.query for p in plans] == ["good", "new", "bad"]
+    good, new, bad = plans
+    assert good.priority > new.priority == 0.5 > bad.priority >= 0.05
+    assert good.scroll_rounds > new.scroll_rounds == 8 > bad.scroll_rounds >= 2
+    assert new.hits_per_hour == round(30 / 1200 * 3600, 2)
+
+
+def test_without_history_every_query_gets_the_defaults_in_order():
+    plans = QueryScheduler().plan(["b", "a"], {}, NOW)
+    assert [(p.query, p.priority, p.scroll_rounds, p.retired) for p in plans] == [
+        ("b", 0.5, 8, False), ("a", 0.5, 8, False)]
+
+
+def test_retirement_needs_enough_links_and_expires():
+    scheduler = QueryScheduler(retire_after_links=200, retire_below=0.005, retry_after_days=30)
+    assert not scheduler.retired(stats("q", 0, 199, 60), NOW)
+    assert scheduler.retired(stats("q", 0, 200, 60), NOW)
+    assert not scheduler.retired(stats("q", 1, 200, 60), NOW)
+    assert not scheduler.retired(stats("q", 0, 200, 60, NOW - 31 * DAY), NOW)
+    assert not scheduler.retired(None, NOW)
+    plans = scheduler.plan(["dead", "live"], {"dead": stats("dead", 0, 500, 60), "live": stats("live", 0, 10, 60)}, NOW)
+    assert [(p.query, p.retired) for p in plans] == [("live", False), ("dead", True)]
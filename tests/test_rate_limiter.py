@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from rate_limiter import (AdaptiveRateLimiter, TokenBucket, endpoint_class, is_throttle_message, is_throttle_url,
+                          retry_after_seconds)
+
+
+def limiter(**options):
+    return AdaptiveRateLimiter({"default": 2.0}, min_rates={"search": 0.5}, max_rates={"search": 2.2},
+                               **dict({"increase": 0.1, "decrease": 0.5, "backoff": 0.05, "max_backoff": 0.15},
+                                      **options))
+
+
+def test_throttles_halve_the_rate_and_double_the_pause():
+    rl = limiter()
+    assert rl.report("https://www.youtube.com/results?search_query=x", throttled=True) == 0.05
+    assert rl.rate("search") == 1.0
+    # Requests already in flight when the pause began count once
+    assert rl.report("https://www.youtube.com/results?search_query=x", throttled=True) is None
+    time.sleep(0.06)
+    assert rl.report("https://www.youtube.com/results", throttled=True) == 0.1
+    assert rl.rate("search") == 0.5
+    time.sleep(0.11)
+    assert rl.report("https://www.youtube.com/results", throttled=True) == 0.15  # max_backoff
+    assert rl.rate("search") == 0.5  # min rate
+    assert rl.rate("watch") == 2.0
+
+
+def test_retry_after_extends_the_pause_within_max_backoff():
+    rl = limiter(max_backoff=10)
+    assert rl.report("https://www.youtube.com/shorts/x", throttled=True, retry_after=3) == 3
+    assert rl.reserve("https://www.youtube.com/shorts/x") >= 2.9
+
+
+def test_successes_recover_the_rate_up_to_the_max():
+    rl = limiter()
+    rl.report("https://www.youtube.com/results", throttled=True)
+    time.sleep(0.06)
+    for _ in range(5):
+        rl.report("https://www.youtube.com/results")
+    assert rl.rate("search") == pytest.approx(1.5)
+    for _ in range(20):
+        rl.report("https://www.youtube.com/results")
+    assert rl.rate("search") == pytest.approx(2.2)
+    # A success resets the strikes: the next throttle pauses for `backoff` again
+    assert rl.report("https://www.youtube.com/results", throttled=True) == 0.05
+
+
+def test_configure_keeps_a_rate_within_the_new_bounds():
+    rl = limiter()
+    rl.report("https://www.youtube.com/results", throttled=True)
+    rl.configure({"default": 2.0}, min_rates={"search": 0.5}, max_rates={"search": 3})
+    assert rl.rate("search") == 1.0
+    rl.configure({"search": 0.2, "default": 2.0})
+    assert rl.rate("search") == 0.2
+
+
+def test_token_bucket_paces_reservations():
+    bucket = TokenBucket(10, 1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_endpoint_classes_and_throttle_signals():
+    assert endpoint_class("https://www.youtube.com/results?search_query=x") == "search"
+    assert endpoint_class("https://www.youtube.com/channel/UCx/shorts") == "search"
+    assert endpoint_class("https://www.youtube.com/shorts/aaaaaaaaaaa") == "watch"
+    assert endpoint_class("https://i.ytimg.com/vi/aaaaaaaaaaa/hqdefault.jpg") == "media"
+    assert is_throttle_message("ERROR: HTTP Error 429: Too Many Requests")
+    assert is_throttle_message("Sign in to confirm you're not a bot")
+    assert not is_throttle_message("Video unavailable")
+    assert is_throttle_url("https://consent.youtube.com/m?continue=x")
+    assert is_throttle_url("https://www.google.com/sorry/index")
+    assert not is_throttle_url("https://www.youtube.com/results")
+    assert retry_after_seconds("120") == 120
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") is None
@@ -0,0 +1,52 @@
+import pytest
+
+import video_crawler_multi as engine
+from scam_scoring import ScamScorer, Evidence
+
+
+def test_pump_hype_alone_is_not_a_scam():
+    assert engine.SCORER.score("Leg day pump workout").categories == []
+    assert engine.SCORER.score("This hidden gem restaurant is going to the moon").categories == []
+    assert engine.SCORER.score("100x gem, next big coin").categories == []
+
+
+def test_pump_hype_with_a_lure_is_a_scam():
+    score = engine.SCORER.score("Free bitcoin giveaway, 100x to the moon")
+    assert "crypto" in score.categories
+    assert {e.kind for e in score.evidence if e.category == "crypto" and e.keyword in ("100x", "to the moon")} == {"hook"}
+
+
+KEYWORDS = {"crypto": ["free bitcoin", "bitcoin", "link in bio", "giveaway", "eth"],
+            "giveaway": ["giveaway", "free iphone", "link in bio"]}
+
+
+def test_weights_by_kind_and_field():
+    scorer = ScamScorer(KEYWORDS)
+    # "bitcoin" inside "free bitcoin" is not counted separately
+    assert scorer.score(title="free bitcoin").scores == {"crypto": 1.5 * 1.5}
+    assert scorer.score(title="free bitcoin").categories == ["crypto"]
+    assert scorer.score(description="free bitcoin").scores == {"crypto": 1.5 * 0.75}
+    assert scorer.score(description="free bitcoin").categories == []
+    assert scorer.score(title="bitcoin").scores == {"crypto": 0.25 * 1.5}
+    # One count per keyword, in its strongest field
+    assert scorer.score(title="free bitcoin", tags=["free bitcoin"], description="free bitcoin").scores == {
+        "crypto": 1.5 * 1.5}
+
+
+def test_co_occurrence_bonus_needs_a_lure_of_the_category():
+    scorer = ScamScorer(KEYWORDS)
+    lure, action = 1.5 * 0.75, 0.5 * 0.5 * 1.5  # "link in bio" is shared, so it counts half
+    score = scorer.score(title="link in bio", description="free bitcoin")
+    assert score.scores["crypto"] == pytest.approx(round((lure + action) * 1.5, 3))
+    assert score.scores["giveaway"] == pytest.approx(action)
+    # A shared lure ("giveaway") does not trigger the bonus
+    score = scorer.score(title="giveaway, link in bio")
+    assert score.scores["crypto"] == pytest.approx(1.5 * 0.5 * 1.5 + action)
+    assert {e.kind for e in score.evidence} == {"lure", "action"}
+
+
+def test_whole_words_and_keyword_weights():
+    assert ScamScorer(KEYWORDS).score(title="my method").scores == {}
+    scorer = ScamScorer(KEYWORDS, keyword_weights={"Free Bitcoin": 3})
+    assert scorer.score(title="free bitcoin").scores == {"crypto": 4.5}
+    assert scorer.score(title="free iphone").evidence == [Evidence("giveaway", "free iphone", "lure", "title", 2.25)]
@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from media_dedup import BKTree, MediaDeduplicator
+from thumbnail_triage import ThumbnailTriage
+
+THUMB = 0x0123456789ABCDEF
+TEMPLATE = 0xFEDCBA9876543210
+
+
+def thumb_url(video_id):
+    return f"https://i.ytimg.com/vi/{video_id}/hq.jpg"
+
+
+@pytest.fixture
+def triage(tmp_path):
+    # Thumbnail hashes come from `hashes` (keyed by URL) instead of fetching
+    # and decoding; an exception there stands for a failed fetch.
+    dedup = MediaDeduplicator(str(tmp_path / "media.sqlite3"), thumb_distance=4)
+    novel, known, hashes = [], [], {}
+    t = ThumbnailTriage(dedup, novel.append, lambda video_id, canonical: known.append((video_id, canonical)),
+                        template_distance=6, batch_size=4, batch_wait=0.05)
+
+    async def fake_hash(session, url):
+        return hashes[url]
+
+    t._hash = fake_hash
+    t.templates = BKTree()
+    t.templates.add(TEMPLATE, "fake-giveaway")
+    t.hashes, t.novel, t.known = hashes, novel, known
+    yield t.start()
+    t.close(cancel=True)
+    dedup.close()
+
+
+def run(triage, videos):
+    for video_id, value in videos.items():
+        triage.hashes[thumb_url(video_id)] = value
+        triage.submit(video_id, thumb_url(video_id))
+    triage.close(timeout=10)
+
+
+def test_only_novel_thumbnails_are_passed_on(triage):
+    run(triage, {
+        "original": THUMB,
+        "reupload": THUMB ^ 0b111,  # 3 bits from the original
+        "template": TEMPLATE ^ 0b111111,  # 6 bits from the scam template
+        "different": THUMB ^ 0xFFFF,
+    })
+    assert sorted(triage.novel) == ["different", "original"]
+    assert sorted(triage.known) == [("reupload", "original"), ("template", "template:fake-giveaway")]
+    assert triage.counts == {"novel": 2, "known": 1, "template": 1}
+    assert triage.dedup.canonical("template") == "template:fake-giveaway"
+    assert triage.pending == 0
+
+
+def test_missing_or_broken_thumbnails_count_as_novel(triage):
+    triage.submit("no-thumb", None)
+    run(triage, {"broken": RuntimeError("image could not be decoded")})
+    assert sorted(triage.novel) == ["broken", "no-thumb"]
+    assert triage.counts["novel"] == 2
+
+
+def test_cancelled_batches_are_dropped(triage):
+    triage.cancelled.set()
+    run(triage, {"original": THUMB})
+    assert triage.novel == [] and triage.known == []
+    assert triage.pending == 0
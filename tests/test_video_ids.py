@@ -0,0 +1,61 @@
+import pytest
+
+from video_ids import canonical_video, BloomFilter, SeenVideos
+
+SHORTS = "https://www.youtube.com/shorts/dQw4w9WgXcQ"
+WATCH = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("href, expected", [
+    ("https://www.youtube.com/shorts/dQw4w9WgXcQ", SHORTS),
+    ("/shorts/dQw4w9WgXcQ?feature=share", SHORTS),
+    ("https://m.youtube.com/shorts/dQw4w9WgXcQ/", SHORTS),
+    ("/watch?v=dQw4w9WgXcQ&pp=ygUEdGVzdA%3D%3D&t=10s", WATCH),
+    ("https://youtu.be/dQw4w9WgXcQ?si=abc", WATCH),
+    ("https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ", WATCH),
+    ("https://www.youtube.com/live/dQw4w9WgXcQ", WATCH),
+    ("  https://www.youtube.com/watch?list=PL1&v=dQw4w9WgXcQ  ", WATCH),
+])
+def test_canonical_video(href, expected):
+    assert canonical_video(href) == ("dQw4w9WgXcQ", expected)
+
+
+@pytest.mark.parametrize("href", [
+    "", None, "/@channel/shorts", "/channel/UCx/shorts", "/playlist?list=PL1", "/watch?v=short",
+    "/shorts/dQw4w9WgXcQX", "https://example.com/shorts/dQw4w9WgXcQ", "https://notyoutube.com/watch?v=dQw4w9WgXcQ",
+])
+def test_links_that_are_not_one_video(href):
+    assert canonical_video(href) == (None, None)
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(10_000, error_rate=0.01)
+    added = [f"video{i:06d}" for i in range(10_000)]
+    # add() is False for the few new items that were already false positives
+    assert sum(bloom.add(v) for v in added) > 9_900
+    assert all(v in bloom for v in added)
+    assert not bloom.add(added[0])
+    false_positives = sum(f"other{i:06d}" in bloom for i in range(10_000))
+    assert false_positives < 300
+    assert bloom.nbytes < 15_000
+
+
+def test_seen_videos_grow_past_capacity():
+    seen = SeenVideos(capacity=100)
+    for i in range(1000):
+        seen.add(f"video{i:06d}")
+    assert 990 <= len(seen) <= 1000  # an add that hits a false positive is not counted
+    assert len(seen._filters) > 1
+    assert all(f"video{i:06d}" in seen for i in range(1000))
+
+
+def test_unconfirmed_filter_hits_are_not_seen():
+    confirmed = set()
+    seen = SeenVideos(confirmed.__contains__, capacity=10)
+    seen.add("aaaaaaaaaaa")
+    # A filter hit the exact store does not confirm is a false positive
+    assert "aaaaaaaaaaa" not in seen
+    assert seen.false_positives == 1
+    confirmed.add("aaaaaaaaaaa")
+    assert "aaaaaaaaaaa" in seen
+    assert "bbbbbbbbbbb" not in seen
@@ -0,0 +1,139 @@
+import time
+import threading
+
+import pytest
+
+from work_coordinator import SqliteCoordinator, RedisCoordinator
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def connect(request, tmp_path):
+    # connect(worker_id, ...) opens and starts one more worker on a shared store
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+
+        def make(worker_id, **options):
+            return RedisCoordinator(fakeredis.FakeRedis(server=server), worker_id, **options)
+    else:
+        path = str(tmp_path / "coordinator.sqlite3")
+
+        def make(worker_id, **options):
+            return SqliteCoordinator(path, worker_id, **options)
+    opened = []
+
+    def connect(worker_id, **options):
+        coordinator = make(worker_id, **options).start()
+        opened.append(coordinator)
+        return coordinator
+    yield connect
+    for coordinator in opened:
+        coordinator.close()
+
+
+def page_field(coordinator, url, field):
+    if isinstance(coordinator, SqliteCoordinator):
+        return coordinator._execute(f"SELECT {field} FROM work_pages WHERE url = ?", (url,))[0][0]
+    value = coordinator._str(coordinator.client.hget(coordinator._page(url), field))
+    return value or None
+
+
+def test_lease_hands_out_pages_by_priority_once(connect):
+    a, b = connect("a"), connect("b")
+    a.add_page("search:low", "search", "low", priority=0.1)
+    a.add_page("search:high", "search", "high", priority=0.9)
+    assert not b.add_page("search:low", "search", "low", priority=0.5)
+    assert a.lease() == ("search:high", "search", "high")
+    assert b.lease() == ("search:low", "search", "low")
+    assert a.lease() is None and b.lease() is None
+    a.complete("search:high", 12)
+    assert page_field(a, "search:high", "status") == "done"
+    assert a.page_counts() == {"done": 1, "leased": 1}
+
+
+def test_concurrent_workers_never_lease_the_same_page(connect):
+    workers = [connect(f"w{i}") for i in range(4)]
+    for i in range(40):
+        workers[0].add_page(f"search:{i}", "search", str(i), priority=i % 5)
+    leased = []
+
+    def drain(worker):
+        while True:
+            page = worker.lease()
+            if page is None:
+                return
+            leased.append(page[0])
+    threads = [threading.Thread(target=drain, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(leased) == sorted(f"search:{i}" for i in range(40))
+
+
+def test_heartbeats_keep_a_lease_and_expired_leases_are_reassigned(connect):
+    a = connect("a", lease_seconds=0.6)
+    b = connect("b", lease_seconds=0.6)
+    a.add_page("search:x", "search", "x")
+    assert a.lease()[0] == "search:x"
+    time.sleep(1.0)  # past the lease, renewed by a's heartbeat thread
+    assert b.lease() is None
+    a._heartbeat.stop()  # a hangs
+    time.sleep(1.0)
+    assert b.lease()[0] == "search:x"
+    # a's late completion does not take the page back from b
+    a.complete("search:x", 3)
+    assert page_field(b, "search:x", "status") == "leased"
+    b.complete("search:x", 5)
+    assert page_field(b, "search:x", "status") == "done"
+
+
+def test_fail_retries_until_max_attempts(connect):
+    a = connect("a", max_attempts=2)
+    a.add_page("search:x", "search", "x")
+    a.lease()
+    a.fail("search:x")
+    assert page_field(a, "search:x", "status") == "pending"
+    assert page_field(a, "search:x", "done_at") is None
+    a.lease()
+    a.fail("search:x")
+    assert page_field(a, "search:x", "status") == "failed"
+    assert page_field(a, "search:x", "done_at") is not None
+    assert a.lease() is None
+
+
+def test_release_puts_the_page_back_without_using_an_attempt(connect):
+    a = connect("a", max_attempts=1)
+    a.add_page("search:x", "search", "x")
+    a.lease()
+    a.release("search:x")
+    assert page_field(a, "search:x", "status") == "pending"
+    a.lease()
+    a.fail("search:x")
+    assert page_field(a, "search:x", "status") == "failed"
+
+
+def test_only_the_first_worker_claims_a_video(connect):
+    a, b = connect("a"), connect("b")
+    assert a.claim_video("aaaaaaaaaaa")
+    assert not b.claim_video("aaaaaaaaaaa")
+    assert a.claim_video("aaaaaaaaaaa")
+    assert b.claim_video("bbbbbbbbbbb")
+    assert [w for w, _ in a.workers()] == ["a", "b"]
+
+
+def test_retired_pages_leave_the_queue_until_added_again(connect):
+    a, b = connect("a"), connect("b")
+    a.add_page("search:x", "search", "x", priority=0.9)
+    a.add_page("search:y", "search", "y", priority=0.1)
+    assert a.retire("search:x")
+    assert b.lease()[0] == "search:y"
+    assert not a.retire("search:y")  # leased by b
+    assert a.lease() is None
+    assert page_field(a, "search:x", "status") == "retired"
+    assert not a.add_page("search:x", "search", "x", priority=0.5)
+    assert a.lease()[0] == "search:x"
+    # A page this worker leased can be retired without using an attempt
+    assert a.retire("search:x")
+    assert int(page_field(a, "search:x", "attempts")) == 0
+    assert a.leased_count() == 1
@@ -0,0 +1,210 @@
+import os
+import logging
+import time
+import queue
+import asyncio
+import threading
+
+try:
+    import aiohttp
+except ImportError:  # only needed for thumbnail triage
+    aiohttp = None
+
+import metrics
+from rate_limiter import ThrottledError, retry_after_seconds
+from media_dedup import BKTree, image_hash
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# THUMBNAIL-FIRST TRIAGE
+# ==================================================
+# Sits between a saved video and its download. Thumbnails of saved videos
+# are collected into batches of up to `batch_size` (or whatever arrived
+# within `batch_wait` seconds), fetched together over one pooled aiohttp
+# session and hashed in parallel. A thumbnail that matches a known video's
+# thumbnail (the deduplicator's index) or a scam template image is not
+# downloaded; only novel videos are passed on to on_novel, which queues
+# the full download.
+#
+# Templates are images (jpg, png, webp) of known scam clips placed in
+# `templates_dir`; a match links the video to "template:<file name>".
+# A thumbnail that cannot be fetched or decoded counts as novel.
+# With a rate limiter, each fetch waits for a "media" slot and reports 429s.
+
+TEMPLATE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                         "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"}
+
+BATCH_SECONDS = metrics.histogram("crawl_triage_batch_seconds", "Time to fetch and hash one thumbnail batch")
+TRIAGED = metrics.counter("crawl_thumbnails_triaged_total", "Triaged thumbnails by verdict")
+
+_STOP = object()
+
+
+def load_templates(templates_dir, ffmpeg="ffmpeg"):
+    tree = BKTree()
+    if not templates_dir or not os.path.isdir(templates_dir):
+        return tree
+    for name in sorted(os.listdir(templates_dir)):
+        if name.lower().endswith(TEMPLATE_EXTENSIONS):
+            try:
+                with open(os.path.join(templates_dir, name), "rb") as f:
+                    tree.add(image_hash(f.read(), ffmpeg), os.path.splitext(name)[0])
+            except Exception as e:
+                log.warning(f"  ⚠ Skipping scam template {name}: {e}")
+    return tree
+
+
+class ThumbnailTriage:
+    def __init__(self, dedup, on_novel, on_known=None, templates_dir=None, template_distance=6,
+                 batch_size=32, batch_wait=2.0, connections=8, timeout=15, rate_limiter=None):
+        if aiohttp is None:
+            raise RuntimeError("Thumbnail triage needs aiohttp: pip install aiohttp")
+        self.dedup = dedup
+        self.on_novel = on_novel  # on_novel(video_id): queue the download
+        self.on_known = on_known  # on_known(video_id, canonical)
+        self.template_distance = template_distance
+        self.templates = load_templates(templates_dir, dedup.ffmpeg)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.connections = connections
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.counts = {"novel": 0, "known": 0, "template": 0}
+        self.cancelled = threading.Event()
+        self._items = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="thumbnail-triage", daemon=True)
+
+    @property
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, video_id, thumbnail_url):
+        self.dedup.add_video(video_id, thumbnail_url)
+        if not thumbnail_url:
+            self._novel(video_id)
+            return
+        with self._lock:
+            self._pending += 1
+        self._items.put((video_id, thumbnail_url))
+
+    # ---------------- worker ----------------
+    def _next_batch(self):
+        item = self._items.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._items.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._items.put(_STOP)  # seen again once this batch is done
+                break
+            batch.append(item)
+        return batch
+
+    async def _fetch(self, session, url):
+        if self.rate_limiter:
+            await asyncio.sleep(self.rate_limiter.reserve(url, "media"))
+        async with session.get(url) as resp:
+            if resp.status == 429:
+                error = ThrottledError(f"HTTP 429 from {url}", retry_after_seconds(resp.headers.get("Retry-After")))
+                if self.rate_limiter:
+                    self.rate_limiter.report(url, throttled=True, retry_after=error.retry_after, endpoint="media")
+                raise error
+            resp.raise_for_status()
+            data = await resp.read()
+        if self.rate_limiter:
+            self.rate_limiter.report(url, endpoint="media")
+        return data
+
+    async def _hash(self, session, url):
+        # Thumbnail hash, or the exception that prevented it
+        try:
+            data = await self._fetch(session, url)
+            return await asyncio.get_running_loop().run_in_executor(None, image_hash, data, self.dedup.ffmpeg)
+        except Exception as e:
+            return e
+
+    async def _hash_batch(self, session, batch):
+        return await asyncio.gather(*(self._hash(session, url) for _, url in batch))
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        session = loop.run_until_complete(self._open())
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                if self.cancelled.is_set():
+                    self._done(len(batch))
+                    continue
+                with BATCH_SECONDS.time():
+                    results = loop.run_until_complete(self._hash_batch(session, batch))
+                for (video_id, _), value in zip(batch, results):
+                    try:
+                        self._triage(video_id, value)
+                    except Exception as e:
+                        log.error(f"  Error triaging {video_id}: {e}")
+                    finally:
+                        self._done(1)
+        finally:
+            loop.run_until_complete(session.close())
+            loop.close()
+
+    async def _open(self):
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=self.timeout), headers=HEADERS,
+        )
+
+    def _done(self, n):
+        with self._lock:
+            self._pending -= n
+
+    def _triage(self, video_id, value):
+        if isinstance(value, Exception):
+            log.warning(f"  ⚠ Thumbnail unavailable for {video_id}, downloading anyway: {value}")
+            self._novel(video_id)
+            return
+        canonical = self.dedup.match_thumbnail(video_id, value=value)
+        kind = "known"
+        if canonical is None:
+            hits = sorted(self.templates.search(value, self.template_distance))
+            if hits:
+                canonical = f"template:{hits[0][1]}"
+                self.dedup.link(video_id, canonical, hits[0][0], matched_by="template")
+                kind = "template"
+        if canonical is None:
+            self._novel(video_id)
+            return
+        with self._lock:
+            self.counts[kind] += 1
+        TRIAGED.inc(verdict=kind)
+        if self.on_known:
+            self.on_known(video_id, canonical)
+
+    def _novel(self, video_id):
+        with self._lock:
+            self.counts["novel"] += 1
+        TRIAGED.inc(verdict="novel")
+        self.on_novel(video_id)
+
+    def close(self, cancel=False, timeout=None):
+        # Triage everything submitted so far unless cancel=True
+        if cancel:
+            self.cancelled.set()
+        self._items.put(_STOP)
+        self._thread.join(timeout)
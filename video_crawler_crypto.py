@@ -11,6 +11,8 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
+from keyword_matcher import KeywordMatcher
+
 # ==================================================
 # CONFIG
 # ==================================================
@@ -95,11 +97,10 @@ CRYPTO_SCAM_KEYWORDS = [
 # ==================================================
 # UTILS
 # ==================================================
+KEYWORD_MATCHER = KeywordMatcher({"scam": CRYPTO_SCAM_KEYWORDS})
+
 def is_crypto_scam(text: str) -> bool:
-    if not text:
-        return False
-    t = text.lower()
-    return any(k in t for k in CRYPTO_SCAM_KEYWORDS)
+    return KEYWORD_MATCHER.matches(text)
 
 def extract_hashtags(description: str, tags: list) -> list:
     hashtags = []
@@ -11,6 +11,8 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
+from keyword_matcher import KeywordMatcher
+
 # ==================================================
 # CONFIG
 # ==================================================
@@ -58,11 +60,10 @@ GIVEAWAY_SCAM_KEYWORDS = [
 # ==================================================
 # UTILS
 # ==================================================
+KEYWORD_MATCHER = KeywordMatcher({"scam": GIVEAWAY_SCAM_KEYWORDS})
+
 def is_giveaway_scam(text: str) -> bool:
-    if not text:
-        return False
-    t = text.lower()
-    return any(k in t for k in GIVEAWAY_SCAM_KEYWORDS)
+    return KEYWORD_MATCHER.matches(text)
 
 def extract_hashtags(description: str, tags: list) -> list:
     hashtags = []
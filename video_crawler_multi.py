@@ -0,0 +1,1243 @@
+import os
+import re
+import copy
+import time
+import socket
+import argparse
+import logging
+import threading
+from collections import namedtuple
+from itertools import zip_longest
+from urllib.parse import quote_plus
+import yt_dlp
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+import video_crawler_crypto as crypto
+import video_crawler_giftcards as giftcards
+import video_crawler_giveaway as giveaway
+import metrics
+from scam_scoring import ScamScorer, SIGNAL_KEYWORDS, KIND_WEIGHTS
+from extraction_pool import ExtractionPool
+from rate_limiter import AdaptiveRateLimiter, ThrottledError, REQUESTS_THROTTLED, is_throttle_message, is_throttle_url
+from crawl_frontier import CrawlFrontier
+from negative_cache import NegativeCache
+from driver_pool import DriverPool
+from metadata_sinks import make_sink, iter_records
+from download_manager import DownloadManager
+from http_discovery import HttpDiscovery, aiohttp
+from media_dedup import MediaDeduplicator, ffmpeg_available
+from thumbnail_triage import ThumbnailTriage
+from engagement_tracker import EngagementTracker, unavailable_status
+from work_coordinator import open_coordinator
+from video_ids import canonical_video, SeenVideos
+from query_scheduler import QueryScheduler, QueryPlan
+from crawler_config import load_config, ConfigError, ConfigWatcher
+
+log = logging.getLogger("video_crawler_multi")
+_imported = set(globals())  # everything upper-case bound after this is a setting
+
+# ==================================================
+# CONFIG
+# ==================================================
+OUTPUT_DIR = r"C:\Users\Jules Gregory\Desktop\video_crawler"  # full path
+MAX_VIDEOS = 5  # unique videos across all categories, change to 2000 later
+SCROLL_ROUNDS = 8  # max scrolls per page, increase for better Shorts discovery
+SCROLL_WAIT_TIMEOUT = 4  # max seconds to wait for new results after a scroll
+SCROLL_STALL_ROUNDS = 2  # stop scrolling after this many scrolls load nothing new
+SCROLL_POLL_INTERVAL = 0.25  # seconds between result-count checks
+PAGE_LOAD_TIMEOUT = 10  # max seconds to wait for the first results of a page
+PAGE_YIELD_TARGET = 200  # stop scrolling a page once it produced this many links
+PREFILTER = True  # drop obvious misses using the results page before calling yt-dlp
+PREFILTER_TITLE_KEYWORDS = True  # also drop results whose title has no keyword hit (trades some recall for speed)
+SCAM_SCORE_THRESHOLD = 2.0  # min weighted keyword score for a video to count as a category's scam
+DOWNLOAD_VIDEOS = True  # set True if you want videos
+DOWNLOAD_MIN_SCORE = 4.0  # only download videos scoring at least this; lower hits keep just their metadata
+DOWNLOAD_WORKERS = 2  # parallel video downloads
+DOWNLOAD_BANDWIDTH_LIMIT = None  # bytes/s shared by all downloads, e.g. 5_000_000; None = unlimited
+DOWNLOAD_RETRIES = 3  # attempts per video before it is marked failed
+DOWNLOAD_RETRY_BACKOFF = 10  # seconds before the first retry, doubled after each
+DEDUP_VIDEOS = True  # hash downloaded frames and hard-link re-uploads to one copy (needs ffmpeg)
+DEDUP_SKIP_BY_THUMBNAIL = True  # don't download a video whose thumbnail matches a known one or a template
+DEDUP_FRAME_SAMPLES = 16  # frames hashed per video
+DEDUP_FRAME_DISTANCE = 10  # max differing bits (of 64) for two frames to match
+DEDUP_THUMB_DISTANCE = 4  # max differing bits for two thumbnails to match
+TRIAGE_BATCH_SIZE = 32  # thumbnails fetched and hashed together before downloads are queued
+TRIAGE_CONNECTIONS = 8  # pooled connections for thumbnail fetches
+SCAM_TEMPLATES_DIR = os.path.join(OUTPUT_DIR, "scam_templates")  # images of known scam clips
+TRIAGE_TEMPLATE_DISTANCE = 6  # max differing bits for a thumbnail to match a template
+MAX_VIEW_COUNT = 30000  # ignore videos with more than 30k views
+EXTRACT_WORKERS = 4  # parallel yt_dlp metadata extractions
+EXTRACT_QUEUE_SIZE = 100  # discovered links waiting for a worker
+ENDPOINT_RATES = {"search": 0.5, "watch": 1.0, "media": 4.0}  # starting requests/s: search/channel pages, watch pages (yt-dlp), thumbnails and video CDN
+ENDPOINT_MIN_RATES = {"search": 0.05, "watch": 0.1, "media": 0.5}  # floor the rates drop to under repeated throttling
+ENDPOINT_MAX_RATES = {"search": 2.0, "watch": 4.0, "media": 16.0}  # ceiling the rates climb to while requests succeed
+RATE_INCREASE = 0.05  # requests/s added to an endpoint's rate per successful request
+THROTTLE_BACKOFF = 30  # seconds an endpoint pauses after a 429, consent or captcha page; doubled per throttle in a row
+THROTTLE_MAX_BACKOFF = 900  # longest pause, also caps a server's Retry-After
+THROTTLE_RETRIES = 2  # extraction retries of a throttled video before it is left queued for the next run
+HOST_JITTER = 1.0  # extra random delay (0..N s) added to each request
+DISCOVERY_MODE = "selenium"  # "selenium" renders pages in Chrome, "http" parses them without a browser (needs aiohttp)
+DISCOVERY_BROWSERS = 3  # Chrome instances crawling search/channel pages concurrently
+HTTP_DISCOVERY_WORKERS = 4  # pages fetched concurrently in http mode
+HTTP_CONNECTIONS = 8  # pooled keep-alive connections shared by those workers
+HTTP_FALLBACK_BROWSERS = 1  # Chrome instances for pages http mode cannot parse
+HTTP_DISCOVERY_BASE_URL = None  # e.g. "http://127.0.0.1:8765" to crawl benchmarks/youtube_stub_server.py
+HEADLESS = True  # set False to watch the browsers work
+BROWSER_RECYCLE_PAGES = 50  # restart each browser after this many pages to cap memory
+METADATA_SINK = "json"  # "json" (one file per video), "jsonl" or "parquet" (needs pyarrow)
+SINK_OPTIONS = {"jsonl": {"flush_every": 100, "flush_interval": 30},
+                "parquet": {"flush_every": 1000, "flush_interval": 60}}  # flush + fsync cadence
+FRONTIER_PATH = os.path.join(OUTPUT_DIR, "crawl_frontier.sqlite3")  # resumable crawl state
+RESUME = True  # False starts a new pass over all searches (evaluated videos stay skipped)
+COORDINATOR = None  # shared page queue for crawling from several hosts: "redis://host:6379/0" or a SQLite file on a shared drive; None crawls alone
+COORDINATOR_LEASE_SECONDS = 300  # a page leased by a host that stopped responding is handed out again after this
+WORKER_ID = socket.gethostname()  # scraper_id of saved records; must differ between crawlers sharing a coordinator
+REFRESH_MODE = False  # re-check saved videos for engagement and takedowns instead of crawling
+REFRESH_LIMIT = 500  # max videos checked per refresh run, most overdue first
+REFRESH_MIN_INTERVAL_HOURS = 6  # check interval for new uploads and fast-growing videos
+REFRESH_MAX_INTERVAL_DAYS = 30  # check interval for old videos with flat counts
+SEARCH_PAGE_PRIORITY = 0.5  # channels scoring above this are crawled before the remaining searches
+QUERY_SCHEDULING = True  # order searches and size their scroll budgets by the new scams each query found in earlier runs
+QUERY_MIN_SCROLL_ROUNDS = 2  # scroll budget of the weakest queries; an average one gets SCROLL_ROUNDS
+QUERY_MAX_SCROLL_ROUNDS = 20  # scroll budget of the best queries
+QUERY_RETIRE_AFTER_LINKS = 200  # links a query must have returned before it can be retired
+QUERY_RETIRE_HIT_RATE = 0.005  # retire queries finding fewer new scams per link than this (1 in 200)
+QUERY_RETRY_DAYS = 30  # a retired query is crawled again this many days after its last crawl
+CHANNEL_HALF_LIFE_DAYS = 7  # a channel's score halves per this many days since its last hit
+CHANNEL_EXPECTED_SHORTS = 30  # assumed Shorts on a channel whose page was not crawled yet
+LOG_LEVEL = "INFO"  # console level; "DEBUG" also shows every queued, filtered and pre-filtered link
+LOG_FILE = os.path.join(OUTPUT_DIR, "crawler.log")  # full DEBUG log with timestamps and threads; None to disable
+METRICS_PORT = 9108  # Prometheus endpoint at http://127.0.0.1:9108/metrics; None to disable
+METRICS_SNAPSHOT_PATH = os.path.join(OUTPUT_DIR, "metrics.json")  # JSON snapshot with p50/p90/p99; None to disable
+METRICS_SNAPSHOT_INTERVAL = 30  # seconds between snapshots
+NEGATIVE_CACHE_PATH = os.path.join(OUTPUT_DIR, "negative_cache.sqlite3")  # rejected videos
+NEGATIVE_CACHE_TTLS = {"views": 1 * 86400, "keywords": 30 * 86400, "title": 7 * 86400,
+                       "score": 7 * 86400, "duration": 180 * 86400, "error": 3600}  # seconds per reason
+SEEN_FILTER_CAPACITY = 100_000  # video IDs per run before the in-memory seen filter grows
+SEEN_FILTER_ERROR_RATE = 0.001  # share of new IDs that cost an extra frontier lookup
+
+# Every setting above can also come from a TOML/YAML/JSON profile (see
+# CONFIG PROFILES below); these two pick the profile and are not part of it
+DEFAULT_SETTINGS = copy.deepcopy({k: v for k, v in globals().items() if k.isupper() and k not in _imported})
+CONFIG_FILE = os.environ.get("VIDEO_CRAWLER_CONFIG")  # profile path, also set with --config; None = the constants above
+CONFIG_RELOAD_INTERVAL = 5  # seconds between checks of the profile and its keyword packs for edits
+
+# Queries and keywords stay defined in the single-category scripts; this
+# engine runs them all through one discovery and metadata pipeline so each
+# Short is fetched and classified once.
+CATEGORIES = {
+    "crypto": {
+        "scam_type": "Crypto Scam",
+        "folder": "youtube_shorts_crypto",
+        "queries": crypto.SEARCH_QUERIES,
+        "keywords": crypto.CRYPTO_SCAM_KEYWORDS,
+    },
+    "giftcard": {
+        "scam_type": "Gift Card Generator/Free Code Scam",
+        "folder": "youtube_shorts_giftcard",
+        "queries": giftcards.SEARCH_QUERIES,
+        "keywords": giftcards.GIFT_CARD_SCAM_KEYWORDS,
+    },
+    "giveaway": {
+        "scam_type": "Giveaway Scam",
+        "folder": "youtube_shorts_giveaway",
+        "queries": giveaway.SEARCH_QUERIES,
+        "keywords": giveaway.GIVEAWAY_SCAM_KEYWORDS,
+    },
+}
+
+DEFAULT_CATEGORIES = copy.deepcopy(CATEGORIES)
+KEYWORD_WEIGHTS = {}  # per-keyword score overrides from keyword packs
+KEYWORD_KINDS = {}  # {kind: [keywords]} added by keyword packs
+
+def build_scorer():
+    kinds = {kind: SIGNAL_KEYWORDS.get(kind, []) + KEYWORD_KINDS.get(kind, [])
+             for kind in list(SIGNAL_KEYWORDS) + [k for k in KEYWORD_KINDS if k not in SIGNAL_KEYWORDS]}
+    return ScamScorer({name: cat["keywords"] for name, cat in CATEGORIES.items()}, threshold=SCAM_SCORE_THRESHOLD,
+                      signal_keywords=kinds, keyword_weights=KEYWORD_WEIGHTS)
+
+# One automaton over every category's keywords, compiled at import time and
+# again when a reloaded profile changes them; the pre-filter uses it
+# directly, evaluate_video scores through SCORER
+SCORER = build_scorer()
+KEYWORD_MATCHER = SCORER.matcher
+
+# ==================================================
+# CONFIG PROFILES
+# ==================================================
+# A profile overrides the CONFIG constants and adds keyword packs (format in
+# crawler_config.py). While a crawl runs, the profile and its packs are
+# checked for edits every CONFIG_RELOAD_INTERVAL seconds: LIVE_SETTINGS,
+# queries and keywords take effect at once, without losing frontier state;
+# any other changed setting is reported and waits for the next start.
+
+# Types of settings whose default is None, and settings with fixed values
+SETTING_TYPES = {"DOWNLOAD_BANDWIDTH_LIMIT": int, "HTTP_DISCOVERY_BASE_URL": str, "COORDINATOR": str,
+                 "SCROLL_WAIT_TIMEOUT": float, "PAGE_LOAD_TIMEOUT": float, "DOWNLOAD_RETRY_BACKOFF": float,
+                 "COORDINATOR_LEASE_SECONDS": float, "REFRESH_MIN_INTERVAL_HOURS": float,
+                 "REFRESH_MAX_INTERVAL_DAYS": float, "CHANNEL_HALF_LIFE_DAYS": float,
+                 "METRICS_SNAPSHOT_INTERVAL": float, "THROTTLE_BACKOFF": float, "THROTTLE_MAX_BACKOFF": float}
+SETTING_CHOICES = {"DISCOVERY_MODE": ("selenium", "http"), "METADATA_SINK": ("json", "jsonl", "parquet"),
+                   "LOG_LEVEL": ("DEBUG", "INFO", "WARNING", "ERROR")}
+LIVE_SETTINGS = {
+    "MAX_VIDEOS", "MAX_VIEW_COUNT", "SCROLL_ROUNDS", "SCROLL_WAIT_TIMEOUT", "SCROLL_STALL_ROUNDS",
+    "SCROLL_POLL_INTERVAL", "PAGE_LOAD_TIMEOUT", "PAGE_YIELD_TARGET", "PREFILTER", "PREFILTER_TITLE_KEYWORDS",
+    "SCAM_SCORE_THRESHOLD", "DOWNLOAD_MIN_SCORE", "EXTRACT_WORKERS", "ENDPOINT_RATES", "ENDPOINT_MIN_RATES",
+    "ENDPOINT_MAX_RATES", "RATE_INCREASE", "THROTTLE_BACKOFF", "THROTTLE_MAX_BACKOFF", "THROTTLE_RETRIES",
+    "HOST_JITTER", "SEARCH_PAGE_PRIORITY", "QUERY_SCHEDULING", "QUERY_MIN_SCROLL_ROUNDS", "QUERY_MAX_SCROLL_ROUNDS",
+    "QUERY_RETIRE_AFTER_LINKS", "QUERY_RETIRE_HIT_RATE", "QUERY_RETRY_DAYS", "NEGATIVE_CACHE_TTLS", "LOG_LEVEL",
+}
+# Paths under OUTPUT_DIR move with a profile's OUTPUT_DIR unless set themselves
+PATH_SETTINGS = ("SCAM_TEMPLATES_DIR", "FRONTIER_PATH", "LOG_FILE", "METRICS_SNAPSHOT_PATH", "NEGATIVE_CACHE_PATH")
+
+def load_profile(path):
+    return load_config(path, DEFAULT_SETTINGS, DEFAULT_CATEGORIES, KIND_WEIGHTS, SETTING_TYPES, SETTING_CHOICES)
+
+def apply_profile(config, names=None):
+    # Sets the profile's settings, putting back the default of any it leaves
+    # out, and its categories; with `names` only those settings change.
+    # Returns (applied, pending) lists of changed setting names
+    global CATEGORIES, KEYWORD_WEIGHTS, KEYWORD_KINDS, SCORER, KEYWORD_MATCHER
+    settings = dict(DEFAULT_SETTINGS, **copy.deepcopy(config.settings))
+    for name in ("OUTPUT_DIR",) + PATH_SETTINGS:
+        default = DEFAULT_SETTINGS[name]
+        if name in config.settings:
+            settings[name] = settings[name] and os.path.expanduser(settings[name])
+        elif name != "OUTPUT_DIR" and default and os.path.dirname(default) == DEFAULT_SETTINGS["OUTPUT_DIR"]:
+            settings[name] = os.path.join(settings["OUTPUT_DIR"], os.path.basename(default))
+    applied, pending = [], []
+    for name, value in settings.items():
+        if globals()[name] == value:
+            continue
+        if names is None or name in names:
+            globals()[name] = value
+            applied.append(name)
+        else:
+            pending.append(name)
+    rescore = "SCAM_SCORE_THRESHOLD" in applied
+    # Left over from an earlier live reload: dropped, emptied categories
+    current = {name: cat for name, cat in CATEGORIES.items()
+               if name in config.categories or cat["queries"] or cat["keywords"]}
+    if (config.categories, config.keyword_weights, config.kinds) != (current, KEYWORD_WEIGHTS, KEYWORD_KINDS):
+        categories = copy.deepcopy(config.categories)
+        if names is not None:
+            # A category dropped while crawling stops matching; results in
+            # flight may still name it, so it stays known until restart
+            categories = dict({name: dict(cat, queries=[], keywords=[]) for name, cat in CATEGORIES.items()},
+                              **categories)
+        # CATEGORIES first: the old scorer may still name any category in it
+        CATEGORIES = categories
+        KEYWORD_WEIGHTS = dict(config.keyword_weights)
+        KEYWORD_KINDS = copy.deepcopy(config.kinds)
+        applied.append("categories")
+        rescore = True
+    if rescore:
+        SCORER = build_scorer()
+        KEYWORD_MATCHER = SCORER.matcher
+    return applied, pending
+
+# ==================================================
+# METRICS
+# ==================================================
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+PAGE_LOAD_SECONDS = metrics.histogram("crawl_page_load_seconds", "Time until a page's first results are available")
+SCROLL_SECONDS = metrics.histogram("crawl_scroll_seconds", "One scroll round, including the wait for new results")
+PAGES_CRAWLED = metrics.counter("crawl_pages_total", "Crawled search and channel pages by outcome")
+LINKS_DISCOVERED = metrics.counter("crawl_links_discovered_total", "Result links read from pages, per search query")
+EXTRACT_SECONDS = metrics.histogram("crawl_extract_seconds", "yt-dlp extract_info latency")
+KEYWORD_SECONDS = metrics.histogram("crawl_keyword_check_seconds", "Keyword classification time per video",
+                                    buckets=FAST_BUCKETS)
+VIDEOS_SKIPPED = metrics.counter("crawl_videos_skipped_total", "Discovered links not evaluated again")
+VIDEOS_FILTERED = metrics.counter("crawl_videos_filtered_total", "Rejected videos by reason")
+VIDEOS_SAVED = metrics.counter("crawl_videos_saved_total", "Saved videos per category")
+SCAM_SCORES = metrics.histogram("crawl_scam_score", "Best category score of videos with any keyword hit",
+                                buckets=(0.5, 1, 1.5, 2, 3, 4, 6, 8, 12, 16, 24))
+DOWNLOADS_SKIPPED = metrics.counter("crawl_downloads_skipped_total", "Saved videos not downloaded, by reason")
+METADATA_WRITE_SECONDS = metrics.histogram("crawl_metadata_write_seconds", "Metadata sink write time per record",
+                                           buckets=FAST_BUCKETS)
+
+# ==================================================
+# UTILS
+# ==================================================
+def score_video(title, description="", tags=()):
+    return SCORER.score(title or "", description or "", tags or ())
+
+def video_id_from_url(url):
+    return canonical_video(url)[0]
+
+def extract_hashtags(description: str, tags: list) -> list:
+    hashtags = []
+    if description:
+        hashtags.extend([w for w in description.split() if w.startswith('#')])
+    if tags:
+        hashtags.extend([f"#{tag}" for tag in tags if tag])
+    return list(set(hashtags)) if hashtags else None
+
+_chromedriver_path = None
+
+def setup_driver(headless=None):
+    global _chromedriver_path
+    options = Options()
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--start-maximized")
+    options.add_argument("--disable-notifications")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    if headless is None:
+        headless = HEADLESS
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")  # headless has no screen to maximize to
+        options.add_argument("--disable-gpu")
+    # Resolve the driver binary once instead of once per browser in the pool
+    if _chromedriver_path is None:
+        _chromedriver_path = ChromeDriverManager().install()
+    return webdriver.Chrome(service=Service(_chromedriver_path), options=options)
+
+# ==================================================
+# DISCOVERY
+# ==================================================
+def youtube_shorts_search_url(query):
+    return f"https://www.youtube.com/results?search_query={quote_plus(query)}&sp=EgIYAQ%3D%3D"
+
+def all_search_queries():
+    # Interleave the category lists so small MAX_VIDEOS runs still sample
+    # every category, and drop queries shared between categories.
+    seen = set()
+    queries = []
+    for group in zip_longest(*(cat["queries"] for cat in CATEGORIES.values())):
+        for q in group:
+            if q and q.lower() not in seen:
+                seen.add(q.lower())
+                queries.append(q)
+    return queries
+
+# Result anchors are marked once read, so each scroll only returns the
+# results it added (anchors whose href is not filled in yet are picked up
+# later). Alongside the href, the result's title, view-count text and
+# duration badge are read from its renderer for the pre-filter.
+ANCHOR_SELECTOR = "a#video-title, a.ytd-thumbnail"
+COUNT_ANCHORS_JS = "return document.querySelectorAll(arguments[0]).length;"
+NEW_CANDIDATES_JS = """
+    const RESULT = 'ytd-video-renderer, ytd-reel-item-renderer, ytd-rich-item-renderer, '
+        + 'ytd-grid-video-renderer, ytm-shorts-lockup-view-model, ytm-shorts-lockup-view-model-v2';
+    const text = (box, sel) => Array.from(box.querySelectorAll(sel)).map(e => e.textContent.trim()).join(' ');
+    return Array.from(document.querySelectorAll(arguments[0]))
+        .filter(a => !a.dataset.crawled && a.href)
+        .map(a => {
+            a.dataset.crawled = '1';
+            const box = a.closest(RESULT) || a.parentElement || a;
+            const titleEl = box.querySelector('#video-title, h3');
+            return {
+                href: a.href,
+                title: ((titleEl && (titleEl.getAttribute('title') || titleEl.textContent)) || '').trim(),
+                label: a.getAttribute('aria-label') || (titleEl && titleEl.getAttribute('aria-label')) || '',
+                views: text(box, '#metadata-line span, .inline-metadata-item, .shortsLockupViewModelHostMetadataSubhead'),
+                duration: text(box, 'ytd-thumbnail-overlay-time-status-renderer #text, .badge-shape-wiz__text')
+            };
+        })
+        .filter(c => c.href.includes('shorts/') || c.href.includes('watch?v='));
+"""
+
+# What the results page already tells us about a video, before yt-dlp.
+# `url` is the canonical URL of `video_id`, whatever form the href had.
+Candidate = namedtuple("Candidate", ["video_id", "url", "title", "view_count", "duration"])
+
+VIEW_TEXT_RE = re.compile(r"([\d][\d.,]*)\s*([KMB]?)\s*views?\b", re.IGNORECASE)
+# A whole "m:ss" / "h:mm:ss" token that is not a clock time ("10:00 PM")
+DURATION_RE = re.compile(r"(?<![\w:.])(?:(\d+):)?(\d{1,2}):(\d{2})(?![\w:])(?!\s*[AaPp]\.?[Mm]\b)")
+
+def parse_view_count(text):
+    # "12,345 views", "1.2K views", "3M views", "No views"; None if absent
+    if not text:
+        return None
+    if re.search(r"\bno views\b", text, re.IGNORECASE):
+        return 0
+    m = VIEW_TEXT_RE.search(text)
+    if not m:
+        return None
+    number, suffix = m.group(1), m.group(2).upper()
+    if not suffix:
+        number = number.replace(",", "").replace(".", "")  # "1,234" or "1.234"
+    elif "," in number and "." not in number:
+        number = number.replace(",", ".")  # "1,2K" style decimal comma
+    try:
+        return int(float(number.replace(",", "")) * {"": 1, "K": 1e3, "M": 1e6, "B": 1e9}[suffix])
+    except ValueError:
+        return None
+
+def parse_duration(text):
+    # "0:45" or "1:02:03" from a duration badge; None if absent
+    m = DURATION_RE.search(text or "")
+    if not m:
+        return None
+    hours, minutes, seconds = (int(g) if g else 0 for g in m.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+def to_candidate(raw):
+    video_id, url = canonical_video(raw["href"])
+    return Candidate(
+        video_id=video_id,
+        url=url,
+        title=raw.get("title") or raw.get("label") or "",
+        # only the metadata line: the aria-label also holds the title
+        view_count=parse_view_count(raw.get("views")),
+        duration=parse_duration(raw.get("duration")),
+    )
+
+def prefilter_candidate(candidate):
+    # Cheap checks on search-page data; returns a rejection reason or None.
+    # Missing fields never reject: the full extraction decides those.
+    if not PREFILTER:
+        return None
+    if candidate.view_count is not None and candidate.view_count > MAX_VIEW_COUNT:
+        return "views"
+    if candidate.duration is not None and candidate.duration > 60:
+        return "duration"
+    if PREFILTER_TITLE_KEYWORDS and candidate.title and not KEYWORD_MATCHER.matches(candidate.title):
+        return "title"
+    return None
+
+def wait_for_anchor_count(driver, minimum, timeout):
+    # Poll until at least `minimum` result anchors exist; returns the last count
+    deadline = time.monotonic() + timeout
+    count = driver.execute_script(COUNT_ANCHORS_JS, ANCHOR_SELECTOR)
+    while count < minimum and time.monotonic() < deadline:
+        time.sleep(SCROLL_POLL_INTERVAL)
+        count = driver.execute_script(COUNT_ANCHORS_JS, ANCHOR_SELECTOR)
+    return count
+
+def iter_candidates(driver, url, scroll_rounds=None):
+    # Yields each new video as a Candidate as soon as it shows up in the
+    # DOM, so extraction starts while the page is still being scrolled.
+    # scroll_rounds overrides SCROLL_ROUNDS for this page.
+    rounds = scroll_rounds or SCROLL_ROUNDS
+    with PAGE_LOAD_SECONDS.time(mode="selenium"):
+        driver.get(url)
+        count = wait_for_anchor_count(driver, 1, PAGE_LOAD_TIMEOUT)
+    if not count and is_throttle_url(driver.current_url):
+        raise ThrottledError(f"redirected to {driver.current_url}")
+    seen = set()
+
+    def read_new_candidates():
+        new = []
+        for raw in driver.execute_script(NEW_CANDIDATES_JS, ANCHOR_SELECTOR):
+            candidate = to_candidate(raw)
+            # A video linked from its title and its thumbnail, or as both
+            # watch?v= and shorts/, is one candidate
+            if candidate.video_id and candidate.video_id not in seen:
+                seen.add(candidate.video_id)
+                new.append(candidate)
+        return new
+
+    try:
+        yield from read_new_candidates()
+        stalled = 0
+        for i in range(rounds):
+            if len(seen) >= PAGE_YIELD_TARGET:
+                log.info(f"  Yield target reached ({len(seen)} links)")
+                break
+            with SCROLL_SECONDS.time():
+                driver.execute_script("window.scrollBy(0, document.documentElement.scrollHeight);")
+                grown = wait_for_anchor_count(driver, count + 1, SCROLL_WAIT_TIMEOUT)
+                new = read_new_candidates()
+            log.debug(f"  Scroll {i+1}/{rounds}: +{len(new)} links")
+            yield from new
+            if grown > count:
+                stalled = 0
+                count = grown
+            else:
+                stalled += 1
+                if stalled >= SCROLL_STALL_ROUNDS:
+                    log.info("  Page stopped growing")
+                    break
+    finally:
+        log.info(f"  Found {len(seen)} unique videos")
+
+def iter_video_links(driver, url):
+    for candidate in iter_candidates(driver, url):
+        yield candidate.url
+
+def discover_video_links(driver, url):
+    return list(iter_video_links(driver, url))
+
+# ==================================================
+# METADATA EXTRACTION
+# ==================================================
+# Building a YoutubeDL loads every extractor and opens a fresh HTTP session,
+# so each worker thread keeps one instance (and its pooled connections and
+# cached player data) for the whole crawl instead of one per video.
+EXTRACT_OPTS = {"quiet": True, "skip_download": True, "no_warnings": True}
+
+_ydl_local = threading.local()
+_ydl_instances = []
+_ydl_lock = threading.Lock()
+
+def _new_ydl(opts):
+    ydl = yt_dlp.YoutubeDL(opts)
+    with _ydl_lock:
+        _ydl_instances.append(ydl)
+    return ydl
+
+def get_extractor():
+    ydl = getattr(_ydl_local, "extractor", None)
+    if ydl is None:
+        ydl = _ydl_local.extractor = _new_ydl(EXTRACT_OPTS)
+    return ydl
+
+def close_ydl_instances():
+    with _ydl_lock:
+        instances = list(_ydl_instances)
+        _ydl_instances.clear()
+    for ydl in instances:
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+# Outcome of evaluating one video: meta when it passed every filter,
+# otherwise the rejection reason ("duration", "views", "keywords" for no
+# keyword hit, "score" for hits below SCAM_SCORE_THRESHOLD, "error").
+# The channel fields feed channel scoring for hits and misses alike.
+Evaluation = namedtuple("Evaluation", ["meta", "reason", "view_count", "channel_id", "channel_name"],
+                        defaults=(None, None))
+
+def channel_shorts_url(channel_id):
+    # The /channel/<id> form always resolves, unlike a handle guessed from the display name
+    return f"https://www.youtube.com/channel/{channel_id}/shorts"
+
+def evaluate_video(url):
+    try:
+        with EXTRACT_SECONDS.time():
+            info = get_extractor().extract_info(url, download=False)
+        channel = (info.get("channel_id"), info.get("channel") or info.get("uploader"))
+
+        # Check duration
+        duration = info.get("duration") or 0
+        view_count = info.get("view_count", 0)
+        if duration > 60:
+            return Evaluation(None, "duration", view_count, *channel)
+
+        # Check view count
+        if view_count and view_count > MAX_VIEW_COUNT:
+            log.debug(f"  ⊗ Too many views ({view_count:,} > {MAX_VIEW_COUNT:,}) - skipped")
+            return Evaluation(None, "views", view_count, *channel)
+
+        title = info.get('title', '')
+        description = info.get('description', '')
+        tags = info.get('tags') or []
+        with KEYWORD_SECONDS.time():
+            scored = score_video(title, description, tags)
+        if not scored.scores:
+            return Evaluation(None, "keywords", view_count, *channel)
+        SCAM_SCORES.observe(max(scored.scores.values()))
+        categories = scored.categories
+        if not categories:
+            log.debug(f"  ⊗ Keyword score too low ({scored.scores}) - skipped")
+            return Evaluation(None, "score", view_count, *channel)
+        hashtags = extract_hashtags(description, tags)
+        video_id = info['id']
+        shorts_url = f"https://www.youtube.com/shorts/{video_id}"
+        return Evaluation({
+            "video_id": f"youtube_{video_id}",
+            "platform": "youtube",
+            "video_url": shorts_url,
+            "title": title,
+            "description": description,
+            "uploader": info.get("uploader"),
+            "channel": info.get("channel"),
+            "channel_id": info.get("channel_id"),
+            "channel_url": info.get("channel_url") or info.get("uploader_url"),
+            "upload_date": info.get("upload_date"),
+            "duration": duration,
+            "view_count": view_count,
+            "like_count": info.get("like_count"),
+            "comment_count": info.get("comment_count"),
+            "tags": tags if tags else [],
+            "hashtags": hashtags,
+            "is_short": True,
+            "label": "Scam",
+            "scam_type": CATEGORIES[categories[0]]["scam_type"],
+            "categories": categories,
+            "scam_score": scored.scores[categories[0]],
+            "category_scores": scored.scores,
+            "evidence": [e._asdict() for e in scored.evidence if e.category in categories],
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "scraper_id": WORKER_ID,
+            "thumbnail": info.get("thumbnail"),
+        }, None, view_count, *channel)
+    except yt_dlp.utils.DownloadError as e:
+        if is_throttle_message(str(e)):
+            raise ThrottledError(str(e)) from e  # retried by the pool after the backoff
+        log.error(f"  Error extracting metadata: {e}")
+        return Evaluation(None, "error", None)
+    except Exception as e:
+        log.error(f"  Error extracting metadata: {e}")
+        return Evaluation(None, "error", None)
+
+def extract_metadata(url):
+    return evaluate_video(url).meta
+
+# ==================================================
+# SAVE
+# ==================================================
+_sink = None
+_sink_lock = threading.Lock()
+
+def get_sink():
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = make_sink(METADATA_SINK, OUTPUT_DIR, **SINK_OPTIONS.get(METADATA_SINK, {}))
+        return _sink
+
+def close_sink():
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            _sink.close()
+            _sink = None
+
+def save_metadata(meta):
+    # One record per matching category, each tagged with that category's
+    # scam_type so the per-category outputs keep their existing format.
+    sink = get_sink()
+    for name in meta["categories"]:
+        record = dict(meta, scam_type=CATEGORIES[name]["scam_type"])
+        with METADATA_WRITE_SECONDS.time(sink=METADATA_SINK):
+            written = sink.write(CATEGORIES[name]["folder"], record)
+        if written:
+            log.info(f"  ✓ Saved [{name}]: {meta['video_id']} ({meta['view_count'] or 0:,} views)")
+
+# ==================================================
+# REFRESH
+# ==================================================
+# A refresh only needs the counts and whether the video still exists, so
+# the stream manifests (extra requests per video) and format selection
+# are skipped.
+REFRESH_OPTS = dict(EXTRACT_OPTS, extractor_args={"youtube": {"skip": ["dash", "hls", "translated_subs"]}})
+REFRESH_FIELDS = ("view_count", "like_count", "comment_count")
+
+# status: "live", "removed", "private", "unavailable" or "error" (retry later)
+Refresh = namedtuple("Refresh", ["status", "counts", "error"])
+
+REFRESH_SECONDS = metrics.histogram("crawl_refresh_seconds", "yt-dlp extract_info latency when refreshing")
+VIDEOS_REFRESHED = metrics.counter("crawl_videos_refreshed_total", "Refresh checks by resulting status")
+
+def get_refresher():
+    ydl = getattr(_ydl_local, "refresher", None)
+    if ydl is None:
+        ydl = _ydl_local.refresher = _new_ydl(REFRESH_OPTS)
+    return ydl
+
+def refresh_video(url):
+    try:
+        with REFRESH_SECONDS.time():
+            info = get_refresher().extract_info(url, download=False, process=False)
+    except yt_dlp.utils.DownloadError as e:
+        if is_throttle_message(str(e)):
+            raise ThrottledError(str(e)) from e
+        return Refresh(unavailable_status(str(e)) or "error", {}, str(e))
+    return Refresh("live", {field: info.get(field) for field in REFRESH_FIELDS}, None)
+
+def refresh_saved_videos():
+    tracker = EngagementTracker(FRONTIER_PATH, min_interval_hours=REFRESH_MIN_INTERVAL_HOURS,
+                                max_interval_days=REFRESH_MAX_INTERVAL_DAYS)
+    imported = sum(tracker.import_record(folder, record) for folder, record in iter_records(OUTPUT_DIR))
+    due = tracker.due(REFRESH_LIMIT)
+    log.info(f"Refresh: {imported} newly tracked videos, {len(due)} due for a check")
+    targets = {url: (video_id, folders) for video_id, url, folders in due}
+    # Per-video JSON files get their counts updated; the append-only sinks
+    # keep the values from scrape time and the series lives in the database
+    json_sink = get_sink() if METADATA_SINK == "json" else None
+    changed = 0
+
+    # Runs on the pool's sink thread
+    def handle_refresh(url, result):
+        nonlocal changed
+        video_id, folders = targets[url]
+        if result is None or result.status == "error":
+            tracker.record_failure(video_id)
+            VIDEOS_REFRESHED.inc(status="error")
+            log.warning(f"  ⚠ Refresh failed, retrying later: {video_id}" + (f" ({result.error})" if result else ""))
+            return
+        previous = tracker.record_check(video_id, result.status, **result.counts)
+        VIDEOS_REFRESHED.inc(status=result.status)
+        if previous != result.status:
+            changed += 1
+            log.info(f"  {'↺' if result.status == 'live' else '✗'} {video_id}: {previous} -> {result.status}")
+        else:
+            log.debug(f"  ↻ {video_id}: {result.counts}")
+        if json_sink:
+            fields = dict(result.counts, availability=result.status,
+                          refreshed_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+            for folder in folders:
+                json_sink.update(folder, video_id, fields)
+
+    metrics_server, metrics_snapshot = start_metrics()
+    pool = ExtractionPool(
+        refresh_video, handle_refresh,
+        workers=EXTRACT_WORKERS, queue_size=EXTRACT_QUEUE_SIZE, rate_limiter=make_rate_limiter(),
+        throttle_retries=THROTTLE_RETRIES,
+    ).start()
+    try:
+        for url in targets:
+            pool.submit(url)
+        pool.close()
+    except KeyboardInterrupt:
+        log.warning("⚠ Interrupted by user")
+        pool.close(cancel=True)
+    finally:
+        close_ydl_instances()
+        close_sink()
+        log.info(f"Refreshed {len(targets)} videos, {changed} changed status")
+        log.info(f"Tracked videos: {tracker.status_counts()}")
+        growing = tracker.fastest_growing(5)
+        if growing:
+            log.info("Fastest growing:")
+            for video_id, views, per_day in growing:
+                log.info(f"  {video_id}: {views or 0:,} views (+{per_day:,.0f}/day)")
+        tracker.close()
+        if metrics_snapshot:
+            metrics_snapshot.close()
+        if metrics_server:
+            metrics_server.shutdown()
+
+def video_paths(video_id, categories):
+    # First path is downloaded, the other categories get links to it
+    return [os.path.join(OUTPUT_DIR, "videos", CATEGORIES[name]["folder"], f"{video_id}.mp4")
+            for name in categories]
+
+# ==================================================
+# MAIN CRAWLER
+# ==================================================
+def setup_logging():
+    # Console gets LOG_LEVEL as plain messages, the log file everything;
+    # returns the console handler so a reload can change its level
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    console = logging.StreamHandler()
+    console.setLevel(LOG_LEVEL)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(console)
+    if LOG_FILE:
+        os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+        handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"))
+        root.addHandler(handler)
+    # Selenium and urllib3 log every request at DEBUG
+    for name in ("selenium", "urllib3", "asyncio", "WDM"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return console
+
+def make_scheduler():
+    return QueryScheduler(SEARCH_PAGE_PRIORITY, SCROLL_ROUNDS, QUERY_MIN_SCROLL_ROUNDS, QUERY_MAX_SCROLL_ROUNDS,
+                          retire_after_links=QUERY_RETIRE_AFTER_LINKS, retire_below=QUERY_RETIRE_HIT_RATE,
+                          retry_after_days=QUERY_RETRY_DAYS)
+
+def make_rate_limiter():
+    return AdaptiveRateLimiter(ENDPOINT_RATES, ENDPOINT_MIN_RATES, ENDPOINT_MAX_RATES, increase=RATE_INCREASE,
+                               backoff=THROTTLE_BACKOFF, max_backoff=THROTTLE_MAX_BACKOFF, jitter=HOST_JITTER)
+
+def start_metrics():
+    server = None
+    if METRICS_PORT:
+        try:
+            server = metrics.serve_http(METRICS_PORT)
+            log.info(f"Metrics: http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            log.warning(f"⚠ Metrics endpoint not started on port {METRICS_PORT}: {e}")
+    snapshot = None
+    if METRICS_SNAPSHOT_PATH:
+        snapshot = metrics.SnapshotWriter(METRICS_SNAPSHOT_PATH, METRICS_SNAPSHOT_INTERVAL).start()
+    return server, snapshot
+
+def main(config_file=None):
+    config_file = config_file or CONFIG_FILE
+    if config_file:
+        try:
+            config = load_profile(config_file)
+        except ConfigError as e:
+            raise SystemExit(f"✗ Config error: {e}")
+        apply_profile(config)
+    console = setup_logging()
+    if config_file:
+        log.info(f"Config: {os.path.abspath(config_file)} ({len(config.files) - 1} keyword packs)")
+    if REFRESH_MODE:
+        refresh_saved_videos()
+        return
+    log.info("=" * 70)
+    log.info("YouTube Shorts Multi-Category Scam Scraper")
+    log.info(f"Categories: {', '.join(CATEGORIES)}")
+    log.info(f"Max views: {MAX_VIEW_COUNT:,}")
+    if DISCOVERY_MODE == "http":
+        log.info(f"Extraction workers: {EXTRACT_WORKERS}, HTTP discovery workers: {HTTP_DISCOVERY_WORKERS}")
+    else:
+        log.info(f"Extraction workers: {EXTRACT_WORKERS}, browsers: {DISCOVERY_BROWSERS}")
+    log.info("=" * 70)
+    metrics_server, metrics_snapshot = start_metrics()
+    frontier = CrawlFrontier(FRONTIER_PATH, channel_half_life_days=CHANNEL_HALF_LIFE_DAYS,
+                             channel_expected_shorts=CHANNEL_EXPECTED_SHORTS)
+    if not RESUME:
+        frontier.reset_pages()
+    coordinator = None
+    scroll_budgets = {}  # query -> scroll rounds (continuations in http mode)
+
+    # Also reruns after a reload: new queries are queued, pending searches
+    # of dropped or retired queries set aside, and crawled pages keep their
+    # state unless `new_pass` queues them again. With QUERY_SCHEDULING,
+    # priorities and scroll budgets come from what each query yielded in
+    # earlier runs. Returns (plans, retired).
+    def seed_searches(new_pass=False):
+        queries = all_search_queries()
+        if QUERY_SCHEDULING:
+            plans = make_scheduler().plan(queries, frontier.query_stats())
+        else:
+            plans = [QueryPlan(q, SEARCH_PAGE_PRIORITY, SCROLL_ROUNDS, False, None) for q in queries]
+        active = [plan for plan in plans if not plan.retired]
+        scroll_budgets.clear()
+        scroll_budgets.update((plan.query, plan.scroll_rounds) for plan in active)
+        for plan in active:
+            url = youtube_shorts_search_url(plan.query)
+            frontier.schedule_search(url, plan.query, plan.priority, repeat=new_pass)
+            if coordinator:
+                coordinator.add_page(url, "search", plan.query, priority=plan.priority)
+        retired = frontier.retire_searches([plan.query for plan in active])
+        if coordinator:
+            # The shared queue has its own copy of every search
+            for url in set(retired) | {youtube_shorts_search_url(p.query) for p in plans if p.retired}:
+                coordinator.retire(url)
+        return plans, len(retired)
+
+    if COORDINATOR:
+        # Every host seeds the same searches; the shared queue keeps one copy of each
+        coordinator = open_coordinator(COORDINATOR, WORKER_ID, COORDINATOR_LEASE_SECONDS).start()
+    # Once the last pass crawled every search, a resumed run starts the next
+    # one in the scheduler's order
+    plans, _ = seed_searches(new_pass=RESUME and not frontier.pending_searches())
+    if QUERY_SCHEDULING and any(plan.hits_per_hour for plan in plans):
+        active = [plan for plan in plans if not plan.retired]
+        log.info(f"Query schedule: {len(active)} queries, {len(plans) - len(active)} retired; first: "
+                 + ", ".join(f"{p.query} ({p.hits_per_hour:g} hits/h, {p.scroll_rounds} scrolls)" for p in active[:3]))
+    if coordinator:
+        log.info(f"Coordinator: working as {WORKER_ID} with {len(coordinator.workers()) - 1} other active workers")
+    rejected = NegativeCache(NEGATIVE_CACHE_PATH, ttls=NEGATIVE_CACHE_TTLS)
+    # IDs met in this run; a hit is confirmed against the frontier, where
+    # videos filtered by earlier runs do not count so that a false positive
+    # still reaches requeue_filtered. Videos another host claimed have no
+    # frontier row here and are confirmed from claimed_elsewhere instead.
+    run_started = time.time()
+    claimed_elsewhere = set()
+    seen_ids = SeenVideos(lambda video_id: video_id in claimed_elsewhere
+                          or frontier.seen_video(video_id, filtered_since=run_started),
+                          SEEN_FILTER_CAPACITY, SEEN_FILTER_ERROR_RATE)
+    log.info(f"Negative cache: {len(rejected)} entries ({rejected.purge_expired()} expired entries purged)")
+    collected = frontier.video_counts().get("saved", 0)
+    per_category = {name: 0 for name in CATEGORIES}
+    per_category.update(frontier.category_counts())
+    if collected:
+        log.info(f"Resuming from {FRONTIER_PATH}: {collected} videos already collected")
+
+    # Runs on the pool's single sink thread, behind the extraction workers
+    def handle_result(video_url, result):
+        nonlocal collected
+        video_id = video_id_from_url(video_url)
+        if result is None:
+            # Still throttled after THROTTLE_RETRIES; stays queued for the next run
+            VIDEOS_SKIPPED.inc(reason="throttled")
+            return
+        meta = result.meta
+        if result.channel_id:
+            score, added = frontier.record_channel_video(
+                result.channel_id, channel_shorts_url(result.channel_id), bool(meta), result.channel_name
+            )
+            if added:
+                log.info(f"  + Added channel Shorts to queue: {result.channel_name} (score {score:.2f})")
+            if coordinator:
+                # The score only reflects this host's videos of the channel
+                if meta:
+                    coordinator.add_page(channel_shorts_url(result.channel_id), "channel", result.channel_id, score)
+                else:
+                    coordinator.set_priority(channel_shorts_url(result.channel_id), score)
+        if not meta:
+            VIDEOS_FILTERED.inc(reason=result.reason)
+            frontier.record_video(video_id, "filtered", result.reason)
+            rejected.add(video_id, result.reason, result.view_count)
+            log.debug(f"  ⊗ Filtered out ({result.reason}): {video_url}")
+            return
+        if collected >= MAX_VIDEOS:
+            return  # stays queued so a later run with a higher MAX_VIDEOS picks it up
+        save_metadata(meta)
+        if dedup:
+            dedup.add_video(meta["video_id"], meta.get("thumbnail"))
+        if downloads and meta["scam_score"] < DOWNLOAD_MIN_SCORE:
+            DOWNLOADS_SKIPPED.inc(reason="score")
+            log.debug(f"  Score {meta['scam_score']:.2f} below DOWNLOAD_MIN_SCORE, metadata only: {video_url}")
+        elif downloads:
+            # With triage the download waits until its thumbnail turned out novel
+            if downloads.submit(meta["video_id"], video_url, video_paths(meta["video_id"], meta["categories"]),
+                                hold=triage is not None):
+                if triage:
+                    triage.submit(meta["video_id"], meta.get("thumbnail"))
+        frontier.record_video(video_id, "saved", categories=meta["categories"])
+        collected += 1
+        for name in meta["categories"]:
+            per_category[name] = per_category.get(name, 0) + 1
+            VIDEOS_SAVED.inc(category=name)
+        log.info(f"  ✓ Total collected: {collected}/{MAX_VIDEOS} ({', '.join(meta['categories'])}, "
+                 f"score {meta['scam_score']:.1f})")
+
+    # With a coordinator, pages are leased from the shared queue; the local
+    # frontier still records them for channel stats and query progress
+    def next_page():
+        if not coordinator:
+            return frontier.next_page()
+        while True:
+            page = coordinator.lease()
+            if page is None:
+                return None
+            if page[1] != "search" or page[2] in scroll_budgets:
+                frontier.take_page(*page)
+                return page
+            # A search this host retired, queued again by another host
+            coordinator.retire(page[0])
+
+    def finish_page(page_url, links_found=None, failed=False):
+        frontier.finish_page(page_url, links_found, failed)
+        if coordinator and failed:
+            coordinator.fail(page_url)
+        elif coordinator:
+            coordinator.complete(page_url, links_found)
+
+    def release_page(page_url):
+        frontier.release_page(page_url)
+        if coordinator:
+            coordinator.release(page_url)
+
+    def crawl_candidates(page, candidates, started=None):
+        page_url, kind, query = page
+        links_found = 0
+        started = started or time.monotonic()
+        finished = False
+        try:
+            for candidate in candidates:
+                links_found += 1
+                if collected >= MAX_VIDEOS:
+                    release_page(page_url)
+                    PAGES_CRAWLED.inc(kind=kind, outcome="released")
+                    return
+                video_id, video_url = candidate.video_id, candidate.url
+                if not video_id:
+                    VIDEOS_SKIPPED.inc(reason="invalid")
+                    continue
+                # Repeats within the run stop here, before any cache, frontier
+                # or coordinator round trip
+                if video_id in seen_ids:
+                    VIDEOS_SKIPPED.inc(reason="seen")
+                    continue
+                if rejected.get(video_id, MAX_VIEW_COUNT):
+                    VIDEOS_SKIPPED.inc(reason="cached")
+                    continue
+                if coordinator and not coordinator.claim_video(video_id):
+                    # another host evaluates it; not asked about again
+                    claimed_elsewhere.add(video_id)
+                    seen_ids.add(video_id)
+                    VIDEOS_SKIPPED.inc(reason="claimed")
+                    continue
+                seen_ids.add(video_id)  # has a frontier row from here on
+                if not frontier.mark_video_queued(video_id, video_url, page_url):
+                    # Known video: only a filtered one whose cache entry expired goes again
+                    if not frontier.requeue_filtered(video_id):
+                        VIDEOS_SKIPPED.inc(reason="seen")
+                        continue
+                reason = prefilter_candidate(candidate)
+                if reason:
+                    VIDEOS_FILTERED.inc(reason=f"prefilter:{reason}")
+                    frontier.record_video(video_id, "filtered", f"prefilter:{reason}")
+                    rejected.add(video_id, reason, candidate.view_count)
+                    log.debug(f"  ⊘ Pre-filtered ({reason}): {video_url}")
+                    continue
+                log.debug(f"  → Queued for extraction: {video_url}")
+                pool.submit(video_url)
+            finish_page(page_url, links_found)
+            PAGES_CRAWLED.inc(kind=kind, outcome="done")
+            finished = True
+        finally:
+            # Channel pages have no query of their own
+            LINKS_DISCOVERED.inc(links_found, kind=kind, query=query if kind == "search" else "")
+            if kind == "search":
+                frontier.record_query_crawl(query, links_found, time.monotonic() - started, finished)
+
+    def scroll_budget(page):
+        return scroll_budgets.get(page[2]) if page[1] == "search" else None
+
+    # Runs on a browser thread of the discovery pool
+    def crawl_page(driver, page):
+        log.info(f"[>] Crawling: {page[0]}")
+        rate_limiter.wait(page[0])
+        try:
+            crawl_candidates(page, iter_candidates(driver, page[0], scroll_budget(page)))
+        except ThrottledError as e:
+            rate_limiter.report(page[0], throttled=True)
+            page_throttled(page, e)
+            return
+        rate_limiter.report(page[0])
+
+    # Runs on a worker thread of the HTTP discovery client
+    def fetch_page(client, page):
+        log.info(f"[>] Fetching: {page[0]}")
+        started = time.monotonic()
+        try:
+            with PAGE_LOAD_SECONDS.time(mode="http"):
+                raws = client.iter_candidates(page[0], scroll_budget(page))
+        except ThrottledError as e:
+            page_throttled(page, e)  # the client already reported it
+            return
+        except Exception as e:
+            log.warning(f"  ⚠ HTTP discovery failed, handing the page to a browser: {e}")
+            browsers.submit(page)
+            return
+        crawl_candidates(page, map(to_candidate, raws), started)
+
+    # The page goes back to the queue and waits out the endpoint's backoff
+    def page_throttled(page, error):
+        log.warning(f"  ⚠ Throttled, page queued again: {error}")
+        release_page(page[0])
+        PAGES_CRAWLED.inc(kind=page[1], outcome="throttled")
+
+    def page_failed(page, error):
+        log.error(f"  Error discovering links: {error}")
+        finish_page(page[0], failed=True)
+        PAGES_CRAWLED.inc(kind=page[1], outcome="failed")
+
+    # Run on the download worker threads
+    def thumbnail_is_new(job):
+        canonical = dedup.match_thumbnail(job.video_id)
+        if canonical:
+            log.info(f"  ⊘ Thumbnail matches {canonical}, download skipped: {job.video_id}")
+        return canonical is None
+
+    def dedup_download(job, path):
+        canonical = dedup.process_download(job.video_id, job.paths)
+        if canonical:
+            log.info(f"  ≈ Re-upload of {canonical}, linked to its copy: {job.video_id}")
+
+    # Run on the triage thread
+    def queue_download(video_id):
+        downloads.release(video_id)
+
+    def skip_download(video_id, canonical):
+        downloads.skip(video_id)
+        log.info(f"  ⊘ Thumbnail matches {canonical}, download skipped: {video_id}")
+
+    # Extraction, discovery, thumbnails and downloads share one adaptive
+    # budget per endpoint class
+    rate_limiter = make_rate_limiter()
+    downloads = None
+    dedup = None
+    if DOWNLOAD_VIDEOS and DEDUP_VIDEOS:
+        if ffmpeg_available():
+            dedup = MediaDeduplicator(
+                FRONTIER_PATH, samples=DEDUP_FRAME_SAMPLES, frame_distance=DEDUP_FRAME_DISTANCE,
+                thumb_distance=DEDUP_THUMB_DISTANCE,
+            )
+        else:
+            log.warning("⚠ Deduplication needs ffmpeg on PATH, downloads are not deduplicated")
+    if DOWNLOAD_VIDEOS:
+        # Download state lives in its own table of the frontier database
+        downloads = DownloadManager(
+            FRONTIER_PATH, workers=DOWNLOAD_WORKERS, bandwidth_limit=DOWNLOAD_BANDWIDTH_LIMIT,
+            max_retries=DOWNLOAD_RETRIES, retry_backoff=DOWNLOAD_RETRY_BACKOFF,
+            on_done=dedup_download if dedup else None, rate_limiter=rate_limiter,
+        ).start()
+    triage = None
+    if dedup and DEDUP_SKIP_BY_THUMBNAIL:
+        if aiohttp is not None:
+            triage = ThumbnailTriage(
+                dedup, queue_download, skip_download,
+                templates_dir=SCAM_TEMPLATES_DIR, template_distance=TRIAGE_TEMPLATE_DISTANCE,
+                batch_size=TRIAGE_BATCH_SIZE, connections=TRIAGE_CONNECTIONS, rate_limiter=rate_limiter,
+            ).start()
+            log.info(f"Thumbnail triage: {triage.templates.size} scam templates")
+        else:
+            # Without aiohttp each thumbnail is checked right before its download
+            log.warning("⚠ Batched thumbnail triage needs aiohttp, checking thumbnails one by one")
+            downloads.should_download = thumbnail_is_new
+    if downloads:
+        # Downloads a previous run held for triage that never got a verdict
+        for video_id in downloads.held():
+            if triage:
+                triage.submit(video_id, dedup.thumbnail_url(video_id))
+            else:
+                downloads.release(video_id)
+    pool = ExtractionPool(
+        evaluate_video, handle_result,
+        workers=EXTRACT_WORKERS, queue_size=EXTRACT_QUEUE_SIZE, rate_limiter=rate_limiter,
+        throttle_retries=THROTTLE_RETRIES,
+    ).start()
+    http_mode = DISCOVERY_MODE == "http"
+    if http_mode and aiohttp is None:
+        log.warning("⚠ HTTP discovery needs aiohttp (pip install aiohttp), using Selenium")
+        http_mode = False
+    # Browsers start lazily, so in http mode Chrome only launches for a fallback page
+    browsers = DriverPool(
+        setup_driver, crawl_page, on_error=page_failed,
+        size=HTTP_FALLBACK_BROWSERS if http_mode else DISCOVERY_BROWSERS,
+        recycle_after=BROWSER_RECYCLE_PAGES,
+    ).start()
+    discovery = browsers
+    if http_mode:
+        discovery = HttpDiscovery(
+            fetch_page, on_error=page_failed,
+            workers=HTTP_DISCOVERY_WORKERS, connections=HTTP_CONNECTIONS,
+            max_continuations=SCROLL_ROUNDS, yield_target=PAGE_YIELD_TARGET, timeout=PAGE_LOAD_TIMEOUT + 5,
+            rate_limiter=rate_limiter, base_url=HTTP_DISCOVERY_BASE_URL,
+        ).start()
+    metrics.gauge("crawl_extraction_pending", "Links queued or being extracted", lambda: pool.pending)
+    metrics.gauge("crawl_discovery_busy", "Pages being crawled", lambda: discovery.busy + (
+        browsers.busy if discovery is not browsers else 0))
+    metrics.gauge("crawl_videos_collected", "Saved videos, including earlier runs", lambda: collected)
+    if downloads:
+        metrics.gauge("crawl_downloads_pending", "Downloads queued or in progress", lambda: downloads.pending)
+    if triage:
+        metrics.gauge("crawl_triage_pending", "Thumbnails waiting for triage", lambda: triage.pending)
+
+    # Runs on the config watcher thread
+    def reload_config(config):
+        applied, pending = apply_profile(config, LIVE_SETTINGS)
+        if "EXTRACT_WORKERS" in applied:
+            pool.resize(EXTRACT_WORKERS)
+        rate_limiter.configure(ENDPOINT_RATES, ENDPOINT_MIN_RATES, ENDPOINT_MAX_RATES, jitter=HOST_JITTER)
+        rate_limiter.increase = RATE_INCREASE
+        rate_limiter.backoff, rate_limiter.max_backoff = THROTTLE_BACKOFF, THROTTLE_MAX_BACKOFF
+        pool.throttle_retries = THROTTLE_RETRIES
+        if http_mode:
+            discovery.max_continuations = SCROLL_ROUNDS
+            discovery.yield_target = PAGE_YIELD_TARGET
+        if "NEGATIVE_CACHE_TTLS" in applied:
+            rejected.ttls.update(NEGATIVE_CACHE_TTLS)
+        if "LOG_LEVEL" in applied:
+            console.setLevel(LOG_LEVEL)
+        if {"categories", "SEARCH_PAGE_PRIORITY", "SCROLL_ROUNDS"} & set(applied) or any(
+                name.startswith("QUERY_") for name in applied):
+            _, retired = seed_searches()
+            if retired:
+                log.info(f"  Set aside {retired} pending searches of unlisted or retired queries")
+        log.info(f"[~] Config reloaded: {', '.join(applied) or 'no live changes'}")
+        if pending:
+            log.warning(f"  ⚠ Restart to apply: {', '.join(pending)}")
+
+    watcher = None
+    if config_file:
+        watcher = ConfigWatcher(lambda: load_profile(config_file), config.files, reload_config,
+                                interval=CONFIG_RELOAD_INTERVAL).start()
+    try:
+        # Videos a previous run queued but never finished go first
+        for video_id, video_url in frontier.queued_videos():
+            if collected >= MAX_VIDEOS:
+                break
+            seen_ids.add(video_id)
+            pool.submit(video_url)
+        while collected < MAX_VIDEOS:
+            page = next_page()
+            if not page:
+                # Pages in flight (here or on other hosts) or results still
+                # being processed may add channels
+                if discovery.busy or browsers.busy or pool.pending or (coordinator and coordinator.leased_count()):
+                    time.sleep(0.5)
+                    continue
+                page = next_page()
+                if not page:
+                    break
+            discovery.submit(page)
+        if discovery is not browsers:
+            discovery.close()
+        browsers.close()
+        pool.close(cancel=collected >= MAX_VIDEOS)
+        if triage:
+            triage.close()
+        if downloads and downloads.pending:
+            log.info(f"Waiting for {downloads.pending} downloads to finish...")
+        if downloads:
+            downloads.close()
+        log.info("=" * 70)
+        log.info(f"✓ Scraping complete! Collected {collected} scam Shorts")
+        log.info("=" * 70)
+    except KeyboardInterrupt:
+        log.warning("⚠ Interrupted by user")
+        if discovery is not browsers:
+            discovery.close(cancel=True)
+        browsers.close(cancel=True)
+        pool.close(cancel=True)
+        if triage:
+            triage.close(cancel=True)
+        if downloads:
+            downloads.close(cancel=True)
+    except Exception as e:
+        log.error(f"✗ Fatal error: {e}")
+        if discovery is not browsers:
+            discovery.close(cancel=True)
+        browsers.close(cancel=True)
+        pool.close(cancel=True)
+        if triage:
+            triage.close(cancel=True)
+        if downloads:
+            downloads.close(cancel=True)
+    finally:
+        if watcher:
+            watcher.close()
+        close_ydl_instances()
+        close_sink()
+        top_channels = [c for c in frontier.top_channels(5) if c[2]]
+        query_stats = sorted((s for s in frontier.query_stats().values() if s.hits),
+                             key=lambda s: -s.hits / max(s.seconds, 1))[:5]
+        frontier.close()
+        if coordinator:
+            shared_pages = coordinator.page_counts()
+            coordinator.close()
+        rejected.close()
+        log.info(f"Final count: {collected} videos")
+        for name, count in per_category.items():
+            log.info(f"  {name}: {count}")
+        if downloads:
+            log.info(f"Downloads: {downloads.status_counts()} ({downloads.bytes_downloaded / 1e6:.1f} MB this run)")
+        if triage:
+            log.info(f"Thumbnail triage: {triage.counts}")
+        if dedup:
+            log.info(f"Duplicates: {dedup.duplicate_count()} videos in {dedup.cluster_count()} clusters")
+            dedup.close()
+        if top_channels:
+            log.info("Top channels:")
+            for channel_id, name, hits, evaluated, score in top_channels:
+                log.info(f"  {name or channel_id}: {hits}/{evaluated} hits (score {score:.2f})")
+        if query_stats:
+            log.info("Top queries (all runs):")
+            for s in query_stats:
+                log.info(f"  {s.query}: {s.hits} hits of {s.new} new links in {s.seconds / 60:.1f} min")
+        if browsers.restarts:
+            log.info(f"Browser restarts: {browsers.restarts}")
+        if coordinator:
+            log.info(f"Shared queue: {shared_pages}")
+        log.info(f"Request rates: {rate_limiter.rates()} req/s, "
+                 f"{int(sum(REQUESTS_THROTTLED.snapshot().values()))} throttling signals")
+        log.info(f"Seen-ID filter: {len(seen_ids)} IDs in {seen_ids.nbytes / 1024:.0f} KB, "
+                 f"{seen_ids.false_positives} false positives")
+        extract = EXTRACT_SECONDS.snapshot().get("total")
+        if extract:
+            log.info(f"Extraction: {extract['count']} calls, p50 {extract['p50']:.2f}s, p99 {extract['p99']:.2f}s")
+        if metrics_snapshot:
+            metrics_snapshot.close()
+            log.info(f"Metrics snapshot: {METRICS_SNAPSHOT_PATH}")
+        if metrics_server:
+            metrics_server.shutdown()
+        log.info(f"Crawl state: {FRONTIER_PATH}")
+        log.info(f"Output directory: {os.path.abspath(OUTPUT_DIR)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl YouTube Shorts for every scam category at once.")
+    parser.add_argument("--config", help="TOML, YAML or JSON profile overriding the settings at the top of "
+                                         "this file (default: $VIDEO_CRAWLER_CONFIG)")
+    main(parser.parse_args().config)
@@ -0,0 +1,160 @@
+import math
+import re
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+
+# ==================================================
+# VIDEO ID CANONICALIZATION
+# ==================================================
+# The same video shows up under many hrefs: watch?v=X, shorts/X, youtu.be/X,
+# embeds, m.youtube.com, and with &pp=, &t= or list parameters attached.
+# canonical_video() reduces any of them to the 11-character video ID and one
+# canonical URL per ID (a Shorts URL for Shorts links, a watch URL for
+# everything else), so dedup works on IDs before anything is fetched.
+
+VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+YOUTUBE_HOSTS = ("youtube.com", "youtube-nocookie.com")
+ID_PATH_PREFIXES = ("shorts", "embed", "live", "v", "e")
+
+
+def _is_youtube(host):
+    return any(host == h or host.endswith("." + h) for h in YOUTUBE_HOSTS)
+
+
+def _valid(video_id):
+    return video_id if video_id and VIDEO_ID_RE.match(video_id) else None
+
+
+def canonical_video(href):
+    # (video_id, canonical url), or (None, None) for links that are not a
+    # single YouTube video (channels, playlists, other sites)
+    parsed = urlparse((href or "").strip())
+    host = (parsed.hostname or "www.youtube.com").lower()
+    parts = [p for p in parsed.path.split("/") if p]
+    video_id = None
+    shorts = False
+    if host == "youtu.be":
+        video_id = _valid(parts[0]) if parts else None
+    elif _is_youtube(host):
+        if parts and parts[0] == "watch":
+            video_id = _valid(parse_qs(parsed.query).get("v", [None])[0])
+        elif len(parts) >= 2 and parts[0] in ID_PATH_PREFIXES:
+            video_id = _valid(parts[1])
+            shorts = parts[0] == "shorts"
+    if not video_id:
+        return None, None
+    if shorts:
+        return video_id, f"https://www.youtube.com/shorts/{video_id}"
+    return video_id, f"https://www.youtube.com/watch?v={video_id}"
+
+
+def canonical_video_id(href):
+    return canonical_video(href)[0]
+
+
+# ==================================================
+# SEEN-VIDEO FILTER
+# ==================================================
+# Discovery meets the same IDs over and over (every search and channel page
+# overlaps), and each repeat used to cost a negative-cache read, a frontier
+# write and, with a coordinator, a round trip to the shared store. SeenVideos
+# answers "already handled in this run?" from memory: a Bloom filter at
+# about 2 bytes per ID, growing by chained filters with halved error rates
+# so the combined false-positive rate stays under `error_rate` however many
+# IDs a run meets. A filter hit is confirmed against an exact store (the
+# frontier), so a false positive costs one lookup and never drops a video.
+
+LN2 = math.log(2)
+
+
+def _hash_pair(item):
+    # Two 64-bit hashes from one digest; filter positions are h1 + i * h2
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(64, int(math.ceil(-self.capacity * math.log(error_rate) / LN2 ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * LN2))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _has(self, pair):
+        h1, h2 = pair
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def _add(self, pair):
+        h1, h2 = pair
+        bits, size = self._bits, self.size
+        new = False
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, item):
+        return self._has(_hash_pair(item))
+
+    def add(self, item) -> bool:
+        # True if the item was definitely not in the filter before
+        return self._add(_hash_pair(item))
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+
+class SeenVideos:
+    def __init__(self, exact=None, capacity=100_000, error_rate=0.001):
+        self.exact = exact  # exact(video_id) -> bool confirms a filter hit; None trusts the filter
+        self._filters = [BloomFilter(capacity, error_rate / 2)]
+        self._lock = threading.Lock()
+        self.false_positives = 0
+
+    def _probably_seen(self, pair):
+        return any(f._has(pair) for f in self._filters)
+
+    def __contains__(self, video_id):
+        pair = _hash_pair(video_id)
+        with self._lock:
+            if not self._probably_seen(pair):
+                return False
+        if self.exact is None or self.exact(video_id):
+            return True
+        with self._lock:
+            self.false_positives += 1
+        return False
+
+    def add(self, video_id):
+        pair = _hash_pair(video_id)
+        with self._lock:
+            if self._probably_seen(pair):
+                return
+            current = self._filters[-1]
+            if current.count >= current.capacity:
+                current = BloomFilter(current.capacity * 2, current.error_rate / 2)
+                self._filters.append(current)
+            current._add(pair)
+
+    def __len__(self):
+        with self._lock:
+            return sum(f.count for f in self._filters)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(f.nbytes for f in self._filters)
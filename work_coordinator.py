@@ -0,0 +1,455 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from urllib.parse import urlparse
+
+try:
+    import redis
+except ImportError:  # only needed for COORDINATOR = "redis://..."
+    redis = None
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# MULTI-HOST WORK COORDINATOR
+# ==================================================
+# Lets several crawler hosts split one crawl. The coordinator holds the
+# shared page queue (search queries and channel Shorts pages) and a store of
+# claimed video IDs:
+#
+#   lease()          hands the highest-priority pending page to this worker
+#                    for `lease_seconds`
+#   heartbeats       a background thread renews the worker's leases, so a
+#                    long page is not taken away while it is being crawled
+#   expired leases   (the host died or hung) put the page back in the queue
+#                    the next time any worker asks for work
+#   claim_video()    the first worker to claim a video ID evaluates it, the
+#                    others skip it
+#
+# Two backends with the same methods:
+#
+#   SqliteCoordinator  one SQLite file on a shared filesystem. Uses a
+#                      rollback journal, since WAL does not work across
+#                      network filesystems.
+#   RedisCoordinator   any Redis-compatible server. Leases use WATCH/MULTI
+#                      transactions (no Lua), so an in-process stand-in such
+#                      as fakeredis.FakeRedis() can replace the server in tests.
+#
+# Page status: pending -> leased -> done | failed (leased -> pending on
+# release, expiry, or a failure with attempts left). retire() sets a page
+# aside as `retired` (a search whose query was retired); add_page() queues
+# it again.
+
+
+def open_coordinator(url, worker_id, lease_seconds=300, max_attempts=3):
+    # "redis://host:6379/0", "sqlite:///path/coordinator.sqlite3" or a plain path
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if redis is None:
+            raise RuntimeError("The Redis coordinator needs the redis package: pip install redis")
+        return RedisCoordinator(redis.Redis.from_url(url), worker_id, lease_seconds, max_attempts)
+    path = urlparse(url).path if url.startswith("sqlite://") else url
+    return SqliteCoordinator(path, worker_id, lease_seconds, max_attempts)
+
+
+class _Heartbeat:
+    # Renews the worker's leases every third of the lease time
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="coordinator-heartbeat", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.coordinator.lease_seconds / 3):
+            try:
+                self.coordinator.heartbeat()
+            except Exception as e:
+                log.warning(f"  ⚠ Coordinator heartbeat failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_pages (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    query TEXT,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker_id TEXT,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    links_found INTEGER,
+    added_at REAL NOT NULL,
+    done_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_work_pages_pending ON work_pages(status, priority DESC, added_at);
+CREATE INDEX IF NOT EXISTS idx_work_pages_leases ON work_pages(status, lease_expires_at);
+CREATE TABLE IF NOT EXISTS claimed_videos (
+    video_id TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    claimed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+
+class SqliteCoordinator:
+    def __init__(self, path, worker_id, lease_seconds=300, max_attempts=3):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._heartbeat = _Heartbeat(self)
+        # Other hosts hold the write lock briefly; wait for it instead of failing
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=DELETE")
+            self._conn.executescript(SCHEMA)
+
+    def _transaction(self, fn):
+        # BEGIN IMMEDIATE takes the file's write lock up front, so two hosts
+        # can never lease the same page
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def start(self):
+        now = time.time()
+        self._execute("INSERT OR REPLACE INTO workers (worker_id, started_at, heartbeat_at) VALUES (?, ?, ?)",
+                      (self.worker_id, now, now))
+        self._heartbeat.start()
+        return self
+
+    # ---------------- pages ----------------
+    def add_page(self, url, kind, query=None, priority=0.0) -> bool:
+        # Adds a page every worker may lease; a page that is still pending
+        # gets the new priority, a retired one is queued again. True if the
+        # page was new.
+        def add(conn):
+            added = conn.execute(
+                "INSERT OR IGNORE INTO work_pages (url, kind, query, priority, added_at) VALUES (?, ?, ?, ?, ?)",
+                (url, kind, query, priority, time.time()),
+            ).rowcount == 1
+            if not added:
+                conn.execute("UPDATE work_pages SET priority = ?, status = 'pending' WHERE url = ? "
+                             "AND status IN ('pending', 'retired')", (priority, url))
+            return added
+        return self._transaction(add)
+
+    def retire(self, url) -> bool:
+        # Takes a pending page, or one this worker leased, out of the queue
+        def take_out(conn):
+            return conn.execute(
+                "UPDATE work_pages SET status = 'retired', worker_id = NULL, lease_expires_at = NULL, "
+                "attempts = CASE WHEN status = 'leased' THEN MAX(0, attempts - 1) ELSE attempts END "
+                "WHERE url = ? AND (status = 'pending' OR (status = 'leased' AND worker_id = ?))",
+                (url, self.worker_id),
+            ).rowcount == 1
+        return self._transaction(take_out)
+
+    def set_priority(self, url, priority):
+        # Reorders a page that is still pending; unknown pages are not added
+        self._execute("UPDATE work_pages SET priority = ? WHERE url = ? AND status = 'pending'", (priority, url))
+
+    def _reap(self, conn, now):
+        # Leases whose worker stopped sending heartbeats go back to the queue
+        return conn.execute(
+            "UPDATE work_pages SET status = 'pending', worker_id = NULL, lease_expires_at = NULL "
+            "WHERE status = 'leased' AND lease_expires_at < ?", (now,),
+        ).rowcount
+
+    def lease(self):
+        # (url, kind, query) of the next page, now leased to this worker; None if nothing is pending
+        def take(conn):
+            now = time.time()
+            reaped = self._reap(conn, now)
+            if reaped:
+                log.info(f"  ↺ Reassigning {reaped} expired page leases")
+            row = conn.execute(
+                "SELECT url, kind, query FROM work_pages WHERE status = 'pending' "
+                "ORDER BY priority DESC, added_at LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE work_pages SET status = 'leased', worker_id = ?, lease_expires_at = ?, "
+                    "attempts = attempts + 1 WHERE url = ?",
+                    (self.worker_id, now + self.lease_seconds, row[0]),
+                )
+            return row
+        return self._transaction(take)
+
+    def heartbeat(self):
+        now = time.time()
+
+        def renew(conn):
+            conn.execute("UPDATE workers SET heartbeat_at = ? WHERE worker_id = ?", (now, self.worker_id))
+            conn.execute(
+                "UPDATE work_pages SET lease_expires_at = ? WHERE status = 'leased' AND worker_id = ?",
+                (now + self.lease_seconds, self.worker_id),
+            )
+        self._transaction(renew)
+
+    def complete(self, url, links_found=None):
+        self._execute(
+            "UPDATE work_pages SET status = 'done', links_found = ?, done_at = ?, lease_expires_at = NULL "
+            "WHERE url = ? AND worker_id = ?", (links_found, time.time(), url, self.worker_id),
+        )
+
+    def fail(self, url):
+        # Back to the queue for another worker until max_attempts is used up;
+        # done_at is only set once the page has failed for good
+        self._execute(
+            "UPDATE work_pages SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "done_at = CASE WHEN attempts >= ? THEN ? END, worker_id = NULL, lease_expires_at = NULL "
+            "WHERE url = ? AND worker_id = ?",
+            (self.max_attempts, self.max_attempts, time.time(), url, self.worker_id),
+        )
+
+    def release(self, url):
+        # Unfinished page this worker gives back, e.g. after reaching MAX_VIDEOS
+        self._execute(
+            "UPDATE work_pages SET status = 'pending', worker_id = NULL, lease_expires_at = NULL, "
+            "attempts = MAX(0, attempts - 1) WHERE url = ? AND worker_id = ? AND status = 'leased'",
+            (url, self.worker_id),
+        )
+
+    def leased_count(self) -> int:
+        # Pages some worker is crawling right now; they may still add channels
+        return self._execute("SELECT COUNT(*) FROM work_pages WHERE status = 'leased'")[0][0]
+
+    def page_counts(self) -> dict:
+        return dict(self._execute("SELECT status, COUNT(*) FROM work_pages GROUP BY status"))
+
+    # ---------------- videos ----------------
+    def claim_video(self, video_id) -> bool:
+        # True if this worker should evaluate the video: nobody had claimed
+        # it, or this worker did before
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO claimed_videos (video_id, worker_id, claimed_at) VALUES (?, ?, ?)",
+                (video_id, self.worker_id, time.time()),
+            )
+            owner = self._conn.execute("SELECT worker_id FROM claimed_videos WHERE video_id = ?",
+                                       (video_id,)).fetchone()
+        return owner is not None and owner[0] == self.worker_id
+
+    def workers(self, active_within=None) -> list:
+        # [(worker_id, heartbeat_at)] of workers seen within active_within seconds (default: 3 leases)
+        since = time.time() - (active_within or 3 * self.lease_seconds)
+        return self._execute("SELECT worker_id, heartbeat_at FROM workers WHERE heartbeat_at >= ? "
+                             "ORDER BY worker_id", (since,))
+
+    def close(self):
+        # Pages still leased (interrupted run) go back to the queue
+        self._heartbeat.stop()
+        self._execute("UPDATE work_pages SET status = 'pending', worker_id = NULL, lease_expires_at = NULL "
+                      "WHERE status = 'leased' AND worker_id = ?", (self.worker_id,))
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCoordinator:
+    # Keys (under `prefix`):
+    #   pending        sorted set  url -> priority
+    #   leases         sorted set  url -> lease expiry (unix time)
+    #   page:<url>     hash        kind, query, status, worker, attempts, links_found, done_at
+    #   videos         hash        video_id -> worker that claimed it
+    #   workers        sorted set  worker_id -> last heartbeat
+    def __init__(self, client, worker_id, lease_seconds=300, max_attempts=3, prefix="video_crawler:"):
+        self.client = client
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self._heartbeat = _Heartbeat(self)
+
+    def _key(self, name):
+        return self.prefix + name
+
+    def _page(self, url):
+        return self.prefix + "page:" + url
+
+    @staticmethod
+    def _str(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _watched(self, keys, fn):
+        # Runs fn(pipe) under WATCH until no other worker changed `keys` in between
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*keys)
+                    return fn(pipe)
+                except redis.WatchError:
+                    continue
+
+    def start(self):
+        self.client.zadd(self._key("workers"), {self.worker_id: time.time()})
+        self._heartbeat.start()
+        return self
+
+    # ---------------- pages ----------------
+    def add_page(self, url, kind, query=None, priority=0.0) -> bool:
+        added = self.client.hsetnx(self._page(url), "kind", kind)
+        if added:
+            self.client.hset(self._page(url), mapping={"query": query or "", "status": "pending",
+                                                       "attempts": 0, "priority": priority})
+            self.client.zadd(self._key("pending"), {url: priority})
+        elif self._str(self.client.hget(self._page(url), "status")) == "retired":
+            self.client.hset(self._page(url), mapping={"status": "pending", "priority": priority})
+            self.client.zadd(self._key("pending"), {url: priority})
+        else:
+            self.set_priority(url, priority)
+        return bool(added)
+
+    def retire(self, url) -> bool:
+        def take_out(pipe):
+            status, worker = (self._str(v) for v in pipe.hmget(self._page(url), "status", "worker"))
+            if not (status == "pending" or (status == "leased" and worker == self.worker_id)):
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.zrem(self._key("pending"), url)
+            pipe.zrem(self._key("leases"), url)
+            pipe.hset(self._page(url), mapping={"status": "retired", "worker": ""})
+            if status == "leased":
+                pipe.hincrby(self._page(url), "attempts", -1)
+            pipe.execute()
+            return True
+        return self._watched([self._key("pending"), self._key("leases"), self._page(url)], take_out)
+
+    def set_priority(self, url, priority):
+        if self.client.zadd(self._key("pending"), {url: priority}, xx=True, ch=True):  # only if still pending
+            self.client.hset(self._page(url), "priority", priority)
+
+    def _reap(self, now):
+        reaped = 0
+        for url in self.client.zrangebyscore(self._key("leases"), "-inf", now):
+            url = self._str(url)
+
+            def requeue(pipe):
+                expiry = pipe.zscore(self._key("leases"), url)
+                if expiry is None or expiry >= now:
+                    pipe.unwatch()
+                    return 0  # renewed or finished meanwhile
+                priority = float(pipe.hget(self._page(url), "priority") or 0)
+                pipe.multi()
+                pipe.zrem(self._key("leases"), url)
+                pipe.zadd(self._key("pending"), {url: priority})
+                pipe.hset(self._page(url), mapping={"status": "pending", "worker": ""})
+                pipe.execute()
+                return 1
+            reaped += self._watched([self._key("leases")], requeue)
+        return reaped
+
+    def lease(self):
+        now = time.time()
+        reaped = self._reap(now)
+        if reaped:
+            log.info(f"  ↺ Reassigning {reaped} expired page leases")
+
+        def take(pipe):
+            top = pipe.zrevrange(self._key("pending"), 0, 0, withscores=True)
+            if not top:
+                pipe.unwatch()
+                return None
+            url, priority = self._str(top[0][0]), top[0][1]
+            kind, query = pipe.hmget(self._page(url), "kind", "query")
+            pipe.multi()
+            pipe.zrem(self._key("pending"), url)
+            pipe.zadd(self._key("leases"), {url: now + self.lease_seconds})
+            pipe.hset(self._page(url), mapping={"status": "leased", "worker": self.worker_id, "priority": priority})
+            pipe.hincrby(self._page(url), "attempts", 1)
+            pipe.execute()
+            return url, self._str(kind), self._str(query) or None
+        return self._watched([self._key("pending")], take)
+
+    def _leased_by_me(self, url):
+        return self._str(self.client.hget(self._page(url), "worker")) == self.worker_id
+
+    def heartbeat(self):
+        now = time.time()
+        self.client.zadd(self._key("workers"), {self.worker_id: now})
+        for url in self.client.zrange(self._key("leases"), 0, -1):
+            url = self._str(url)
+            if self._leased_by_me(url):
+                self.client.zadd(self._key("leases"), {url: now + self.lease_seconds}, xx=True)
+
+    def _finish(self, url, status, **fields):
+        def finish(pipe):
+            if self._str(pipe.hget(self._page(url), "worker")) != self.worker_id:
+                pipe.unwatch()
+                return  # the lease expired and another worker has the page now
+            priority = float(pipe.hget(self._page(url), "priority") or 0)
+            pipe.multi()
+            pipe.zrem(self._key("leases"), url)
+            pipe.hset(self._page(url), mapping=dict(fields, status=status, worker=""))
+            if status == "pending":
+                pipe.zadd(self._key("pending"), {url: priority})
+            pipe.execute()
+        self._watched([self._key("leases"), self._page(url)], finish)
+
+    def complete(self, url, links_found=None):
+        self._finish(url, "done", links_found=links_found if links_found is not None else "", done_at=time.time())
+
+    def fail(self, url):
+        attempts = int(self.client.hget(self._page(url), "attempts") or 0)
+        if attempts >= self.max_attempts:
+            self._finish(url, "failed", done_at=time.time())
+        else:
+            self._finish(url, "pending")
+
+    def release(self, url):
+        if self._leased_by_me(url):
+            self.client.hincrby(self._page(url), "attempts", -1)
+        self._finish(url, "pending")
+
+    def leased_count(self) -> int:
+        return self.client.zcard(self._key("leases"))
+
+    def page_counts(self) -> dict:
+        counts = {}
+        for key in self.client.scan_iter(match=self._page("*")):
+            status = self._str(self.client.hget(key, "status"))
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    # ---------------- videos ----------------
+    def claim_video(self, video_id) -> bool:
+        self.client.hsetnx(self._key("videos"), video_id, self.worker_id)
+        return self._str(self.client.hget(self._key("videos"), video_id)) == self.worker_id
+
+    def workers(self, active_within=None) -> list:
+        since = time.time() - (active_within or 3 * self.lease_seconds)
+        return [(self._str(w), t) for w, t in
+                self.client.zrangebyscore(self._key("workers"), since, "+inf", withscores=True)]
+
+    def close(self):
+        self._heartbeat.stop()
+        for url in self.client.zrange(self._key("leases"), 0, -1):
+            url = self._str(url)
+            if self._leased_by_me(url):
+                self.release(url)